@@ -11,6 +11,8 @@
 
 #1. Captures live video from the webcam.
 #2. Converts each frame to grayscale and calculates the average pixel intensity.
+#   (or, in estimator mode, samples weighted luma straight from the BGR frame on a
+#   strided grid, optionally restricted to a region of interest).
 #3. Maps this calculated 'lux' value to a realistic screen brightness percentage.
 #4. Smoothly adjusts the laptop’s screen brightness through the
  #  `screen_brightness_control` module.
@@ -22,8 +24,31 @@
 #- Real-time brightness adjustment based on environment lighting.
 #- Works on laptops without dedicated light sensors.
 #- Efficient grayscale analysis for fast performance.
+#- Subsampled luminance estimator (--stride / --roi) that skips the full-frame
+#  grayscale conversion; see brightness_benchmark.py for accuracy vs cost.
+#- Adaptive sampling (--adaptive): samples slowly while the light is stable,
+#  speeds up on changes, releases the webcam while idle and stays within a
+#  configurable CPU budget, reporting samples per minute.
+#- Asynchronous actuator (--async-actuator): brightness writes run on a background
+#  thread that coalesces targets, ramps in bounded steps and rate-limits writes,
+#  so slow DDC/CI monitors never stall frame reads.
+#- Replaceable frame sources (webcam, recorded video, synthetic lighting ramps)
+#  and a fake brightness sink, so the pipeline can be benchmarked offline with
+#  brightness_benchmark.py.
+#- Shared camera (--broker): frames come downscaled at --broker-fps from
+#  camera_broker.py, so the gesture controllers can use the webcam at the same
+#  time; releasing the camera while idle only detaches from the broker.
 #- Prevents unnecessary brightness changes using differential thresholding.
+#- Optional temporal filter stage (--filter ema|median|hysteresis) that smooths
+#  flickering light and reports how many brightness writes it saved.
 #- Simple, compact, and hardware-independent implementation.
+#- Sets every connected display at once through display_manager.py: displays
+#  are enumerated once and written in parallel, each with an optional
+#  --display-profile offset and gamma, and write latency per display is
+#  printed on exit.
+#- The displays are enumerated in the background while the camera opens;
+#  the time to the first brightness update is printed, and --startup-report
+#  breaks it down by stage and import.
 
 #Use Cases:
 
@@ -31,46 +56,593 @@
 #- Eye comfort during long laptop usage
 #- Adaptive brightness for coding, studying, or multimedia use
 
-import cv2
+from staged_startup import startup, warm_up
+import argparse
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import deque
+cv2 = startup.import_module("cv2")
 import numpy as np
-import screen_brightness_control as sbc
+
+from camera_broker import DEFAULT_ADDRESS, BrokerFrameSource, parse_address
+from display_manager import DisplayManager, SbcDisplayBackend, parse_display_profile
+
+# Every connected display, enumerated once (on a background thread while the
+# camera opens, see main) and written in parallel
+displays = DisplayManager(SbcDisplayBackend())
+
+# Frame size requested from the camera broker; plenty for an average brightness
+BROKER_FRAME_SIZE = (160, 120)
+
+# BT.601 luma weights in B, G, R order (the same weights COLOR_BGR2GRAY uses)
+LUMA_WEIGHTS_BGR = np.array([0.114, 0.587, 0.299])
 
 def calculate_lux(grayscale_frame):
     avg_brightness = np.mean(grayscale_frame)
     return avg_brightness * 1.2
 
+# Estimate the same lux value as calculate_lux without converting the whole frame.
+# Above stride 4 only every `stride`-th pixel in each direction is read, and the
+# luma weights are applied to the per-channel means (the weighted sum is linear,
+# so this equals the mean of the per-pixel luma). `roi` is (left, top, right, bottom) as fractions of
+# the frame, e.g. (0, 0.6, 1, 1) keeps the bottom strip and leaves out faces and
+# bright windows behind the user.
+def estimate_lux(frame, stride=8, roi=None):
+    if roi is not None:
+        height, width = frame.shape[:2]
+        left, top, right, bottom = roi
+        frame = frame[int(top * height):int(bottom * height), int(left * width):int(right * width)]
+    # The per-channel means come from cv2.mean, several times faster than numpy's.
+    # Up to stride 4, cv2.mean over every pixel (about 0.06 ms at 640x480) is
+    # cheaper than gathering the sample into a contiguous copy first.
+    if stride > 4:
+        frame = np.ascontiguousarray(frame[::stride, ::stride])
+    channel_means = np.array(cv2.mean(frame)[:3])
+    return float(channel_means @ LUMA_WEIGHTS_BGR) * 1.2
+
+def measure_lux(frame, stride=None, roi=None):
+    if stride is None and roi is None:
+        grayscale_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return calculate_lux(grayscale_frame)
+    return estimate_lux(frame, stride or 1, roi)
+
+def parse_roi(text):
+    roi = tuple(float(value) for value in text.split(","))
+    if len(roi) != 4 or not (0 <= roi[0] < roi[2] <= 1 and 0 <= roi[1] < roi[3] <= 1):
+        raise argparse.ArgumentTypeError("ROI must be left,top,right,bottom fractions between 0 and 1")
+    return roi
+
 def map_lux_to_brightness(lux, min_brightness=10, max_brightness=100):
     brightness = np.clip(lux / 255 * max_brightness, min_brightness, max_brightness)
     return int(brightness)
 
-def adjust_brightness(brightness):
-    sbc.set_brightness(brightness)
-    print(f"Adjusted Brightness: {brightness}%")
+def adjust_brightness(brightness, backend=None, verbose=True):
+    (backend or displays).set_brightness(brightness)
+    if verbose:
+        print(f"Adjusted Brightness: {brightness}%")
 
-cap = cv2.VideoCapture(0)
-if not cap.isOpened():
-    print("Error: Could not open webcam.")
-    exit()
+# In-process stand-in for the display manager (or the screen_brightness_control module). It records every
+# write and can simulate a slow (e.g. DDC/CI) display with `delay` seconds per write.
+class FakeBrightnessControl:
+    def __init__(self, initial=50, delay=0.0):
+        self.brightness = initial
+        self.delay = delay
+        self.writes = []
 
-try:
-    previous_brightness = None
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            print("Error: Could not read frame.")
-            break
+    def get_brightness(self, display=None):
+        return [self.brightness]
 
-        grayscale_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        lux = calculate_lux(grayscale_frame)
-        print(f"Lux Intensity: {lux:.2f}")
+    def set_brightness(self, value, display=None):
+        if self.delay:
+            time.sleep(self.delay)
+        self.brightness = int(value)
+        self.writes.append((time.monotonic(), self.brightness))
+
+# Applies brightness changes on a background thread. Only the latest requested
+# target is kept, so targets that arrive while a write is in flight are coalesced.
+# The thread ramps toward the target in steps of at most `max_step` percent and
+# leaves at least `min_write_interval` seconds between hardware writes.
+class BrightnessActuator:
+    def __init__(self, backend=displays, max_step=5, min_write_interval=0.1, clock=time.monotonic):
+        self.backend = backend
+        self.max_step = max_step
+        self.min_write_interval = min_write_interval
+        self.clock = clock
+        self.condition = threading.Condition()
+        self.target = None
+        self.current = None
+        self.requested = 0
+        self.issued = 0
+        self.failed = 0
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="brightness-actuator", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self, timeout=2.0):
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    def request(self, brightness):
+        with self.condition:
+            self.target = int(brightness)
+            self.requested += 1
+            self.condition.notify_all()
+
+    # Block until the display has reached the latest target (used by tests and benchmarks)
+    def wait_idle(self, timeout=None):
+        with self.condition:
+            return self.condition.wait_for(lambda: self.target is None or self.target == self.current, timeout)
+
+    def counters(self):
+        with self.condition:
+            return {"requested": self.requested, "issued": self.issued, "failed": self.failed}
+
+    def _read_current(self):
+        try:
+            value = self.backend.get_brightness()
+            return int(value[0] if isinstance(value, (list, tuple)) else value)
+        except Exception:
+            return None
+
+    def _run(self):
+        last_write = float("-inf")
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: not self.running or
+                                        (self.target is not None and self.target != self.current))
+                if not self.running:
+                    return
+
+            delay = last_write + self.min_write_interval - self.clock()
+            if delay > 0:
+                time.sleep(delay)
+
+            # The first hardware read can be slow (DDC/CI), so it happens outside
+            # the lock and request() from the capture loop never waits on it
+            with self.condition:
+                needs_read = self.current is None
+            if needs_read:
+                level_read = self._read_current()
+                with self.condition:
+                    if self.current is None:
+                        self.current = level_read
+            with self.condition:
+                target = self.target
+                current = self.current
+            if target is None or target == current:
+                continue
+            if current is None:
+                level = target
+            else:
+                level = current + max(-self.max_step, min(self.max_step, target - current))
+
+            try:
+                self.backend.set_brightness(level)
+            except Exception as e:
+                print(f"Failed to set brightness to {level}%: {e}")
+                with self.condition:
+                    self.failed += 1
+                    # Give up on this target until a new one is requested
+                    if self.target == target:
+                        self.target = None
+                    self.condition.notify_all()
+                continue
+            last_write = self.clock()
+
+            with self.condition:
+                self.current = level
+                self.issued += 1
+                self.condition.notify_all()
+
+# Webcam wrapper that can be released between samples and reopened later.
+# The first frames after opening are discarded while auto-exposure settles.
+# When more than flush_after seconds have passed since the last read (the
+# adaptive sampler slept with the camera open), the driver's buffer still holds
+# frames from before the pause, so flush_frames of them are grabbed and dropped.
+class CameraSource:
+    def __init__(self, index=0, warmup_frames=5, flush_frames=4, flush_after=0.2, clock=time.monotonic):
+        self.index = index
+        self.warmup_frames = warmup_frames
+        self.flush_frames = flush_frames
+        self.flush_after = flush_after
+        self.clock = clock
+        self.cap = None
+        self.opens = 0
+        self.last_read = None
+        self.flushed = 0
+
+    def open(self):
+        if self.cap is not None:
+            return True
+        cap = cv2.VideoCapture(self.index)
+        if not cap.isOpened():
+            cap.release()
+            return False
+        for _ in range(self.warmup_frames):
+            cap.read()
+        self.cap = cap
+        self.opens += 1
+        return True
+
+    def read(self):
+        if not self.open():
+            return False, None
+        if self.last_read is not None and self.clock() - self.last_read > self.flush_after:
+            for _ in range(self.flush_frames):
+                self.cap.grab()
+            self.flushed += self.flush_frames
+        ret, frame = self.cap.read()
+        self.last_read = self.clock()
+        return ret, frame
+
+    def release(self):
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+        self.last_read = None
+
+    def is_open(self):
+        return self.cap is not None
+
+# Recorded video played back through the same interface as CameraSource.
+class VideoFileSource(CameraSource):
+    def __init__(self, path, loop=False):
+        # A file has no driver buffer: every frame is played back
+        super().__init__(path, warmup_frames=0, flush_frames=0)
+        self.loop = loop
+
+    def read(self):
+        ret, frame = super().read()
+        if not ret and self.loop and self.cap is not None:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read()
+        return ret, frame
+
+# Synthetic lighting: one frame per entry of `levels` (mean gray level 0-255),
+# rendered as a fixed noisy wall texture shifted to that level.
+class SyntheticLightSource:
+    def __init__(self, levels, width=320, height=240, noise=6.0, seed=0):
+        self.levels = list(levels)
+        rng = np.random.default_rng(seed)
+        ys, xs = np.mgrid[0:height, 0:width]
+        gradient = 30 * (xs / width - 0.5) + 20 * (ys / height - 0.5)
+        self.texture = gradient[:, :, None] + rng.normal(0, noise, (height, width, 3))
+        self.position = 0
+
+    def open(self):
+        return True
+
+    def read(self):
+        if self.position >= len(self.levels):
+            return False, None
+        level = self.levels[self.position]
+        self.position += 1
+        return True, np.clip(self.texture + level, 0, 255).astype(np.uint8)
+
+    def release(self):
+        pass
+
+    def is_open(self):
+        return True
+
+def light_ramp(start, end, frames):
+    return list(np.linspace(start, end, frames))
+
+# Mains-powered light seen by a webcam: `base` level with a periodic swing of
+# +/- `amplitude` every `period` frames (monitor refresh beating, fluorescent tubes).
+def light_flicker(base, amplitude, period, frames):
+    return [base + amplitude * np.sin(2 * np.pi * i / period) for i in range(frames)]
+
+# Temporal filters applied between measure_lux and map_lux_to_brightness. Each
+# update costs O(1) for a fixed configuration. `saved_writes` is kept up to date by
+# BrightnessController: the writes the unfiltered lux would have caused minus the
+# writes actually issued.
+class LuxFilter:
+    name = "none"
+
+    def __init__(self):
+        self.saved_writes = 0
+
+    def update(self, lux):
+        return lux
+
+# Exponential moving average; smaller alpha smooths more but lags more. A step
+# larger than `snap` lux (a light switched on or off) is taken at once instead of
+# being averaged in over a dozen frames and a dozen writes.
+class EMAFilter(LuxFilter):
+    name = "ema"
+
+    def __init__(self, alpha=0.2, snap=40.0):
+        super().__init__()
+        self.alpha = alpha
+        self.snap = snap
+        self.value = None
+
+    def update(self, lux):
+        if self.value is None or abs(lux - self.value) > self.snap:
+            self.value = lux
+        else:
+            self.value += self.alpha * (lux - self.value)
+        return self.value
+
+# Median of the last `window` samples, kept in a sorted list next to the FIFO so
+# each update is one insertion and one removal. Rejects short spikes entirely.
+class MedianFilter(LuxFilter):
+    name = "median"
+
+    def __init__(self, window=9):
+        super().__init__()
+        self.window = window
+        self.samples = deque()
+        self.ordered = []
+
+    def update(self, lux):
+        self.samples.append(lux)
+        insort(self.ordered, lux)
+        if len(self.samples) > self.window:
+            del self.ordered[bisect_left(self.ordered, self.samples.popleft())]
+        return self.ordered[len(self.ordered) // 2]
+
+# Two-threshold band: the output holds while the input stays within +/- `band`
+# lux of it and otherwise follows only as far as the near edge of the band, so
+# any swing narrower than 2 * band (mains flicker) is absorbed wherever it starts.
+# Steps larger than `snap` lux are taken at once so a light switch has no offset.
+class HysteresisFilter(LuxFilter):
+    name = "hysteresis"
+
+    def __init__(self, band=15.0, snap=40.0):
+        super().__init__()
+        self.band = band
+        self.snap = snap
+        self.value = None
+
+    def update(self, lux):
+        if self.value is None or abs(lux - self.value) > self.snap:
+            self.value = lux
+        elif lux > self.value + self.band:
+            self.value = lux - self.band
+        elif lux < self.value - self.band:
+            self.value = lux + self.band
+        return self.value
+
+def make_lux_filter(name, alpha=0.2, window=9, band=15.0, snap=40.0):
+    if name == "ema":
+        return EMAFilter(alpha, snap)
+    if name == "median":
+        return MedianFilter(window)
+    if name == "hysteresis":
+        return HysteresisFilter(band, snap)
+    return LuxFilter()
+
+# The calculate_lux -> map_lux_to_brightness -> adjust_brightness pipeline for one
+# frame at a time. Writes go to `backend` (the module's `displays` manager by
+# default, or a FakeBrightnessControl) or, when given, to an asynchronous actuator.
+class BrightnessController:
+    def __init__(self, backend=None, actuator=None, stride=None, roi=None, threshold=2, verbose=True,
+                 lux_filter=None):
+        self.backend = backend
+        self.actuator = actuator
+        self.stride = stride
+        self.roi = roi
+        self.threshold = threshold
+        self.verbose = verbose
+        self.lux_filter = lux_filter or LuxFilter()
+        self.previous_brightness = None
+        self.frames = 0
+        self.writes = 0
+        # Shadow of the threshold logic on unfiltered lux, to count saved writes
+        self.unfiltered_brightness = None
+        self.unfiltered_writes = 0
+
+    def process(self, frame):
+        self.frames += 1
+        raw_lux = measure_lux(frame, self.stride, self.roi)
+        raw_brightness = map_lux_to_brightness(raw_lux)
+        if self.unfiltered_brightness is None or abs(self.unfiltered_brightness - raw_brightness) > self.threshold:
+            self.unfiltered_brightness = raw_brightness
+            self.unfiltered_writes += 1
+
+        lux = self.lux_filter.update(raw_lux)
+        if self.verbose:
+            print(f"Lux Intensity: {lux:.2f}")
         brightness = map_lux_to_brightness(lux)
 
-        if previous_brightness is None or abs(previous_brightness - brightness) > 2:
-            adjust_brightness(brightness)
-            previous_brightness = brightness
+        if self.previous_brightness is None or abs(self.previous_brightness - brightness) > self.threshold:
+            if self.actuator is None:
+                adjust_brightness(brightness, self.backend, self.verbose)
+            else:
+                self.actuator.request(brightness)
+                if self.verbose:
+                    print(f"Target Brightness: {brightness}%")
+            self.previous_brightness = brightness
+            self.writes += 1
+        self.lux_filter.saved_writes = self.unfiltered_writes - self.writes
+        return lux
+
+# Decides when to take the next ambient-light sample. The interval grows by
+# `backoff` while lux is stable, drops back to `min_interval` as soon as a sample
+# differs from the previous one by more than `change_threshold`, and is never
+# shorter than what keeps the measured CPU time per sample within `cpu_budget`
+# (a fraction of one core). Once the interval reaches `release_after` seconds the
+# camera is worth releasing between samples.
+class SamplingScheduler:
+    def __init__(self, min_interval=0.5, max_interval=30.0, change_threshold=3.0, backoff=1.5,
+                 cpu_budget=0.02, release_after=10.0, clock=time.monotonic, sleep=time.sleep):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.change_threshold = change_threshold
+        self.backoff = backoff
+        self.cpu_budget = cpu_budget
+        self.release_after = release_after
+        self.clock = clock
+        self.sleep = sleep
+        self.interval = min_interval
+        self.last_lux = None
+        self.sample_cost = 0.0
+        self.next_sample = clock()
+        self.sample_times = deque()
+
+    def record(self, lux, cpu_time):
+        now = self.clock()
+        self.sample_times.append(now)
+        # Smoothed CPU cost per sample, including camera reopen and warm-up
+        self.sample_cost = cpu_time if not self.sample_cost else 0.8 * self.sample_cost + 0.2 * cpu_time
+
+        if self.last_lux is None or abs(lux - self.last_lux) > self.change_threshold:
+            interval = self.min_interval
+        else:
+            interval = min(self.interval * self.backoff, self.max_interval)
+        self.last_lux = lux
+
+        if self.cpu_budget:
+            interval = max(interval, self.sample_cost / self.cpu_budget)
+        self.interval = interval
+        self.next_sample = now + interval
+
+    def should_release(self):
+        return self.interval >= self.release_after
+
+    def wait(self):
+        delay = self.next_sample - self.clock()
+        if delay > 0:
+            self.sleep(delay)
+
+    def samples_per_minute(self):
+        cutoff = self.clock() - 60
+        while self.sample_times and self.sample_times[0] < cutoff:
+            self.sample_times.popleft()
+        return len(self.sample_times)
+
+def main():
+    parser = argparse.ArgumentParser(description="Adjust screen brightness from webcam ambient light.")
+    parser.add_argument("--stride", type=int, default=None,
+                        help="use the subsampled estimator, reading every Nth pixel (e.g. 8)")
+    parser.add_argument("--roi", type=parse_roi, default=None,
+                        help="region to measure as left,top,right,bottom fractions, e.g. 0,0.6,1,1")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="sample slowly while the light is stable instead of on every frame")
+    parser.add_argument("--min-interval", type=float, default=0.5,
+                        help="adaptive mode: seconds between samples while the light is changing")
+    parser.add_argument("--max-interval", type=float, default=30.0,
+                        help="adaptive mode: seconds between samples while the light is stable")
+    parser.add_argument("--cpu-budget", type=float, default=0.02,
+                        help="adaptive mode: max fraction of one CPU core to spend (0 disables)")
+    parser.add_argument("--release-after", type=float, default=10.0,
+                        help="adaptive mode: release the webcam when the interval reaches this many seconds")
+    parser.add_argument("--async-actuator", action="store_true",
+                        help="write brightness from a background thread with coalescing and ramps")
+    parser.add_argument("--ramp-step", type=int, default=5,
+                        help="async actuator: largest brightness change per write, in percent")
+    parser.add_argument("--min-write-interval", type=float, default=0.1,
+                        help="async actuator: minimum seconds between hardware writes")
+    parser.add_argument("--filter", choices=["none", "ema", "median", "hysteresis"], default="none",
+                        help="temporal filter applied to lux before mapping it to brightness")
+    parser.add_argument("--ema-alpha", type=float, default=0.2, help="ema filter: smoothing factor")
+    parser.add_argument("--median-window", type=int, default=9, help="median filter: samples in the window")
+    parser.add_argument("--hysteresis-band", type=float, default=15.0,
+                        help="hysteresis filter: half-width of the band in lux")
+    parser.add_argument("--filter-snap", type=float, default=40.0,
+                        help="ema and hysteresis filters: lux step taken at once instead of smoothed")
+    parser.add_argument("--video", help="read frames from a recorded video instead of the webcam")
+    parser.add_argument("--fake-display", action="store_true",
+                        help="send brightness writes to an in-process fake instead of the display")
+    parser.add_argument("--broker", nargs="?", type=parse_address, const=DEFAULT_ADDRESS, metavar="HOST:PORT",
+                        help="read frames from camera_broker.py instead of opening the webcam")
+    parser.add_argument("--broker-fps", type=float, default=1.0, help="broker mode: frames per second to request")
+    parser.add_argument("--display-profile", type=parse_display_profile, action="append", default=[],
+                        metavar="NAME:OFFSET[:GAMMA]",
+                        help="per-display brightness offset and curve; NAME '*' applies to all others (repeatable)")
+    parser.add_argument("--startup-report", action="store_true",
+                        help="print the time to each startup stage and every timed import")
+    args = parser.parse_args()
+    if args.stride is not None and args.stride < 1:
+        parser.error("--stride must be at least 1")
+
+    displays.profiles.update(args.display_profile)
+    if not args.fake_display:
+        warm_up(tasks=[displays.refresh])
+    if args.video:
+        camera = VideoFileSource(args.video)
+    elif args.broker:
+        camera = BrokerFrameSource(args.broker, "brightness", args.broker_fps, *BROKER_FRAME_SIZE)
+    else:
+        camera = CameraSource(0, warmup_frames=5 if args.adaptive else 0)
+    if not camera.open():
+        print("Error: Could not open video." if args.video else "Error: Could not open webcam.")
+        exit()
+    startup.mark("camera open")
+    backend = FakeBrightnessControl() if args.fake_display else displays
+
+    scheduler = None
+    if args.adaptive:
+        scheduler = SamplingScheduler(args.min_interval, args.max_interval,
+                                      cpu_budget=args.cpu_budget, release_after=args.release_after)
+    actuator = None
+    if args.async_actuator:
+        actuator = BrightnessActuator(backend, args.ramp_step, args.min_write_interval).start()
+    lux_filter = make_lux_filter(args.filter, args.ema_alpha, args.median_window, args.hysteresis_band,
+                                 args.filter_snap)
+    controller = BrightnessController(backend, actuator, args.stride, args.roi, lux_filter=lux_filter)
+    first_update = True
+    last_report = time.monotonic()
+
+    try:
+        while True:
+            cpu_start = time.process_time()
+            ret, frame = camera.read()
+            if not ret:
+                print("Error: Could not read frame.")
+                break
+
+            lux = controller.process(frame)
+            if first_update:
+                first_update = False
+                startup.mark("first update")
+                if args.startup_report:
+                    startup.print_report()
+                else:
+                    print(f"First brightness update {startup.stage_time('first update') * 1000:.0f} ms after start")
+
+            if scheduler is None:
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    break
+                continue
+
+            scheduler.record(lux, time.process_time() - cpu_start)
+            if scheduler.should_release():
+                camera.release()
+            if time.monotonic() - last_report >= 60:
+                last_report = time.monotonic()
+                print(f"Sampling: {scheduler.samples_per_minute()} samples/min, "
+                      f"interval {scheduler.interval:.1f}s, "
+                      f"CPU {scheduler.sample_cost * 1e3:.1f} ms/sample, "
+                      f"camera {'open' if camera.is_open() else 'released'}")
+            scheduler.wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if lux_filter.name != "none":
+            print(f"Filter {lux_filter.name}: {controller.writes} writes, {lux_filter.saved_writes} saved")
+        if actuator is not None:
+            actuator.stop()
+            counters = actuator.counters()
+            print(f"Brightness writes: {counters['requested']} requested, "
+                  f"{counters['issued']} issued, {counters['failed']} failed")
+        if backend is displays:
+            for line in displays.format_lines():
+                print(f"Display {line}")
+            displays.close()
+        camera.release()
+        cv2.destroyAllWindows()
 
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            break
-finally:
-    cap.release()
-    cv2.destroyAllWindows()
+if __name__ == "__main__":
+    main()
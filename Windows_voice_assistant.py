@@ -18,9 +18,17 @@
 #
 # How It Works:
 # -------------
-# 1. Continuously listens for the activation phrase: "Hello Windows".
+# 1. Continuously listens for the activation phrase: "Hello Windows". The
+#    microphone stays open; a local voice-activity detector with a persistent
+#    noise floor cuts the audio into utterances, and only hotword-like ones
+#    (PocketSphinx keyword spotting when installed) are checked further, so
+#    there is no per-utterance calibration and far fewer Google requests.
 # 2. Once triggered, it enters a 2-minute command session.
-# 3. Recognizes spoken commands using Google Speech Recognition.
+# 3. Recognizes spoken commands using Google Speech Recognition, or an offline
+#    engine (PocketSphinx or Vosk) set by RECOGNITION_BACKEND. The microphone
+#    keeps capturing while earlier commands are transcribed by a small worker
+#    pool, and commands run in the order they were spoken
+#    (recognition_pipeline.py).
 # 4. Executes system actions such as:
 #       - Checking time
 #       - Adjusting brightness
@@ -30,8 +38,19 @@
 #       - Controlling YouTube playback
 #       - Opening applications (Chrome)
 #       - Searching on Google, YouTube, Wikipedia
+#    Commands declare their phrases and parameters (brightness level, search
+#    text and site) in command_registry.py; every transcript is matched against
+#    all of them in one pass over its words.
 # 5. Uses gTTS + pydub for voice responses and activation/deactivation sounds.
-# 6. Runs a background thread to monitor laptop battery and warn when low.
+#    Rendered replies are cached as PCM in memory and on disk (speech_cache.py);
+#    every fixed reply is rendered at startup, so it plays without a network
+#    round trip. All sounds play through one persistent audio engine
+#    (audio_engine.py) that queues them, lets the shutdown confirmation cut in
+#    and plays the preloaded activation sounds from memory.
+# 6. Monitors the laptop battery on one background scheduler thread
+#    (monitor_scheduler.py): it polls more often as the battery drains, backs
+#    off while charging and warns once when the battery gets low and once more
+#    when it gets critical, instead of every minute.
 #
 # Key Features:
 # -------------
@@ -46,10 +65,12 @@
 # ---------------------
 # - SpeechRecognition library for voice input
 # - gTTS + pydub for TTS responses and audio effects
-# - pyautogui for keyboard/mouse automation
+# - pyautogui for keyboard/mouse automation (key presses are queued through
+#   key_dispatch.KeyDispatcher so they never block the listening loop)
 # - psutil for battery monitoring
-# - screen_brightness_control for brightness adjustments
-# - Threading for parallel command listening and battery checks
+# - screen_brightness_control for brightness adjustments, on every display at
+#   once through display_manager.py
+# - Threading for parallel command listening and background monitors
 
 # Use Cases:
 # ----------
@@ -60,66 +81,106 @@
 #
 # Hotword:        "Hello Windows"
 # Exit Method:    Close the program or stop terminal execution
-
-import speech_recognition as sr
+#
+# Startup:
+# --------
+# Only what the hotword listener needs (speech_recognition and the microphone)
+# is loaded before listening starts. pyautogui, pygetwindow, psutil, the
+# display list (screen_brightness_control), the sound effects (pydub) and the
+# audio output load on a background thread, or on first use if a command comes
+# sooner.
+# The time until the assistant listens is printed; --startup-report adds each
+# stage and import (see staged_startup.py).
+
+from staged_startup import lazy_import, startup, warm_up
+import argparse
 from datetime import datetime
 import threading
-import pyautogui
 import os
-import webbrowser
-import screen_brightness_control as sbc
-import psutil
 import time
-import pygetwindow as gw
-import uuid
-import ctypes
-from gtts import gTTS
-from pydub import AudioSegment
-from pydub.playback import play
+sr = startup.import_module("speech_recognition")
+# Only needed by command handlers: imported in the background after startup, or on first use
+pyautogui = lazy_import("pyautogui")
+webbrowser = lazy_import("webbrowser")
+psutil = lazy_import("psutil")
+gw = lazy_import("pygetwindow")
+from audio_engine import PRIORITY_NORMAL, PRIORITY_URGENT, AudioEngine
+from hotword_gate import HotwordGate, MicrophoneFrames, NoiseFloor, make_hotword_stages
+from command_registry import ASSISTANT_COMMANDS, CommandRegistry, tokenize
+from display_manager import DisplayManager, DisplayProfile, SbcDisplayBackend
+from key_dispatch import KeyDispatcher
+from monitor_scheduler import BatteryProbe, MonitorScheduler, read_psutil_battery
+from recognition_pipeline import RecognitionPipeline, make_recognition_backend
+from speech_cache import GTTSSynthesizer, SpeechCache
 
 listening_for_command = True
 activate_sound_played = False
+keys = KeyDispatcher()
+speech_cache = SpeechCache(GTTSSynthesizer(tld='co.in'))
+audio_engine = AudioEngine()
+SOUND_EFFECTS = ["activate.mp3", "deactivate.mp3"]
+NOISE_FLOOR_FILE = "noise_floor.json"
+# The microphone front end, created by listen_and_execute
+voice_gate = None
+# "google", "sphinx" or "vosk" (VOSK_MODEL is the model folder)
+RECOGNITION_BACKEND = "google"
+VOSK_MODEL = "vosk-model-small-en-us"
+RECOGNITION_WORKERS = 2
+# Transcribes command-session speech while capture continues; set during a session
+command_pipeline = None
+SPEECH_SPEED = 1.2
+# Per-display brightness offsets and curves by display name ("*" for the rest),
+# e.g. {"DELL U2419H": DisplayProfile(offset=-10, gamma=1.2)}
+DISPLAY_PROFILES = {}
+# Every connected display, enumerated once at startup and written in parallel
+displays = DisplayManager(SbcDisplayBackend(), DISPLAY_PROFILES)
+
+# Replies that never change; rendered into the speech cache at startup
+RESPONSES = {
+    "low_battery": "Battery is getting low, charge the laptop.",
+    "critical_battery": "Battery is critically low, plug in the charger now.",
+    "brightness_range": "Please specify a brightness level between 1 and 100",
+    "brightness_unknown": "Sorry, I couldn't understand the brightness level.",
+    "brightness_failed": "Sorry, I couldn't change the brightness of your display.",
+    "shutdown_confirm": "Are you sure you want to shut down your PC? Say yes to confirm or no to cancel.",
+    "shutting_down": "Shutting down your PC now.",
+    "shutdown_cancelled": "Shutdown cancelled.",
+    "shutdown_not_understood": "I didn't understand your response. Shutdown cancelled.",
+    "shutdown_no_response": "No response received. Shutdown cancelled.",
+    "shutdown_unclear_audio": "Could not understand audio. Shutdown cancelled.",
+    "screenshot": "Screenshot taken.",
+    "window_closed": "Active window closed.",
+    "no_window": "No active window detected.",
+    "video_toggled": "Video toggled.",
+    "youtube_inactive": "YouTube is not currently the active window.",
+    "recognition_error": "Sorry, there was a problem with the speech recognition service.",
+}
 
 def play_sound_effect(filename):
     try:
-        sound = AudioSegment.from_file(filename)
-        threading.Thread(target=play, args=(sound,)).start()
+        audio_engine.play_effect(filename)
     except Exception as e:
         print(f"Failed to play sound {filename}: {e}")
 
-def speak(text, block=False):
-    filename = f"temp_speak_{uuid.uuid4()}.mp3"
+# Replies queue behind each other on the audio engine; interrupt=True cuts off
+# whatever is playing (and drops queued replies) for an urgent one
+def speak(text, block=False, priority=PRIORITY_NORMAL, interrupt=False):
     try:
-        tts = gTTS(text=text, lang='en', tld='co.in', slow=False)
-        tts.save(filename)
-        audio = AudioSegment.from_mp3(filename)
-        audio = audio._spawn(audio.raw_data, overrides={
-            "frame_rate": int(audio.frame_rate * 1.2)
-        }).set_frame_rate(audio.frame_rate)
-
+        handle = audio_engine.play(speech_cache.get(text, lang='en', speed=SPEECH_SPEED), priority, interrupt,
+                                   label=text)
         if block:
-            play(audio)
-        else:
-            threading.Thread(target=play, args=(audio,)).start()
+            handle.wait()
     except Exception as e:
         print(f"Error in speak: {e}")
-    finally:
-        if os.path.exists(filename):
-            try:
-                os.remove(filename)
-            except Exception as cleanup_e:
-                print(f"Error during cleanup: {cleanup_e}")
 
 def get_battery_percentage():
     battery = psutil.sensors_battery()
     return battery.percent
 
-def check_battery_status():
-    while True:
-        battery_percentage = get_battery_percentage()
-        if battery_percentage <= 15:
-            speak("Battery is getting low, charge the laptop.")
-        time.sleep(60)
+# Battery alerts are edge-triggered: spoken once per drop below each level
+def battery_alert(alert):
+    print(f"{alert.name}: {alert.message}")
+    speak(RESPONSES[alert.name], priority=PRIORITY_URGENT)
 
 def get_current_time():
     now = datetime.now().strftime("%I:%M %p")
@@ -129,12 +190,16 @@ def set_brightness(level):
     try:
         level = int(level)
         if 1 <= level <= 100:
-            sbc.set_brightness(level)
+            displays.set_brightness(level)
             speak(f"Brightness set to {level} percent")
         else:
-            speak("Please specify a brightness level between 1 and 100")
+            speak(RESPONSES["brightness_range"])
     except ValueError:
-        speak("Sorry, I couldn't understand the brightness level.")
+        speak(RESPONSES["brightness_unknown"])
+    except OSError as e:
+        # Raised by the display manager when no display could be written
+        print(e)
+        speak(RESPONSES["brightness_failed"])
 
 
 def get_active_window_title():
@@ -147,153 +212,220 @@ def is_youtube_active():
     return active_window_title and "YouTube" in active_window_title
 
 
-def execute_command(command):
-    global listening_for_command
+# Command phrases and their slots live in command_registry.ASSISTANT_COMMANDS;
+# each handler below is attached to one command by name
+commands = CommandRegistry.from_table(ASSISTANT_COMMANDS)
 
-    if "what is the time now" in command:
-        speak(get_current_time())
+@commands.handler("time")
+def tell_time():
+    speak(get_current_time())
 
-    elif "change window" in command:
-        pyautogui.hotkey('alt', 'tab')
+@commands.handler("change_window")
+def change_window():
+    keys.hotkey('alt', 'tab')
 
-    elif "lock my pc" in command:
-        os.system('rundll32.exe user32.dll,LockWorkStation')
+@commands.handler("lock")
+def lock_pc():
+    os.system('rundll32.exe user32.dll,LockWorkStation')
 
-    elif "go to sleep" in command:
-        os.system('rundll32.exe powrprof.dll,SetSuspendState Sleep')
+@commands.handler("sleep")
+def go_to_sleep():
+    os.system('rundll32.exe powrprof.dll,SetSuspendState Sleep')
 
-    elif "shut down my pc" in command:
-        listening_for_command = False
-        speak("Are you sure you want to shut down your PC? Say yes to confirm or no to cancel.", block=True)
-        recognizer = sr.Recognizer()
-        with sr.Microphone() as source:
-            recognizer.adjust_for_ambient_noise(source)
-            print("Listening for shutdown confirmation...")
-            try:
-                audio = recognizer.listen(source, timeout=5)
-                confirmation = recognizer.recognize_google(audio).lower()
-                if "yes" in confirmation:
-                    speak("Shutting down your PC now.", block=False)
-                    os.system('shutdown /s /f /t 0')
-                elif "no" in confirmation:
-                    speak("Shutdown cancelled.", block=False)
+@commands.handler("shutdown")
+def shut_down_pc():
+    global listening_for_command
+    listening_for_command = False
+    # Commands queued before the prompt are not answers to it
+    command_pipeline.drain()
+    speak(RESPONSES["shutdown_confirm"], block=True, priority=PRIORITY_URGENT, interrupt=True)
+    prompt_finished = time.perf_counter()
+    print("Listening for shutdown confirmation...")
+    try:
+        # The microphone hears the prompt too: only speech started after it counts
+        result = command_pipeline.next_result(timeout=5, spoken_after=prompt_finished)
+        if result is None:
+            raise sr.WaitTimeoutError("listening timed out while waiting for phrase to start")
+        if result.error is not None:
+            raise result.error
+        if result.text is None:
+            raise sr.UnknownValueError()
+        confirmation = set(tokenize(result.text))
+        if "yes" in confirmation and "no" not in confirmation:
+            speak(RESPONSES["shutting_down"], block=False)
+            os.system('shutdown /s /f /t 0')
+        elif "no" in confirmation:
+            speak(RESPONSES["shutdown_cancelled"], block=False)
+        else:
+            speak(RESPONSES["shutdown_not_understood"], block=False)
+    except sr.WaitTimeoutError:
+        speak(RESPONSES["shutdown_no_response"], block=False)
+    except sr.UnknownValueError:
+        speak(RESPONSES["shutdown_unclear_audio"], block=False)
+    except sr.RequestError as e:
+        speak(f"Could not request results; {e}. Shutdown cancelled.", block=False)
+    finally:
+        listening_for_command = True
+
+@commands.handler("battery")
+def tell_battery():
+    battery_percentage = get_battery_percentage()
+    speak(f"Your battery is at {battery_percentage} percent.")
+
+@commands.handler("open_chrome")
+def open_chrome():
+    os.startfile(r"C:\Program Files\Google\Chrome\Application\chrome.exe")
+
+@commands.handler("screenshot")
+def take_screenshot():
+    timestamp = datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
+    screenshot = pyautogui.screenshot()
+    screenshot.save(f'C:\\Users\\cheni\\Pictures\\Screenshots\\screenshot_{timestamp}.png')
+    speak(RESPONSES["screenshot"])
+
+@commands.handler("control_centre")
+def open_control_centre():
+    keys.hotkey('win', 'a')
+
+@commands.handler("settings")
+def open_settings():
+    keys.hotkey('win', 'i')
+
+@commands.handler("desktop")
+def show_desktop():
+    keys.hotkey('win', 'd')
+
+@commands.handler("close_window")
+def close_window():
+    active_window = gw.getActiveWindow()
+    if active_window:
+        active_window.close()
+        speak(RESPONSES["window_closed"])
+    else:
+        speak(RESPONSES["no_window"])
+
+@commands.handler("toggle_video")
+def toggle_video():
+    if is_youtube_active():
+        keys.press('playpause')
+        speak(RESPONSES["video_toggled"], block=False)
+    else:
+        speak(RESPONSES["youtube_inactive"], block=False)
+
+@commands.handler("brightness")
+def change_brightness(level):
+    set_brightness(level)
+
+# "search X" without a site searches Google
+@commands.handler("search")
+def search(query, site="google"):
+    if "youtube" in site:
+        url = f"https://www.youtube.com/results?search_query={query}"
+    elif "wikipedia" in site:
+        url = f"https://en.wikipedia.org/wiki/{query.replace(' ', '_')}"
+    else:
+        url = f"https://www.google.com/search?q={query}"
+    webbrowser.open(url)
+    speak(f"Searching {query} on {site}")
+
+def execute_command(command):
+    if not commands.dispatch(command):
+        print(f"No command matches: {command}")
+
+# The microphone stays open; a local voice-activity and hotword gate decides
+# which utterances reach Google (see hotword_gate.py). During a command session
+# the gate feeds a recognition pipeline instead (see recognition_pipeline.py)
+def listen_and_execute(full_report=False):
+    global voice_gate, command_pipeline
+    recognizer = sr.Recognizer()
+    backend = make_recognition_backend(RECOGNITION_BACKEND, recognizer, VOSK_MODEL)
+    voice_gate = HotwordGate(MicrophoneFrames(), NoiseFloor.load(NOISE_FLOOR_FILE),
+                             make_hotword_stages(recognizer, "hello windows"))
+    try:
+        while True:
+            if not listening_for_command:
+                time.sleep(0.1)
+                continue
+
+            print("Listening for trigger: hello Windows...")
+            if startup.stage_time("listening") is None:
+                startup.mark("listening")
+                if full_report:
+                    startup.print_report()
                 else:
-                    speak("I didn't understand your response. Shutdown cancelled.", block=False)
-            except sr.WaitTimeoutError:
-                speak("No response received. Shutdown cancelled.", block=False)
-            except sr.UnknownValueError:
-                speak("Could not understand audio. Shutdown cancelled.", block=False)
+                    print(f"Ready to listen {startup.stage_time('listening') * 1000:.0f} ms after start")
+            try:
+                if voice_gate.wait_for_hotword() is None:
+                    break
             except sr.RequestError as e:
-                speak(f"Could not request results; {e}. Shutdown cancelled.", block=False)
+                print(f"Google API error: {e}")
+                speak(RESPONSES["recognition_error"], block=False)
+                continue
+            print("Heard: hello windows")
+            play_sound_effect("activate.mp3")
+            last_command_time = time.time()
+            command_pipeline = RecognitionPipeline(voice_gate, backend, workers=RECOGNITION_WORKERS).start()
+            try:
+                print("Listening for command...")
+                while time.time() - last_command_time < 120:
+                    result = command_pipeline.next_result(timeout=15)
+                    if result is None:
+                        print("No command detected within 15 seconds.")
+                        continue
+                    if result.error is not None:
+                        print(f"Command recognition error: {result.error}")
+                        continue
+                    if result.text is None:
+                        print("Command recognition error: could not understand audio")
+                        continue
+                    command = result.text.lower()
+                    print(f"Command: {command} ({result.latency * 1000:.0f} ms after speech ended)")
+                    execute_command(command)
+                    last_command_time = time.time()  # reset timeout after each command
             finally:
-                listening_for_command = True
-        return
-
-    elif "what is my battery percentage" in command or "what's my battery percentage" in command:
-        battery_percentage = get_battery_percentage()
-        speak(f"Your battery is at {battery_percentage} percent.")
-
-    elif "open chrome" in command:
-        os.startfile(r"C:\Program Files\Google\Chrome\Application\chrome.exe")
-
-    elif "take a screenshot" in command:
-        timestamp = datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
-        screenshot = pyautogui.screenshot()
-        screenshot.save(f'C:\\Users\\cheni\\Pictures\\Screenshots\\screenshot_{timestamp}.png')
-        speak("Screenshot taken.")
-
-    elif "open control centre" in command:
-        pyautogui.hotkey('win', 'a')
-    
-    elif "open control centre" in command:
-        pyautogui.hotkey('win','a')
-
-    elif "open settings" in command:
-        pyautogui.hotkey('win', 'i')
-
-    elif "show desktop" in command:
-        pyautogui.hotkey('win', 'd')
-
-    elif "close the window" in command:
-        active_window = gw.getActiveWindow()
-        if active_window:
-            active_window.close()
-            speak("Active window closed.")
-        else:
-            speak("No active window detected.")
-
-    elif "play the video" in command or "pause the video" in command or "stop the video" in command:
-        if is_youtube_active():
-            pyautogui.press('playpause')
-            speak("Video toggled.", block=False)
-        else:
-            speak("YouTube is not currently the active window.", block=False)
+                command_pipeline.stop()
+                latency = command_pipeline.latency_summary()
+                if latency["count"]:
+                    print(f"Command latency: mean {latency['mean'] * 1000:.0f} ms, "
+                          f"p95 {latency['p95'] * 1000:.0f} ms over {latency['count']} commands")
+                print_audio_latency()
+                command_pipeline = None
+            play_sound_effect("deactivate.mp3")
+    finally:
+        voice_gate.close()
 
-    elif "set brightness to" in command:
-        brightness_level = command.split("set brightness to")[1].strip()
-        brightness_value = ''.join(filter(str.isdigit, brightness_level))
-        set_brightness(brightness_value)
+# Time from speak()/play_sound_effect() to the first sample reaching the speakers
+def print_audio_latency():
+    latency = audio_engine.latency_summary()
+    if latency["count"]:
+        print(f"Audio queue latency: mean {latency['mean'] * 1000:.0f} ms, "
+              f"p95 {latency['p95'] * 1000:.0f} ms, max {latency['max'] * 1000:.0f} ms over {latency['count']} sounds")
 
-    elif "search" in command:
+def load_sound_effects():
+    for effect in SOUND_EFFECTS:
         try:
-            search_text = command.split("search")[1].split("on")[0].strip()
-            website = command.split("on")[1].strip()
-
-            if "youtube" in website:
-                url = f"https://www.youtube.com/results?search_query={search_text}"
-            elif "wikipedia" in website:
-                url = f"https://en.wikipedia.org/wiki/{search_text.replace(' ', '_')}"
-            elif "google" in website:
-                url = f"https://www.google.com/search?q={search_text}"
-            else:
-                url = f"https://www.google.com/search?q={search_text}"
-
-            webbrowser.open(url)
-            speak(f"Searching {search_text} on {website}")
-
+            audio_engine.load_effect(effect)
         except Exception as e:
-            speak(f"Sorry, I couldn't understand the search command. Error: {e}")
+            print(f"Failed to load sound {effect}: {e}")
+
+def start_monitors():
+    monitors = MonitorScheduler()
+    monitors.add(BatteryProbe(read_psutil_battery, battery_alert))
+    monitors.start()
 
-def listen_and_execute():
-    recognizer = sr.Recognizer()
-    mic = sr.Microphone()
-    while True:
-        if not listening_for_command:
-            time.sleep(0.1)
-            continue
-
-        with mic as source:
-            recognizer.adjust_for_ambient_noise(source)
-            print("Listening for trigger: hello Windows...")
-            try:
-                audio = recognizer.listen(source, timeout=5)
-                phrase = recognizer.recognize_google(audio).lower()
-                print(f"Heard: {phrase}")
-                if "hello windows" in phrase:
-                    play_sound_effect("activate.mp3")
-                    session_start = time.time()
-                    last_command_time = time.time()
-                    while time.time() - last_command_time < 120:
-                        print("Listening for command...")
-                        try:
-                            audio2 = recognizer.listen(source, timeout=15)
-                            command = recognizer.recognize_google(audio2).lower()
-                            print(f"Command: {command}")
-                            execute_command(command)
-                            last_command_time = time.time()  # reset timeout after each command
-                        except sr.WaitTimeoutError:
-                            print("No command detected within 15 seconds.")
-                        except (sr.UnknownValueError, sr.RequestError) as e:
-                            print(f"Command recognition error: {e}")
-                    play_sound_effect("deactivate.mp3")
-            except (sr.WaitTimeoutError, sr.UnknownValueError):
-                continue
-            except sr.RequestError as e:
-                print(f"Google API error: {e}")
-                speak("Sorry, there was a problem with the speech recognition service.", block=False)
 if __name__ == "__main__":
-    battery_thread = threading.Thread(target=check_battery_status, daemon=True)
-    battery_thread.start()
-    command_thread = threading.Thread(target=listen_and_execute)
+    parser = argparse.ArgumentParser(description="Voice-activated desktop assistant")
+    parser.add_argument("--startup-report", action="store_true",
+                        help="print the time to each startup stage and every timed import")
+    args = parser.parse_args()
+    startup.mark("modules loaded")
+    # Listening starts right away; everything commands need loads meanwhile
+    warm_up([pyautogui, gw, psutil, webbrowser],
+            [load_sound_effects, audio_engine.start, keys.start, start_monitors, displays.refresh])
+    speech_cache.prewarm(RESPONSES.values(), lang='en', speed=SPEECH_SPEED)
+    command_thread = threading.Thread(target=listen_and_execute, args=(args.startup_report,))
     command_thread.start()
-    command_thread.join()
+    try:
+        command_thread.join()
+    finally:
+        print_audio_latency()
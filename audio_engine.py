@@ -0,0 +1,295 @@
+# Module: Persistent Audio Output Engine for the Voice Assistant
+
+# Description:
+# ------------
+# One long-lived playback thread with one open output stream, replacing a new
+# threading.Thread running pydub `play` (and a new audio device) for every
+# sound. Sounds queue up instead of talking over each other, an urgent sound
+# can cut in, and callers that need to wait get a handle to wait on.
+#
+# How It Works:
+# -------------
+# 1. play(audio, priority, interrupt) converts the audio to the engine's output
+#    format if needed, queues it and returns a PlaybackHandle immediately.
+# 2. The playback thread takes the highest-priority sound (first come, first
+#    served within a priority) and writes it to the output in short chunks
+#    (20 ms by default), so it can stop between chunks.
+# 3. interrupt=True stops the sound that is playing and cancels queued sounds,
+#    unless they have a higher priority than the new one; e.g. the shutdown
+#    confirmation (PRIORITY_URGENT) preempts ordinary replies.
+# 4. handle.wait() blocks until the sound has finished, been cancelled or been
+#    interrupted (the block=True case of speak).
+# 5. The time from play() to the first chunk reaching the output is kept for
+#    every sound and reported by latency_summary().
+# 6. Sound effects are decoded once by load_effect() and replayed from memory.
+#
+# Outputs:
+# --------
+# - PyAudioOutput: one PyAudio stream, reopened only when the format changes.
+# - PydubOutput: fallback when PyAudio is missing; plays each sound with
+#   pydub.playback.play, so interrupts only take effect between sounds.
+# - FakeOutput: records chunks and optionally sleeps for their duration, for
+#   tests and benchmarks without an audio device.
+
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+
+from speech_cache import PcmAudio
+
+PRIORITY_LOW = 0
+PRIORITY_NORMAL = 1
+PRIORITY_URGENT = 2
+
+class PlaybackHandle:
+    def __init__(self, audio, priority, label):
+        self.audio = audio
+        self.priority = priority
+        self.label = label
+        self.state = "queued"
+        self.queued_at = time.perf_counter()
+        self.first_sample_at = None
+        self.finished = threading.Event()
+
+    # Seconds from play() to the first chunk reaching the output
+    @property
+    def queue_latency(self):
+        return None if self.first_sample_at is None else self.first_sample_at - self.queued_at
+
+    # True once the sound is no longer queued or playing
+    def wait(self, timeout=None):
+        return self.finished.wait(timeout)
+
+    def done(self):
+        return self.finished.is_set()
+
+    def _finish(self, state):
+        self.state = state
+        self.finished.set()
+
+# Outputs with whole_sounds = False take the sound in chunks through write();
+# with whole_sounds = True the engine hands each sound to play_whole() instead
+class PyAudioOutput:
+    whole_sounds = False
+
+    def __init__(self):
+        import pyaudio
+        self.pyaudio = pyaudio
+        self.audio = pyaudio.PyAudio()
+        self.stream = None
+        self.format = None
+        self.opens = 0
+
+    def open(self, frame_rate, sample_width, channels):
+        if self.format == (frame_rate, sample_width, channels):
+            return
+        self.close()
+        self.stream = self.audio.open(format=self.audio.get_format_from_width(sample_width), channels=channels,
+                                      rate=frame_rate, output=True)
+        self.format = (frame_rate, sample_width, channels)
+        self.opens += 1
+
+    def write(self, data):
+        self.stream.write(data)
+
+    def close(self):
+        if self.stream is not None:
+            self.stream.stop_stream()
+            self.stream.close()
+            self.stream = None
+            self.format = None
+
+class PydubOutput:
+    whole_sounds = True
+
+    def __init__(self):
+        from pydub.playback import play
+        self.play = play
+        self.opens = 0
+
+    def open(self, frame_rate, sample_width, channels):
+        pass
+
+    # Plays the sound in one call, so it cannot be interrupted midway
+    def play_whole(self, audio):
+        self.play(audio.to_segment())
+
+    def close(self):
+        pass
+
+class FakeOutput:
+    whole_sounds = False
+
+    def __init__(self, realtime=False, open_delay=0.0):
+        self.realtime = realtime
+        self.open_delay = open_delay
+        self.format = None
+        self.opens = 0
+        self.chunks = []
+
+    def open(self, frame_rate, sample_width, channels):
+        if self.format == (frame_rate, sample_width, channels):
+            return
+        if self.open_delay:
+            time.sleep(self.open_delay)
+        self.format = (frame_rate, sample_width, channels)
+        self.opens += 1
+
+    def write(self, data):
+        self.chunks.append((time.perf_counter(), len(data)))
+        if self.realtime:
+            frame_rate, sample_width, channels = self.format
+            time.sleep(len(data) / (frame_rate * sample_width * channels))
+
+    def close(self):
+        self.format = None
+
+def make_audio_output():
+    try:
+        return PyAudioOutput()
+    except ImportError:
+        return PydubOutput()
+
+class AudioEngine:
+    # output_format: (frame_rate, sample_width, channels); gTTS speech is 24 kHz 16-bit mono
+    def __init__(self, output=None, output_format=(24000, 2, 1), chunk_ms=20, latency_samples=500):
+        self.output = output
+        self.output_format = output_format
+        self.chunk_ms = chunk_ms
+        self.queue = []
+        self.order = itertools.count()
+        self.condition = threading.Condition()
+        self.current = None
+        self.effects = {}
+        self.latencies = deque(maxlen=latency_samples)
+        self.played = 0
+        self.interrupted = 0
+        self.cancelled = 0
+        self.thread = None
+        self.closed = False
+
+    # Starting is optional; the playback thread also starts with the first sound
+    def start(self):
+        with self.condition:
+            if self.thread is None:
+                if self.output is None:
+                    self.output = make_audio_output()
+                self.thread = threading.Thread(target=self._run, name="audio-engine", daemon=True)
+                self.thread.start()
+        return self
+
+    def play(self, audio, priority=PRIORITY_NORMAL, interrupt=False, label=None):
+        handle = PlaybackHandle(self._convert(audio), priority, label)
+        if self.thread is None:
+            self.start()
+        with self.condition:
+            if self.closed:
+                handle._finish("cancelled")
+                return handle
+            if interrupt:
+                kept = []
+                for entry in self.queue:
+                    if entry[2].priority > priority:
+                        kept.append(entry)
+                    else:
+                        entry[2]._finish("cancelled")
+                        self.cancelled += 1
+                self.queue = kept
+                heapq.heapify(self.queue)
+                if self.current is not None and self.current.priority <= priority:
+                    self.current.state = "interrupting"
+            heapq.heappush(self.queue, (-priority, next(self.order), handle))
+            self.condition.notify()
+        return handle
+
+    # Decode a sound file once; play_effect(name) replays it from memory
+    def load_effect(self, filename, name=None):
+        from pydub import AudioSegment
+        audio = self._convert(PcmAudio.from_segment(AudioSegment.from_file(filename)))
+        self.effects[name or filename] = audio
+        return audio
+
+    def play_effect(self, name, priority=PRIORITY_NORMAL, interrupt=False):
+        if name not in self.effects:
+            self.load_effect(name)
+        return self.play(self.effects[name], priority, interrupt, label=name)
+
+    # Stop the current sound and drop everything queued
+    def stop_all(self):
+        with self.condition:
+            for entry in self.queue:
+                entry[2]._finish("cancelled")
+                self.cancelled += 1
+            self.queue = []
+            if self.current is not None:
+                self.current.state = "interrupting"
+
+    def latency_summary(self):
+        samples = sorted(self.latencies)
+        if not samples:
+            return {"count": 0, "mean": 0.0, "p95": 0.0, "max": 0.0}
+        return {
+            "count": len(samples),
+            "mean": sum(samples) / len(samples),
+            "p95": samples[min(len(samples) - 1, int(0.95 * len(samples)))],
+            "max": samples[-1],
+        }
+
+    def close(self, timeout=2.0):
+        with self.condition:
+            if self.closed:
+                return
+            self.closed = True
+        self.stop_all()
+        with self.condition:
+            self.condition.notify()
+        if self.thread is not None:
+            self.thread.join(timeout)
+        if self.output is not None:
+            self.output.close()
+
+    def _convert(self, audio):
+        frame_rate, sample_width, channels = self.output_format
+        if (audio.frame_rate, audio.sample_width, audio.channels) == self.output_format:
+            return audio
+        segment = audio.to_segment().set_frame_rate(frame_rate).set_sample_width(sample_width).set_channels(channels)
+        return PcmAudio.from_segment(segment)
+
+    def _run(self):
+        frame_rate, sample_width, channels = self.output_format
+        chunk_bytes = max(1, frame_rate * self.chunk_ms // 1000) * sample_width * channels
+        while True:
+            with self.condition:
+                while not self.queue and not self.closed:
+                    self.condition.wait()
+                if self.closed and not self.queue:
+                    return
+                _, _, handle = heapq.heappop(self.queue)
+                self.current = handle
+                handle.state = "playing"
+
+            try:
+                self.output.open(*self.output_format)
+                handle.first_sample_at = time.perf_counter()
+                self.latencies.append(handle.queue_latency)
+                if self.output.whole_sounds:
+                    self.output.play_whole(handle.audio)
+                else:
+                    data = memoryview(handle.audio.raw_data)
+                    for offset in range(0, len(data), chunk_bytes):
+                        if handle.state == "interrupting":
+                            break
+                        self.output.write(data[offset:offset + chunk_bytes])
+            except Exception as e:
+                print(f"Audio playback failed: {e}")
+
+            with self.condition:
+                self.current = None
+                if handle.state == "interrupting":
+                    self.interrupted += 1
+                    handle._finish("interrupted")
+                else:
+                    self.played += 1
+                    handle._finish("done")
@@ -0,0 +1,311 @@
+# Project: Benchmarks for the Automatic Screen Brightness Controller
+
+# Description:
+# ------------
+# Offline measurements for Auto_brightness_adjust.py that do not need a live
+# webcam or a real display.
+#
+# Estimator benchmark:
+#   Compares the subsampled luminance estimator (`estimate_lux`) at several
+#   strides against the full-frame path (`cvtColor` + `calculate_lux`). For every
+#   stride it reports the lux error, the brightness-percentage error after
+#   `map_lux_to_brightness`, and the CPU time per frame relative to the full path,
+#   so a stride can be picked that costs a fraction of the CPU.
+#
+# Replay benchmark:
+#   Feeds recorded videos and synthetic lighting scenarios (steady light, slow
+#   ramps, a light switch, flickering light) through `BrightnessController` with a
+#   `FakeBrightnessControl` sink, and reports per-frame latency percentiles, CPU
+#   time per frame and the number of brightness writes for each scenario.
+#
+# Filter benchmark:
+#   Runs every temporal filter (none, ema, median, hysteresis) over the same
+#   scenarios and reports brightness writes, writes saved versus the unfiltered
+#   threshold logic, writes per hour at the given frame rate, and how many frames
+#   after a light switch the brightness takes to follow.
+#
+# Displays benchmark:
+#   A FakeDisplayBackend with one fast laptop panel and slower DDC/CI monitors
+#   (--display-latencies) and an enumeration cost (--enumerate-delay). Compares
+#   the old sbc.set_brightness(level) pattern (enumerate every display, then
+#   write them one by one, on every call) with display_manager.DisplayManager
+#   (enumerate once, write in parallel): time per brightness change, number of
+#   enumerations and per-display write latency. A projector is plugged in
+#   halfway through and a monitor unplugged later, to check that the cached
+#   display list follows hotplugs.
+#
+# Usage:
+# ------
+#   python brightness_benchmark.py estimator
+#   python brightness_benchmark.py estimator --video recording.mp4 --strides 1,4,8,16
+#   python brightness_benchmark.py replay
+#   python brightness_benchmark.py replay --video evening.mp4 --stride 8 --async-actuator
+#   python brightness_benchmark.py filters --fps 30
+#   python brightness_benchmark.py displays --display-latencies 0.005,0.05,0.08
+
+import argparse
+import time
+import cv2
+import numpy as np
+
+from Auto_brightness_adjust import (BrightnessActuator, BrightnessController, FakeBrightnessControl,
+                                    SyntheticLightSource, VideoFileSource, calculate_lux, estimate_lux,
+                                    light_flicker, light_ramp, make_lux_filter, map_lux_to_brightness,
+                                    parse_roi)
+from display_manager import DisplayManager, FakeDisplayBackend
+
+FILTER_NAMES = ["none", "ema", "median", "hysteresis"]
+
+# Synthetic webcam-like scenes: a lit wall gradient with sensor noise, a bright
+# window and a face-sized blob, at a range of overall exposure levels.
+def synthetic_frames(count=60, width=640, height=480, seed=0):
+    rng = np.random.default_rng(seed)
+    ys, xs = np.mgrid[0:height, 0:width]
+    for i in range(count):
+        level = 20 + 215 * i / max(count - 1, 1)
+        wall = level * (0.7 + 0.3 * xs / width) * (0.8 + 0.2 * ys / height)
+        frame = np.repeat(wall[:, :, None], 3, axis=2) * rng.uniform(0.85, 1.15, 3)
+        frame += rng.normal(0, 6, frame.shape)
+        window_x = int(rng.integers(0, width // 2))
+        frame[40:200, window_x:window_x + 160] = 250
+        face = (xs - width / 2) ** 2 / 90 ** 2 + (ys - height / 2) ** 2 / 120 ** 2 < 1
+        frame[face] = frame[face] * 0.6 + np.array([90, 120, 170]) * 0.4
+        yield np.clip(frame, 0, 255).astype(np.uint8)
+
+def video_frames(path, limit=None):
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise SystemExit(f"Could not open video {path}")
+    try:
+        count = 0
+        while limit is None or count < limit:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            count += 1
+            yield frame
+    finally:
+        cap.release()
+
+def full_frame_lux(frame):
+    return calculate_lux(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+
+def time_per_frame(function, frames, repeats):
+    start = time.process_time()
+    for _ in range(repeats):
+        for frame in frames:
+            function(frame)
+    return (time.process_time() - start) / (repeats * len(frames))
+
+def run_estimator_benchmark(frames, strides, roi=None, repeats=5):
+    reference = [full_frame_lux(frame) for frame in frames]
+    reference_brightness = [map_lux_to_brightness(lux) for lux in reference]
+    full_cost = time_per_frame(full_frame_lux, frames, repeats)
+
+    print(f"{len(frames)} frames of {frames[0].shape[1]}x{frames[0].shape[0]}, "
+          f"full-frame path: {full_cost * 1e3:.3f} ms CPU/frame")
+    print(f"{'stride':>6} {'roi':>4} {'mean lux err':>13} {'max lux err':>12} "
+          f"{'max bright err':>15} {'ms/frame':>9} {'cost':>7}")
+    for stride in strides:
+        estimates = [estimate_lux(frame, stride, roi) for frame in frames]
+        errors = np.abs(np.array(estimates) - np.array(reference))
+        brightness_errors = [abs(map_lux_to_brightness(lux) - expected)
+                             for lux, expected in zip(estimates, reference_brightness)]
+        cost = time_per_frame(lambda frame: estimate_lux(frame, stride, roi), frames, repeats)
+        print(f"{stride:>6} {'yes' if roi else 'no':>4} {errors.mean():>13.3f} {errors.max():>12.3f} "
+              f"{max(brightness_errors):>14}% {cost * 1e3:>9.3f} {cost / full_cost:>6.1%}")
+
+# Named lighting scenarios (mean gray level per frame) at roughly 30 frames per second
+def synthetic_scenarios(frames=900):
+    half = frames // 2
+    return [
+        ("steady", [120] * frames),
+        ("dusk ramp", light_ramp(200, 30, frames)),
+        ("morning ramp", light_ramp(30, 220, frames)),
+        ("light switch", [40] * half + [190] * (frames - half)),
+        ("flicker", light_flicker(110, 12, 7, frames)),
+        ("slow flicker", light_flicker(90, 10, 45, frames)),
+    ]
+
+# (name, factory) pairs so every run gets a fresh source
+def scenario_sources(videos, frames):
+    if videos:
+        return [(path, lambda path=path: VideoFileSource(path)) for path in videos]
+    return [(name, lambda levels=levels: SyntheticLightSource(levels))
+            for name, levels in synthetic_scenarios(frames)]
+
+def percentile(values, fraction):
+    return float(np.percentile(values, fraction * 100)) if len(values) else 0.0
+
+# Run one source through the controller and collect latency, CPU and write counts
+def replay_scenario(source, stride=None, roi=None, async_actuator=False, display_delay=0.0,
+                    lux_filter=None):
+    sink = FakeBrightnessControl(delay=display_delay)
+    actuator = BrightnessActuator(sink, min_write_interval=0.0).start() if async_actuator else None
+    controller = BrightnessController(sink, actuator, stride, roi, verbose=False, lux_filter=lux_filter)
+    latencies = []
+    # Only the controller's CPU time: the synthetic source's frame generation is not part of it
+    cpu_time = 0.0
+    try:
+        while True:
+            ret, frame = source.read()
+            if not ret:
+                break
+            cpu_start = time.process_time()
+            start = time.perf_counter()
+            controller.process(frame)
+            latencies.append(time.perf_counter() - start)
+            cpu_time += time.process_time() - cpu_start
+    finally:
+        source.release()
+        if actuator is not None:
+            actuator.wait_idle(5)
+            actuator.stop()
+    return {
+        "frames": len(latencies),
+        "p50": percentile(latencies, 0.50),
+        "p90": percentile(latencies, 0.90),
+        "p99": percentile(latencies, 0.99),
+        "max": max(latencies, default=0.0),
+        "cpu_per_frame": cpu_time / max(len(latencies), 1),
+        "decisions": controller.writes,
+        "writes": len(sink.writes),
+        "saved": controller.lux_filter.saved_writes,
+    }
+
+# Frames from a dark-to-bright light switch until the written brightness is
+# within the controller threshold of where the unfiltered pipeline settles.
+def step_response(lux_filter, frames=120, switch_at=30):
+    settled_frame = SyntheticLightSource([190]).read()[1]
+    settled = map_lux_to_brightness(full_frame_lux(settled_frame))
+    source = SyntheticLightSource([40] * switch_at + [190] * (frames - switch_at))
+    sink = FakeBrightnessControl()
+    controller = BrightnessController(sink, verbose=False, lux_filter=lux_filter)
+    for index in range(frames):
+        ret, frame = source.read()
+        controller.process(frame)
+        if index >= switch_at and abs(sink.brightness - settled) <= controller.threshold:
+            return index - switch_at
+    return None
+
+def run_filter_benchmark(scenarios, fps, alpha, window, band, snap):
+    print(f"{'scenario':<16} {'filter':<11} {'writes':>7} {'saved':>6} {'writes/hour':>12}")
+    for name, make_source in scenarios:
+        for filter_name in FILTER_NAMES:
+            lux_filter = make_lux_filter(filter_name, alpha, window, band, snap)
+            stats = replay_scenario(make_source(), lux_filter=lux_filter)
+            per_hour = stats["writes"] / max(stats["frames"], 1) * fps * 3600
+            print(f"{name:<16} {filter_name:<11} {stats['writes']:>7} {stats['saved']:>6} {per_hour:>12.0f}")
+    print()
+    print(f"{'filter':<11} {'light switch response (frames)':>31}")
+    for filter_name in FILTER_NAMES:
+        response = step_response(make_lux_filter(filter_name, alpha, window, band, snap))
+        print(f"{filter_name:<11} {'never' if response is None else response:>31}")
+
+def run_replay_benchmark(scenarios, stride=None, roi=None, async_actuator=False, display_delay=0.0,
+                         filter_name="none"):
+    print(f"{'scenario':<16} {'frames':>6} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8} "
+          f"{'CPU ms/frame':>13} {'decisions':>9} {'writes':>7}")
+    for name, make_source in scenarios:
+        stats = replay_scenario(make_source(), stride, roi, async_actuator, display_delay,
+                                make_lux_filter(filter_name))
+        print(f"{name:<16} {stats['frames']:>6} {stats['p50'] * 1e3:>8.3f} {stats['p90'] * 1e3:>8.3f} "
+              f"{stats['p99'] * 1e3:>8.3f} {stats['max'] * 1e3:>8.3f} {stats['cpu_per_frame'] * 1e3:>13.3f} "
+              f"{stats['decisions']:>9} {stats['writes']:>7}")
+
+def fake_displays(latencies):
+    return {("laptop" if index == 0 else f"monitor {index}"): latency for index, latency in enumerate(latencies)}
+
+def run_display_benchmark(latencies, enumerate_delay, writes):
+    levels = [10 + (index * 37) % 91 for index in range(writes)]
+    print(f"{len(latencies)} displays with write latencies "
+          f"{', '.join(f'{latency * 1e3:.0f}' for latency in latencies)} ms, enumeration {enumerate_delay * 1e3:.0f} ms; "
+          f"{writes} brightness changes with two hotplugs")
+    print(f"{'writer':<10} {'mean ms':>8} {'p95 ms':>7} {'max ms':>7} {'enumerations':>13}")
+    for name in ("serial", "manager"):
+        backend = FakeDisplayBackend(fake_displays(latencies), enumerate_delay)
+        manager = DisplayManager(backend, hotplug_interval=0.0)
+        times = []
+        for index, level in enumerate(levels):
+            if index == writes // 2:
+                backend.connect("projector", latencies[-1])
+            if index == writes * 3 // 4 and len(latencies) > 1:
+                backend.disconnect(f"monitor {len(latencies) - 1}")
+            start = time.perf_counter()
+            if name == "serial":
+                for _, display in backend.enumerate():
+                    backend.set(display, level)
+            else:
+                manager.set_brightness(level)
+            times.append(time.perf_counter() - start)
+        missed = [display.name for display in backend.displays.values() if display.brightness != levels[-1]]
+        print(f"{name:<10} {np.mean(times) * 1e3:>8.1f} {percentile(times, 0.95) * 1e3:>7.1f} "
+              f"{max(times) * 1e3:>7.1f} {backend.enumerations:>13}"
+              + (f"  not updated: {', '.join(missed)}" if missed else ""))
+        if name == "manager":
+            for line in manager.format_lines():
+                print(f"  {line}")
+        manager.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks for Auto_brightness_adjust.py")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    estimator = subparsers.add_parser("estimator", help="accuracy vs cost of the subsampled estimator")
+    estimator.add_argument("--video", help="recorded webcam video to use instead of synthetic frames")
+    estimator.add_argument("--frames", type=int, default=60, help="number of frames to use")
+    estimator.add_argument("--strides", default="1,2,4,8,16,32", help="comma separated strides")
+    estimator.add_argument("--roi", type=parse_roi, default=None,
+                           help="also restrict the estimator to left,top,right,bottom fractions")
+    estimator.add_argument("--repeats", type=int, default=5, help="timing repetitions per frame")
+
+    replay = subparsers.add_parser("replay", help="latency, CPU and writes per lighting scenario")
+    replay.add_argument("--video", action="append", default=[],
+                        help="recorded webcam video to replay (repeatable); default is synthetic scenarios")
+    replay.add_argument("--frames", type=int, default=900, help="frames per synthetic scenario")
+    replay.add_argument("--stride", type=int, default=None, help="use the subsampled estimator")
+    replay.add_argument("--roi", type=parse_roi, default=None, help="estimator region of interest")
+    replay.add_argument("--async-actuator", action="store_true", help="write through BrightnessActuator")
+    replay.add_argument("--display-delay", type=float, default=0.0,
+                        help="seconds per fake display write, e.g. 0.05 for a DDC/CI monitor")
+    replay.add_argument("--filter", choices=FILTER_NAMES, default="none", help="temporal lux filter")
+
+    filters = subparsers.add_parser("filters", help="brightness writes saved by each temporal filter")
+    filters.add_argument("--video", action="append", default=[], help="recorded webcam video (repeatable)")
+    filters.add_argument("--frames", type=int, default=900, help="frames per synthetic scenario")
+    filters.add_argument("--fps", type=float, default=30.0, help="frame rate used for writes per hour")
+    filters.add_argument("--ema-alpha", type=float, default=0.2, help="ema filter: smoothing factor")
+    filters.add_argument("--median-window", type=int, default=9, help="median filter: samples in the window")
+    filters.add_argument("--hysteresis-band", type=float, default=15.0,
+                         help="hysteresis filter: half-width of the band in lux")
+    filters.add_argument("--filter-snap", type=float, default=40.0,
+                         help="ema and hysteresis filters: lux step taken at once instead of smoothed")
+
+    displays = subparsers.add_parser("displays", help="multi-display write time, serial sbc calls vs the manager")
+    displays.add_argument("--display-latencies", default="0.005,0.05,0.08",
+                          help="comma separated seconds per write for each fake display")
+    displays.add_argument("--enumerate-delay", type=float, default=0.1, help="seconds to enumerate the displays")
+    displays.add_argument("--writes", type=int, default=20, help="brightness changes to time")
+
+    args = parser.parse_args()
+    if args.benchmark == "filters":
+        run_filter_benchmark(scenario_sources(args.video, args.frames), args.fps,
+                             args.ema_alpha, args.median_window, args.hysteresis_band, args.filter_snap)
+    elif args.benchmark == "replay":
+        run_replay_benchmark(scenario_sources(args.video, args.frames), args.stride, args.roi,
+                             args.async_actuator, args.display_delay, args.filter)
+    elif args.benchmark == "displays":
+        latencies = [float(value) for value in args.display_latencies.split(",")]
+        run_display_benchmark(latencies, args.enumerate_delay, args.writes)
+    elif args.benchmark == "estimator":
+        if args.video:
+            frames = list(video_frames(args.video, args.frames))
+        else:
+            frames = list(synthetic_frames(args.frames))
+        if not frames:
+            raise SystemExit("No frames to benchmark")
+        strides = [int(value) for value in args.strides.split(",")]
+        run_estimator_benchmark(frames, strides, args.roi, args.repeats)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,400 @@
+# Module: Shared Camera Broker
+
+# Description:
+# ------------
+# A small local service that owns the webcam once and publishes its frames to
+# any number of consumers, so Auto_brightness_adjust.py and the gesture scripts
+# can run at the same time (each of them otherwise opens cv2.VideoCapture(0)
+# exclusively) and the frame is captured and decoded only once.
+#
+# How It Works:
+# -------------
+# 1. The broker opens the camera and listens on a local control socket
+#    (multiprocessing.connection, 127.0.0.1:6020 by default).
+# 2. A consumer connects and asks for a rate and a resolution, e.g. 1 frame/s
+#    at 160x120 for brightness, every frame at full size for gestures. The
+#    broker creates a shared-memory ring buffer of a few frame slots for it and
+#    replies with the ring's name and geometry.
+# 3. For every camera frame, each consumer that is due gets the frame (resized
+#    once per distinct resolution) copied into its next ring slot, followed by
+#    the frame's sequence number on the control socket. Consumers block on that
+#    socket and always read the newest slot; a per-slot sequence number is
+#    checked before and after the copy so a slot overwritten mid-read is never
+#    returned.
+#    Each consumer has its own sender thread that announces only the newest
+#    sequence number, so a consumer that reads slowly skips frames instead of
+#    holding up the others; one that stops reading for --stall-timeout seconds
+#    is detached.
+# 4. Consumers detach by closing their connection (or exiting); the broker
+#    frees their ring. The camera stays open, so consumers come and go without
+#    the device being reopened. With no consumers the broker only grabs frames
+#    (no decoding) to keep the driver's buffer fresh.
+#
+# Usage:
+# ------
+#   python camera_broker.py --camera 0
+#   python Gesture_control_for_dino_game.py --broker
+#   python Auto_brightness_adjust.py --broker --stride 8 --adaptive
+#
+# BrokerFrameSource offers both the cv2.VideoCapture methods the gesture scripts
+# use (isOpened/read/release) and the frame-source methods of
+# Auto_brightness_adjust.py (open/read/release/is_open).
+
+import argparse
+import os
+import threading
+import time
+from multiprocessing import shared_memory
+from multiprocessing.connection import Client, Listener, wait
+import cv2
+import numpy as np
+
+DEFAULT_ADDRESS = ("127.0.0.1", 6020)
+AUTHKEY = b"camera-broker"
+SLOT_DTYPE = np.dtype([("sequence", "<u8"), ("timestamp", "<f8")])
+
+# "HOST:PORT" or "PORT" -> (host, port)
+def parse_address(text):
+    host, _, port = text.rpartition(":")
+    try:
+        return host or DEFAULT_ADDRESS[0], int(port)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected HOST:PORT, got {text!r}")
+
+def ring_size(slots, width, height):
+    return slots * SLOT_DTYPE.itemsize + slots * height * width * 3
+
+# Slot headers and frame slots of a ring, as arrays over the shared buffer
+def ring_views(buffer, slots, width, height):
+    headers = np.ndarray((slots,), dtype=SLOT_DTYPE, buffer=buffer)
+    frames = np.ndarray((slots, height, width, 3), dtype=np.uint8, buffer=buffer,
+                        offset=slots * SLOT_DTYPE.itemsize)
+    return headers, frames
+
+# Opens an existing segment without registering it with this process's
+# resource tracker, which would otherwise unlink the broker's ring when the
+# consumer exits (Python < 3.13 has no track=False). Only POSIX has a resource
+# tracker for shared memory; on Windows there is nothing to unregister.
+def attach_shared_memory(name):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        memory = shared_memory.SharedMemory(name=name)
+        if os.name == "posix":
+            from multiprocessing import resource_tracker
+            # Registered under the POSIX name, which has a leading slash
+            resource_tracker.unregister("/" + memory.name, "shared_memory")
+        return memory
+
+class BrokerConsumer:
+    def __init__(self, conn, name, fps, width, height, slots):
+        self.conn = conn
+        self.name = name
+        self.interval = 1.0 / fps if fps else 0.0
+        self.width = width
+        self.height = height
+        self.slots = slots
+        self.memory = shared_memory.SharedMemory(create=True, size=ring_size(slots, width, height))
+        self.headers, self.frames = ring_views(self.memory.buf, slots, width, height)
+        self.headers[:] = 0
+        self.sequence = 0
+        self.next_due = 0.0
+        # Announcements go out on this consumer's own thread; only the newest
+        # unsent sequence number is kept, so a slow reader just skips frames
+        self.pending = None
+        self.condition = threading.Condition()
+        self.closed = False
+        self.failed = False
+        self.sending_since = None
+        self.coalesced = 0
+        self.sender = threading.Thread(target=self._send, name=f"broker-send-{name}", daemon=True)
+        self.sender.start()
+
+    def due(self, now):
+        if now < self.next_due:
+            return False
+        self.next_due = max(self.next_due + self.interval, now)
+        return True
+
+    def publish(self, frame, timestamp):
+        self.sequence += 1
+        slot = (self.sequence - 1) % self.slots
+        header = self.headers[slot:slot + 1]
+        # Sequence 0 marks the slot as being written
+        header["sequence"] = 0
+        self.frames[slot] = frame
+        header["timestamp"] = timestamp
+        header["sequence"] = self.sequence
+        with self.condition:
+            if self.pending is not None:
+                self.coalesced += 1
+            self.pending = self.sequence
+            self.condition.notify()
+
+    # True when the connection failed or one announcement has been blocked
+    # for more than `limit` seconds (the consumer stopped reading)
+    def stalled(self, now, limit):
+        since = self.sending_since
+        return self.failed or (since is not None and now - since > limit)
+
+    def _send(self):
+        while True:
+            with self.condition:
+                while self.pending is None and not self.closed:
+                    self.condition.wait()
+                if self.closed:
+                    return
+                sequence, self.pending = self.pending, None
+            self.sending_since = time.perf_counter()
+            try:
+                self.conn.send(sequence)
+            except (OSError, ValueError):
+                self.failed = True
+                return
+            self.sending_since = None
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        self.conn.close()
+        # The arrays must go before the buffer they point into can be closed
+        self.headers = self.frames = None
+        self.memory.close()
+        self.memory.unlink()
+
+class CameraBroker:
+    def __init__(self, cap, address=DEFAULT_ADDRESS, authkey=AUTHKEY, slots=4, verbose=True, stall_timeout=2.0):
+        self.cap = cap
+        self.stall_timeout = stall_timeout
+        self.address = address
+        self.authkey = authkey
+        self.slots = slots
+        self.verbose = verbose
+        self.consumers = []
+        self.lock = threading.Lock()
+        self.running = False
+        self.listener = None
+        self.width = self.height = None
+        self.captured = 0
+        self.published = 0
+
+    def start(self):
+        ret, frame = self.cap.read()
+        if not ret:
+            raise RuntimeError("Could not read a frame from the camera")
+        self.height, self.width = frame.shape[:2]
+        self.listener = Listener(self.address, authkey=self.authkey)
+        self.running = True
+        threading.Thread(target=self._accept, name="broker-accept", daemon=True).start()
+        if self.verbose:
+            print(f"Camera broker on {self.address[0]}:{self.address[1]}, {self.width}x{self.height}")
+        return self
+
+    def _accept(self):
+        while self.running:
+            try:
+                conn = self.listener.accept()
+            except OSError:
+                return
+            except Exception as e:
+                # Wrong authkey or a client that disconnected during the handshake
+                print(f"Rejected broker client: {e}")
+                continue
+            try:
+                self._attach(conn)
+            except (EOFError, OSError, ValueError) as e:
+                print(f"Broker client failed to attach: {e}")
+                conn.close()
+
+    def _attach(self, conn):
+        request = conn.recv()
+        if request.get("op") != "attach":
+            raise ValueError(f"expected an attach request, got {request!r}")
+        width = int(request.get("width") or self.width)
+        height = int(request.get("height") or self.height)
+        fps = request.get("fps")
+        slots = int(request.get("slots") or self.slots)
+        if width < 1 or height < 1 or slots < 2:
+            conn.send({"ok": False, "error": "width and height must be positive and slots at least 2"})
+            conn.close()
+            return
+        consumer = BrokerConsumer(conn, request.get("name", "consumer"), fps, width, height, slots)
+        conn.send({"ok": True, "shm": consumer.memory.name, "width": width, "height": height, "slots": slots})
+        with self.lock:
+            self.consumers.append(consumer)
+        if self.verbose:
+            print(f"Attached {consumer.name}: {width}x{height} at {f'{fps:g} fps' if fps else 'full rate'}")
+
+    def _detach(self, consumer):
+        with self.lock:
+            if consumer in self.consumers:
+                self.consumers.remove(consumer)
+        consumer.close()
+        if self.verbose:
+            reason = " (stopped reading)" if consumer.sending_since is not None else ""
+            print(f"Detached {consumer.name} after {consumer.sequence} frames{reason}")
+
+    # Captures until stopped; each frame goes to every consumer that is due
+    def run(self):
+        try:
+            while self.running:
+                with self.lock:
+                    consumers = list(self.consumers)
+                if not consumers:
+                    # Keep the driver's buffer fresh without decoding
+                    if not self.cap.grab():
+                        break
+                    continue
+
+                # Consumers only ever close their end; anything readable means detach
+                for conn in wait([consumer.conn for consumer in consumers], timeout=0):
+                    self._detach(next(consumer for consumer in consumers if consumer.conn is conn))
+                consumers = [consumer for consumer in consumers if consumer in self.consumers]
+
+                ret, frame = self.cap.read()
+                if not ret:
+                    print("Camera stopped delivering frames")
+                    break
+                timestamp = time.perf_counter()
+                self.captured += 1
+                resized = {(self.width, self.height): frame}
+                for consumer in consumers:
+                    if not consumer.due(timestamp):
+                        continue
+                    size = (consumer.width, consumer.height)
+                    if size not in resized:
+                        resized[size] = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+                    if consumer.stalled(timestamp, self.stall_timeout):
+                        self._detach(consumer)
+                        continue
+                    consumer.publish(resized[size], timestamp)
+                    self.published += 1
+        finally:
+            self.stop()
+
+    def stop(self):
+        self.running = False
+        if self.listener is not None:
+            self.listener.close()
+            self.listener = None
+        with self.lock:
+            consumers, self.consumers = self.consumers, []
+        for consumer in consumers:
+            consumer.close()
+
+class BrokerFrameSource:
+    def __init__(self, address=DEFAULT_ADDRESS, name="consumer", fps=None, width=None, height=None, slots=4,
+                 authkey=AUTHKEY, timeout=2.0):
+        self.address = address
+        self.name = name
+        self.fps = fps
+        self.width = width
+        self.height = height
+        self.slots = slots
+        self.authkey = authkey
+        self.timeout = timeout
+        self.conn = None
+        self.memory = None
+        self.last_sequence = 0
+        self.timestamp = None
+        self.attaches = 0
+        self.torn_reads = 0
+
+    def open(self):
+        if self.conn is not None:
+            return True
+        try:
+            conn = Client(self.address, authkey=self.authkey)
+            conn.send({"op": "attach", "name": self.name, "fps": self.fps, "width": self.width,
+                       "height": self.height, "slots": self.slots})
+            reply = conn.recv()
+        except (OSError, EOFError) as e:
+            print(f"Camera broker at {self.address[0]}:{self.address[1]} not reachable: {e}")
+            return False
+        if not reply.get("ok"):
+            print(f"Camera broker refused {self.name}: {reply.get('error')}")
+            conn.close()
+            return False
+        self.conn = conn
+        self.memory = attach_shared_memory(reply["shm"])
+        self.slot_count = reply["slots"]
+        self.headers, self.frames = ring_views(self.memory.buf, reply["slots"], reply["width"], reply["height"])
+        self.last_sequence = 0
+        self.attaches += 1
+        return True
+
+    # Newest frame published after the previous read, like VideoCapture.read
+    def read(self):
+        if not self.open():
+            return False, None
+        while True:
+            sequence = self._wait_sequence()
+            if sequence is None:
+                self.release()
+                return False, None
+            slot = (sequence - 1) % self.slot_count
+            if self.headers[slot]["sequence"] == sequence:
+                frame = self.frames[slot].copy()
+                if self.headers[slot]["sequence"] == sequence:
+                    self.timestamp = float(self.headers[slot]["timestamp"])
+                    self.last_sequence = sequence
+                    return True, frame
+            self.torn_reads += 1
+
+    # Latest announced sequence number, skipping older announcements
+    def _wait_sequence(self):
+        try:
+            if not self.conn.poll(self.timeout):
+                return None
+            sequence = self.conn.recv()
+            while self.conn.poll(0):
+                sequence = self.conn.recv()
+        except (EOFError, OSError):
+            return None
+        return sequence
+
+    def release(self):
+        if self.conn is None:
+            return
+        self.conn.close()
+        self.conn = None
+        self.headers = self.frames = None
+        self.memory.close()
+        self.memory = None
+
+    def is_open(self):
+        return self.conn is not None
+
+    # cv2.VideoCapture spelling, for the gesture scripts
+    def isOpened(self):
+        return self.open()
+
+def main():
+    parser = argparse.ArgumentParser(description="Own the webcam once and share its frames with local consumers.")
+    parser.add_argument("--camera", default="0", help="camera index or video file")
+    parser.add_argument("--address", type=parse_address, default=DEFAULT_ADDRESS,
+                        help=f"control socket as HOST:PORT (default {DEFAULT_ADDRESS[0]}:{DEFAULT_ADDRESS[1]})")
+    parser.add_argument("--slots", type=int, default=4, help="default ring buffer slots per consumer")
+    parser.add_argument("--quiet", action="store_true", help="do not log attaches and detaches")
+    parser.add_argument("--stall-timeout", type=float, default=2.0,
+                        help="detach a consumer that has not read an announcement for this many seconds")
+    args = parser.parse_args()
+
+    cap = cv2.VideoCapture(int(args.camera) if args.camera.isdigit() else args.camera)
+    if not cap.isOpened():
+        print("Webcam not accessible")
+        exit()
+    broker = CameraBroker(cap, args.address, slots=args.slots, verbose=not args.quiet,
+                          stall_timeout=args.stall_timeout)
+    try:
+        broker.start().run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        broker.stop()
+        cap.release()
+    print(f"Broker stopped: {broker.captured} frames captured, {broker.published} published")
+
+if __name__ == "__main__":
+    main()
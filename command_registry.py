@@ -0,0 +1,259 @@
+# Module: Command Registry and Compiled Intent Matcher for the Voice Assistant
+
+# Description:
+# ------------
+# Replaces the if/elif chain of substring tests in execute_command. Each
+# command declares its trigger phrases once, with named slots for its
+# parameters, and a transcript is matched against all of them in one pass.
+#
+# How It Works:
+# -------------
+# 1. A pattern is a phrase with slots, e.g. "set brightness to {level:number}"
+#    or "search {query} on {site}". Its words are split into literal runs
+#    ("set brightness to", "on") and slots. Every pattern starts with a literal
+#    run, its anchor.
+# 2. All literal runs of all patterns are compiled into one word-level
+#    Aho-Corasick automaton. Matching is on whole words, so "research" is not
+#    "search" and "python" does not contain "on".
+# 3. A transcript is lower-cased, split into words and scanned once; every
+#    literal run found is noted with its position.
+# 4. Each pattern whose anchor was found is checked against the positions of
+#    its other runs; the words in between fill the slots. A slot followed by a
+#    run takes as many words as it can ("search turn on lights on google" has
+#    the query "turn on lights"), and a final slot takes the rest.
+# 5. The match that starts earliest wins (the command is what the sentence
+#    starts with, not a phrase inside a search query); between matches at the
+#    same word, the one with more literal words, then the one registered first.
+#
+# Slot types:
+# -----------
+# - "text" (default): the words as spoken, joined by spaces.
+# - "number": only the digits, e.g. "50%" gives "50" (empty if none).
+
+import re
+from collections import deque
+
+WORD_PATTERN = re.compile(r"[\w']+")
+SLOT_PATTERN = re.compile(r"\{(\w+)(?::(\w+))?\}")
+SLOT_TYPES = {
+    "text": lambda words: " ".join(words),
+    "number": lambda words: "".join(filter(str.isdigit, "".join(words))),
+}
+
+# The assistant's commands and their phrases, shared by Windows_voice_assistant.py
+# (which attaches the handlers) and voice_benchmark.py
+ASSISTANT_COMMANDS = {
+    "time": ["what is the time now"],
+    "change_window": ["change window"],
+    "lock": ["lock my pc"],
+    "sleep": ["go to sleep"],
+    "shutdown": ["shut down my pc"],
+    "battery": ["what is my battery percentage", "what's my battery percentage"],
+    "open_chrome": ["open chrome"],
+    "screenshot": ["take a screenshot"],
+    "control_centre": ["open control centre"],
+    "settings": ["open settings"],
+    "desktop": ["show desktop"],
+    "close_window": ["close the window"],
+    "toggle_video": ["play the video", "pause the video", "stop the video"],
+    "brightness": ["set brightness to {level:number}"],
+    "search": ["search {query} on {site}", "search {query}"],
+}
+
+def tokenize(text):
+    return WORD_PATTERN.findall(text.lower())
+
+class CommandMatch:
+    def __init__(self, command, pattern, slots, start):
+        self.command = command
+        self.pattern = pattern
+        self.slots = slots
+        self.start = start
+
+    @property
+    def name(self):
+        return self.command.name
+
+    def run(self):
+        if self.command.handler is None:
+            raise ValueError(f"No handler for command {self.command.name!r}")
+        return self.command.handler(**self.slots)
+
+class Command:
+    def __init__(self, name, patterns, handler=None):
+        self.name = name
+        self.patterns = list(patterns)
+        self.handler = handler
+
+class Pattern:
+    # parts: ("run", run_id, length) and ("slot", name, type) in phrase order
+    def __init__(self, command, text, parts):
+        self.command = command
+        self.text = text
+        self.parts = parts
+        self.order = 0
+        self.literal_words = sum(part[2] for part in parts if part[0] == "run")
+
+class CommandRegistry:
+    def __init__(self):
+        self.commands = {}
+        self.patterns = []
+        self.runs = {}
+        self.automaton = None
+
+    @classmethod
+    def from_table(cls, table):
+        registry = cls()
+        for name, patterns in table.items():
+            registry.add(name, patterns)
+        return registry
+
+    def add(self, name, patterns, handler=None):
+        if name in self.commands:
+            raise ValueError(f"Command {name!r} is already registered")
+        command = Command(name, patterns, handler)
+        compiled = [self._parse(command, text) for text in command.patterns]
+        known = {pattern.text for pattern in self.patterns}
+        for pattern in compiled:
+            if pattern.text in known:
+                raise ValueError(f"Phrase {pattern.text!r} of {name!r} is already registered")
+            known.add(pattern.text)
+        self.commands[name] = command
+        self.patterns.extend(compiled)
+        self.automaton = None
+        return command
+
+    # Decorator attaching a handler to a registered command; slots are passed
+    # as keyword arguments
+    def handler(self, name):
+        def attach(function):
+            self.commands[name].handler = function
+            return function
+        return attach
+
+    def match(self, text):
+        if self.automaton is None:
+            self._compile()
+        words = tokenize(text)
+        found = self._scan(words)
+        best = None
+        for run_id, starts in found.items():
+            patterns = self.by_anchor.get(run_id)
+            if patterns is None:
+                continue
+            for start in starts:
+                if best is not None and start > best[0]:
+                    break
+                # Patterns sharing an anchor are sorted best first, so the first fit wins
+                for pattern in patterns:
+                    key = (start, -pattern.literal_words, pattern.order)
+                    if best is not None and key >= best[:3]:
+                        break
+                    slots = self._fill(pattern, 1, start + pattern.parts[0][2], words, found, ())
+                    if slots is not None:
+                        best = key + (pattern, slots)
+                        break
+                if best is not None and best[3] in patterns:
+                    break
+        if best is None:
+            return None
+        return CommandMatch(best[3].command, best[3], dict(best[4]), best[0])
+
+    # Runs the matched command's handler; False if nothing matched
+    def dispatch(self, text):
+        match = self.match(text)
+        if match is None:
+            return False
+        match.run()
+        return True
+
+    def _parse(self, command, text):
+        parts, run = [], []
+        for word in text.lower().split():
+            slot = SLOT_PATTERN.fullmatch(word)
+            if slot is None:
+                run.extend(tokenize(word))
+                continue
+            name, kind = slot.group(1), slot.group(2) or "text"
+            if kind not in SLOT_TYPES:
+                raise ValueError(f"Unknown slot type {kind!r} in {text!r}")
+            if run:
+                parts.append(("run", self._run_id(tuple(run)), len(run)))
+                run = []
+            elif not parts or parts[-1][0] == "slot":
+                raise ValueError(f"{text!r}: a slot must follow a literal word")
+            parts.append(("slot", name, kind))
+        if run:
+            parts.append(("run", self._run_id(tuple(run)), len(run)))
+        if not parts:
+            raise ValueError(f"Empty phrase for command {command.name!r}")
+        return Pattern(command, " ".join(text.lower().split()), parts)
+
+    def _run_id(self, words):
+        return self.runs.setdefault(words, len(self.runs))
+
+    # Word-level Aho-Corasick over every literal run
+    def _compile(self):
+        goto, fail, output = [{}], [0], [[]]
+        for words, run_id in self.runs.items():
+            node = 0
+            for word in words:
+                if word not in goto[node]:
+                    goto.append({})
+                    fail.append(0)
+                    output.append([])
+                    goto[node][word] = len(goto) - 1
+                node = goto[node][word]
+            output[node].append((run_id, len(words)))
+        pending = deque(goto[0].values())
+        while pending:
+            node = pending.popleft()
+            for word, child in goto[node].items():
+                pending.append(child)
+                state = fail[node]
+                while state and word not in goto[state]:
+                    state = fail[state]
+                fail[child] = goto[state].get(word, 0)
+                output[child] = output[child] + output[fail[child]]
+        self.automaton = (goto, fail, output)
+        self.by_anchor = {}
+        for order, pattern in enumerate(self.patterns):
+            pattern.order = order
+            self.by_anchor.setdefault(pattern.parts[0][1], []).append(pattern)
+        for patterns in self.by_anchor.values():
+            patterns.sort(key=lambda pattern: (-pattern.literal_words, pattern.order))
+
+    # {run_id: [start positions]} of every literal run in the words, in order
+    def _scan(self, words):
+        goto, fail, output = self.automaton
+        found = {}
+        node = 0
+        for position, word in enumerate(words):
+            while node and word not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(word, 0)
+            for run_id, length in output[node]:
+                found.setdefault(run_id, []).append(position - length + 1)
+        return found
+
+    # Match parts[index:] from word `position`; a tuple of (slot, value) pairs, or None
+    def _fill(self, pattern, index, position, words, found, slots):
+        if index == len(pattern.parts):
+            return slots
+        kind, key, extra = pattern.parts[index]
+        if kind == "run":
+            if position not in found.get(key, ()):
+                return None
+            return self._fill(pattern, index + 1, position + extra, words, found, slots)
+        if index + 1 == len(pattern.parts):
+            return slots + ((key, SLOT_TYPES[extra](words[position:])),)
+        # The next part is a run: try its latest occurrence first, so the slot takes as much as it can
+        run_id, length = pattern.parts[index + 1][1], pattern.parts[index + 1][2]
+        for start in reversed(found.get(run_id, ())):
+            if start < position:
+                break
+            filled = self._fill(pattern, index + 2, start + length, words, found,
+                                slots + ((key, SLOT_TYPES[extra](words[position:start])),))
+            if filled is not None:
+                return filled
+        return None
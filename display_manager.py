@@ -0,0 +1,292 @@
+# Module: Multi-Display Brightness Manager
+
+# Description:
+# ------------
+# Sets the brightness of every connected display at once. Before,
+# Auto_brightness_adjust.adjust_brightness and the voice assistant's
+# set_brightness called sbc.set_brightness(level) with no display, so
+# screen_brightness_control enumerated the displays again on every call and
+# wrote to them one after the other.
+#
+# How It Works:
+# -------------
+# 1. The displays are enumerated once and their handles cached. They are
+#    enumerated again only on a hotplug: when the backend's cheap display count
+#    (checked at most every hotplug_interval seconds) changes, or when a write
+#    fails because a display went away (that write is then retried once). A
+#    display that still fails after the refresh (e.g. one without DDC/CI) is
+#    marked unwritable and no longer triggers enumerations; when no display at
+#    all could be written, set_brightness raises OSError.
+# 2. set_brightness(level) maps the level through each display's profile and
+#    writes all displays in parallel on a small thread pool, so a slow DDC/CI
+#    monitor no longer delays the laptop panel. It returns once every write
+#    has finished, or immediately with wait=False.
+# 3. DisplayProfile gives a display its own offset and curve (gamma), e.g. an
+#    external monitor that looks brighter than the laptop panel at the same
+#    percentage. Profiles are matched by display name; "*" is the default.
+# 4. Write latency is kept per display and reported by latency_summary().
+# 5. set_brightness / get_brightness follow screen_brightness_control's module
+#    functions, so a DisplayManager can stand in for `sbc` wherever it is used
+#    as a brightness backend.
+#
+# Backends:
+# ---------
+# - SbcDisplayBackend: screen_brightness_control Display objects, imported on
+#   first use. On Windows the monitor count comes from GetSystemMetrics, which
+#   costs microseconds; elsewhere only failed writes trigger a refresh.
+# - FakeDisplayBackend: displays with their own simulated write latency, an
+#   enumeration delay, and connect/disconnect for hotplug tests.
+
+import argparse
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+SM_CMONITORS = 80
+
+# min_level is 1 so a negative offset never maps a dim level to a black screen
+class DisplayProfile:
+    def __init__(self, offset=0, gamma=1.0, min_level=1, max_level=100):
+        self.offset = offset
+        self.gamma = gamma
+        self.min_level = min_level
+        self.max_level = max_level
+
+    def map(self, level):
+        curved = 100 * (max(0, min(100, level)) / 100) ** self.gamma
+        return int(max(self.min_level, min(self.max_level, round(curved + self.offset))))
+
+# "NAME:OFFSET[:GAMMA]" from the command line, e.g. "DELL U2419H:-10:1.2"
+def parse_display_profile(text):
+    name, _, rest = text.partition(":")
+    values = rest.split(":") if rest else []
+    try:
+        if not name or not 1 <= len(values) <= 2:
+            raise ValueError(text)
+        return name, DisplayProfile(int(values[0]), float(values[1]) if len(values) == 2 else 1.0)
+    except ValueError:
+        raise argparse.ArgumentTypeError("display profile must be NAME:OFFSET[:GAMMA], e.g. laptop:-10:1.2")
+
+class SbcDisplayBackend:
+    def __init__(self):
+        self.sbc = None
+
+    def _module(self):
+        if self.sbc is None:
+            import screen_brightness_control
+            self.sbc = screen_brightness_control
+        return self.sbc
+
+    # [(name, handle)], names made unique with the display index
+    def enumerate(self):
+        sbc = self._module()
+        displays = []
+        for index, info in enumerate(sbc.list_monitors_info()):
+            name = info.get("name") or f"display {index}"
+            if any(name == existing for existing, _ in displays):
+                name = f"{name} #{index}"
+            displays.append((name, sbc.Display.from_dict(info)))
+        return displays
+
+    def display_count(self):
+        try:
+            import ctypes
+            return ctypes.windll.user32.GetSystemMetrics(SM_CMONITORS)
+        except (ImportError, AttributeError, OSError):
+            return None
+
+    def set(self, handle, level):
+        handle.set_brightness(level)
+
+    def get(self, handle):
+        value = handle.get_brightness()
+        return value[0] if isinstance(value, (list, tuple)) else value
+
+class FakeDisplay:
+    def __init__(self, name, latency=0.0, brightness=50):
+        self.name = name
+        self.latency = latency
+        self.brightness = brightness
+        self.connected = True
+        self.writes = []
+
+class FakeDisplayBackend:
+    # displays: {name: write latency in seconds}
+    def __init__(self, displays, enumerate_delay=0.0):
+        self.displays = {name: FakeDisplay(name, latency) for name, latency in displays.items()}
+        self.enumerate_delay = enumerate_delay
+        self.enumerations = 0
+        self.lock = threading.Lock()
+
+    def connect(self, name, latency=0.0):
+        with self.lock:
+            self.displays[name] = FakeDisplay(name, latency)
+
+    def disconnect(self, name):
+        with self.lock:
+            self.displays.pop(name).connected = False
+
+    def enumerate(self):
+        if self.enumerate_delay:
+            time.sleep(self.enumerate_delay)
+        with self.lock:
+            self.enumerations += 1
+            return [(name, display) for name, display in self.displays.items()]
+
+    def display_count(self):
+        with self.lock:
+            return len(self.displays)
+
+    def set(self, display, level):
+        if display.latency:
+            time.sleep(display.latency)
+        if not display.connected:
+            raise OSError(f"{display.name} is not connected")
+        display.brightness = level
+        display.writes.append((time.perf_counter(), level))
+
+    def get(self, display):
+        if not display.connected:
+            raise OSError(f"{display.name} is not connected")
+        return display.brightness
+
+class DisplayManager:
+    def __init__(self, backend, profiles=None, workers=4, hotplug_interval=5.0, latency_samples=500,
+                 clock=time.monotonic):
+        self.backend = backend
+        self.profiles = dict(profiles or {})
+        self.workers = workers
+        self.hotplug_interval = hotplug_interval
+        self.latency_samples = latency_samples
+        self.clock = clock
+        self.displays = None
+        self.known_count = None
+        self.last_check = float("-inf")
+        self.level = None
+        self.latencies = {}
+        self.failures = {}
+        # Displays that still failed right after a refresh (e.g. no DDC/CI):
+        # their failures no longer trigger an enumeration
+        self.unwritable = set()
+        self.enumerations = 0
+        self.lock = threading.Lock()
+        self.executor = None
+
+    def profile(self, name):
+        return self.profiles.get(name) or self.profiles.get("*") or DisplayProfile()
+
+    # Enumerate the displays now (also usable to warm the cache at startup)
+    def refresh(self):
+        displays = self.backend.enumerate()
+        with self.lock:
+            self.displays = displays
+            self.known_count = self.backend.display_count()
+            self.last_check = self.clock()
+            self.enumerations += 1
+            for name, _ in displays:
+                self.latencies.setdefault(name, deque(maxlen=self.latency_samples))
+                self.failures.setdefault(name, 0)
+        return [name for name, _ in displays]
+
+    def display_names(self):
+        return [name for name, _ in self._current_displays()]
+
+    # Returns {display name: level written} (None where the write failed), or
+    # the pending futures with wait=False. `display` limits it to one display.
+    # Raises OSError when no display was written.
+    def set_brightness(self, value, display=None, wait=True):
+        level = int(value)
+        self.level = level
+        targets = self._current_displays()
+        if display is not None:
+            targets = [(name, handle) for name, handle in targets if name == display]
+        futures = {name: self._pool().submit(self._write, name, handle, self.profile(name).map(level))
+                   for name, handle in targets}
+        if not wait:
+            return futures
+        results = {name: future.result() for name, future in futures.items()}
+        failed = [name for name, written in results.items() if written is None]
+        if any(name not in self.unwritable for name in failed):
+            # A display that went away is the usual cause: enumerate again, retry
+            # the failed writes once and write any display that has appeared since
+            self.refresh()
+            for name, handle in self._current_displays():
+                if (name in failed or name not in results) and display in (None, name):
+                    results[name] = self._write(name, handle, self.profile(name).map(level))
+                    if results[name] is None:
+                        self.unwritable.add(name)
+        if not any(written is not None for written in results.values()):
+            target = display if display is not None else "any display"
+            raise OSError(f"Could not set the brightness of {target} to {level}%")
+        return results
+
+    # The last level set through this manager (what BrightnessActuator ramps
+    # from); before any write, the first display's reading
+    def get_brightness(self, display=None):
+        if self.level is not None and display is None:
+            return [self.level]
+        levels = []
+        for name, handle in self._current_displays():
+            if display is None or name == display:
+                levels.append(self.backend.get(handle))
+        return levels[:1] if display is None else levels
+
+    def latency_summary(self):
+        summaries = {}
+        with self.lock:
+            items = [(name, sorted(samples)) for name, samples in self.latencies.items()]
+        for name, samples in items:
+            if not samples:
+                summaries[name] = {"count": 0, "mean": 0.0, "p95": 0.0, "max": 0.0, "failures": self.failures[name]}
+                continue
+            summaries[name] = {
+                "count": len(samples),
+                "mean": sum(samples) / len(samples),
+                "p95": samples[min(len(samples) - 1, int(0.95 * len(samples)))],
+                "max": samples[-1],
+                "failures": self.failures[name],
+            }
+        return summaries
+
+    def format_lines(self):
+        return [f"{name}: {stats['count']} writes, mean {stats['mean'] * 1e3:.0f} ms, "
+                f"p95 {stats['p95'] * 1e3:.0f} ms, max {stats['max'] * 1e3:.0f} ms, {stats['failures']} failed"
+                for name, stats in self.latency_summary().items()]
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+
+    def _pool(self):
+        with self.lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(self.workers, thread_name_prefix="display-write")
+            return self.executor
+
+    def _current_displays(self):
+        if self.displays is None:
+            self.refresh()
+        elif self.clock() - self.last_check >= self.hotplug_interval:
+            count = self.backend.display_count()
+            self.last_check = self.clock()
+            if count is not None and count != self.known_count:
+                self.unwritable.clear()
+                self.refresh()
+        return self.displays
+
+    def _write(self, name, handle, level):
+        start = time.perf_counter()
+        try:
+            self.backend.set(handle, level)
+        except Exception as e:
+            if name not in self.unwritable:
+                print(f"Failed to set brightness of {name} to {level}%: {e}")
+            with self.lock:
+                self.failures[name] = self.failures.get(name, 0) + 1
+            return None
+        with self.lock:
+            self.unwritable.discard(name)
+            self.latencies.setdefault(name, deque(maxlen=self.latency_samples)).append(time.perf_counter() - start)
+        return level
@@ -0,0 +1,148 @@
+# Module: Gesture-to-Key Decision Logic for the Game Controllers
+
+# Description:
+# ------------
+# The part of Gesture_control_for_dino_game.py and
+# gesture_control_for_Hillclimbracing.py that turns one hand's landmarks into
+# key presses, without the webcam, MediaPipe or the preview window. The live
+# scripts feed it landmarks from MediaPipe; landmark_recording.py replays
+# recorded landmarks through it.
+#
+# How It Works:
+# -------------
+# 1. Each controller binds hand labels ("Left"/"Right") to a key.
+# 2. update(label, points, timestamp) takes a hand's (21, 3) landmark array
+#    and decides whether its gesture is active:
+#       - trigger="threshold": the rule from landmark_features.py, frame by frame.
+#       - trigger="hysteresis" (the default): one PinchTrigger per hand that
+#         presses below the rule's threshold and releases only above
+#         release_threshold, so a distance hovering at the threshold does not
+#         chatter.
+#       - trigger="predictive": the same, plus pressing early on a fast-closing
+#         pinch (at the cost of some unconfirmed presses on near misses).
+# 3. When the decision changes, the bound key is pressed or released through a
+#    KeyDispatcher; a key is never pressed twice or released while up.
+#
+# Controllers:
+# ------------
+# - DinoController: right hand, thumb tip on index PIP joint -> spacebar.
+# - HillClimbController: left hand pinch -> left arrow (brake), right hand
+#   pinch -> right arrow (gas).
+# Both take other keys (jump_key, brake_key/gas_key), so several players can
+# share one keyboard (see multi_camera.py).
+
+import time
+
+from gesture_common import NullProfiler, PinchTrigger
+from landmark_features import GESTURE_RULES, GestureEngine
+
+TRIGGER_MODES = ("threshold", "hysteresis", "predictive")
+
+JUMP_THRESHOLD = 0.06
+PINCH_THRESHOLD = 0.05
+
+# Thumb tip to index PIP distance (the "jump" rule), from the engine's landmark array
+def jump_distance(points):
+    dx = points[4, 0] - points[6, 0]
+    dy = points[4, 1] - points[6, 1]
+    return (dx * dx + dy * dy) ** 0.5
+
+# Largest per-axis gap between thumb tip and index tip, from the engine's landmark
+# array; below PINCH_THRESHOLD it is the same test as the "thumb_index_pinch" rule
+def pinch_distance(points):
+    return max(abs(points[4, 0] - points[8, 0]), abs(points[4, 1] - points[8, 1]))
+
+class GameController:
+    # bindings: {hand label: (key, press message, release message)}
+    def __init__(self, keys, bindings, gesture, distance, threshold, trigger="hysteresis",
+                 release_threshold=None, verbose=True, profiler=None, engine=None):
+        if trigger not in TRIGGER_MODES:
+            raise ValueError(f"Unknown trigger {trigger!r}, expected one of {', '.join(TRIGGER_MODES)}")
+        self.trigger = trigger
+        self.keys = keys
+        self.bindings = bindings
+        self.hands = tuple(bindings)
+        self.distance = distance
+        self.verbose = verbose
+        self.profiler = profiler if profiler is not None else NullProfiler()
+        # Only this controller's rule: evaluating the whole table per hand costs ~10x more
+        self.engine = engine if engine is not None else GestureEngine({gesture: GESTURE_RULES[gesture]})
+        self._gesture = self.engine.names.index(gesture)
+        self.triggers = {}
+        if trigger != "threshold":
+            self.triggers = {label: PinchTrigger(threshold, release_threshold, predictive=trigger == "predictive")
+                             for label in self.hands}
+        self.held = dict.fromkeys(self.hands, False)
+        self.updates = 0
+        self.presses = 0
+
+    # points is a (21, 3) landmark array; passing self.engine.points (as filled
+    # by self.engine.load) skips the copy
+    def update(self, label, points, timestamp):
+        if label not in self.held:
+            return
+        if points is not self.engine.points:
+            self.engine.load_array(points)
+        self.updates += 1
+        if self.triggers:
+            active = self.triggers[label].update(self.distance(self.engine.points), timestamp)
+        else:
+            active = bool(self.engine.evaluate_loaded()[self._gesture])
+        self.profiler.lap("gestures")
+
+        if active == self.held[label]:
+            self.profiler.lap("dispatch")
+            return
+        detected_at = time.perf_counter()
+        key, press_message, release_message = self.bindings[label]
+        if active:
+            if self.verbose:
+                print(press_message)
+            self.keys.key_down(key, detected_at)
+            self.presses += 1
+        else:
+            if self.verbose:
+                print(release_message)
+            self.keys.key_up(key, detected_at)
+        self.held[label] = active
+        self.profiler.lap("dispatch")
+
+    def trigger_report(self):
+        if self.trigger == "hysteresis":
+            return [f"{label} hysteresis trigger: {trigger.presses} presses"
+                    for label, trigger in self.triggers.items()]
+        return [f"{label} predictive trigger: {trigger.presses} presses, {trigger.early_presses} early, "
+                f"{trigger.false_presses} unconfirmed" for label, trigger in self.triggers.items()]
+
+class DinoController(GameController):
+    KEY_NAMES = ("jump",)
+
+    def __init__(self, keys, trigger="hysteresis", release_threshold=0.075, jump_key="space", **kwargs):
+        name = "spacebar" if jump_key == "space" else jump_key
+        super().__init__(keys, {"Right": (jump_key, f"Jump ({name} pressed)", f"Release ({name} released)")},
+                         "jump", jump_distance, JUMP_THRESHOLD, trigger, release_threshold, **kwargs)
+
+class HillClimbController(GameController):
+    KEY_NAMES = ("brake", "gas")
+
+    def __init__(self, keys, trigger="hysteresis", release_threshold=0.065, brake_key="left", gas_key="right",
+                 **kwargs):
+        super().__init__(keys, {"Left": (brake_key, "Brake pressed", "Brake released"),
+                                "Right": (gas_key, "Gas pressed", "Gas released")},
+                         "thumb_index_pinch", pinch_distance, PINCH_THRESHOLD, trigger, release_threshold,
+                         **kwargs)
+
+GAME_CONTROLLERS = {"dino": DinoController, "hillclimb": HillClimbController}
+
+# Builds a game's controller with its keys given in KEY_NAMES order
+# (e.g. ["up"] for dino, ["a", "d"] for hillclimb); missing keys keep the defaults
+def make_controller(game, keys, bound_keys=(), **kwargs):
+    if game not in GAME_CONTROLLERS:
+        raise ValueError(f"Unknown game {game!r}, expected one of {', '.join(GAME_CONTROLLERS)}")
+    controller_class = GAME_CONTROLLERS[game]
+    if len(bound_keys) > len(controller_class.KEY_NAMES):
+        raise ValueError(f"{game} takes at most {len(controller_class.KEY_NAMES)} keys "
+                         f"({', '.join(controller_class.KEY_NAMES)})")
+    for name, key in zip(controller_class.KEY_NAMES, bound_keys):
+        kwargs[f"{name}_key"] = key
+    return controller_class(keys, **kwargs)
@@ -0,0 +1,503 @@
+# Project: Benchmarks for the Gesture Controllers
+
+# Description:
+# ------------
+# Offline measurements for Gesture_control_for_dino_game.py and
+# gesture_control_for_Hillclimbracing.py that run from recorded video instead
+# of a live webcam.
+#
+# ROI benchmark:
+#   Runs the same video through full-frame `Hands.process` and through
+#   `HandROITracker` (separate `Hands` instances, so neither path benefits from
+#   the other's tracking state). Reports per-frame inference time for both paths,
+#   detection recall of the ROI path against the full-frame path, and landmark
+#   agreement: the mean, p95 and max per-hand landmark distance between the two
+#   paths in full-frame coordinates, and the share of hands within --tolerance.
+#
+# Features benchmark:
+#   Evaluates gesture rule tables of growing size on synthetic hands, once with
+#   one pure-Python check per rule (like the original gesture functions) and
+#   once with the vectorized GestureEngine, and reports the cost per hand and
+#   the agreement between the two, then the per-hand cost of a game
+#   controller's one-rule engine. Needs neither a camera nor MediaPipe.
+#
+# Trigger benchmark:
+#   Replays pinch-distance traces (real pinches, near misses that stop just
+#   above the threshold, sensor noise) sampled at the camera frame rate through
+#   the plain threshold trigger, threshold plus release hysteresis, and the
+#   predictive trigger. Reports press latency relative to the moment the true
+#   distance crosses the threshold, missed pinches, false presses during near
+#   misses or open hands, and extra presses (chatter) within one pinch.
+#   With --recording the pinch distances come from a landmark recording
+#   instead; it has no ground truth, so presses are compared with the plain
+#   threshold trigger's presses (matched presses, extra presses, mean lead).
+#
+# Replay benchmark:
+#   Replays a landmark recording (or a synthetic one built from the pinch trace)
+#   through the game controller and key dispatcher with the in-memory key
+#   backend, and reports decision-layer throughput in frames per second. Needs
+#   neither a camera nor MediaPipe.
+#
+# Multicam benchmark:
+#   Runs multi_camera.py's worker processes, 1..N of them, on the same video
+#   (each with its own MediaPipe instance) and reports the aggregate landmark
+#   rate reaching the dispatcher, to check that throughput scales with cores.
+#
+# Usage:
+# ------
+#   python gesture_benchmark.py roi --video hands.mp4
+#   python gesture_benchmark.py roi --video hands.mp4 --max-hands 2 --input-size 160
+#   python gesture_benchmark.py features --sizes 1,9,50
+#   python gesture_benchmark.py trigger --threshold 0.05 --release-threshold 0.065
+#   python gesture_benchmark.py trigger --recording hillclimb.lmrec --game hillclimb
+#   python gesture_benchmark.py replay --game hillclimb
+#   python gesture_benchmark.py replay --recording dino.lmrec --game dino
+#   python gesture_benchmark.py multicam --video hands.mp4 --workers 1,2,4
+
+import argparse
+import math
+import os
+import tempfile
+import time
+from types import SimpleNamespace
+import cv2
+import numpy as np
+
+from game_controllers import GAME_CONTROLLERS, JUMP_THRESHOLD, PINCH_THRESHOLD, make_controller
+from gesture_common import HandROITracker, PinchTrigger
+from key_dispatch import KeyDispatcher, RecordingKeyBackend
+from landmark_features import GESTURE_RULES, GestureEngine
+from landmark_recording import LABEL_CODES, LandmarkRecorder, LandmarkRecording, replay
+from multi_camera import Player, run_players
+
+def percentile_ms(values, fraction):
+    return float(np.percentile(values, fraction * 100)) * 1e3 if values else 0.0
+
+def landmarks_by_label(result):
+    if not result.multi_hand_landmarks:
+        return {}
+    return {info.classification[0].label: np.array([[lm.x, lm.y] for lm in hand.landmark])
+            for hand, info in zip(result.multi_hand_landmarks, result.multi_handedness)}
+
+def run_roi_benchmark(video, max_hands=1, padding=0.35, input_size=192, limit=None, tolerance=0.02):
+    import mediapipe as mp
+
+    cap = cv2.VideoCapture(video)
+    if not cap.isOpened():
+        raise SystemExit(f"Could not open video {video}")
+    full_hands = mp.solutions.hands.Hands(max_num_hands=max_hands)
+    tracker = HandROITracker(mp.solutions.hands.Hands(max_num_hands=max_hands),
+                             mp.solutions.hands.Hands(static_image_mode=True, max_num_hands=max_hands),
+                             padding, input_size)
+
+    full_times, roi_times, errors = [], [], []
+    full_detections = matched_detections = roi_only = frames = 0
+    try:
+        while limit is None or frames < limit:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames += 1
+            rgb = cv2.cvtColor(cv2.flip(frame, 1), cv2.COLOR_BGR2RGB)
+
+            start = time.perf_counter()
+            full_result = full_hands.process(rgb)
+            full_times.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            roi_result = tracker.process(rgb)
+            roi_times.append(time.perf_counter() - start)
+
+            full_hands_found = landmarks_by_label(full_result)
+            roi_hands_found = landmarks_by_label(roi_result)
+            for label, points in full_hands_found.items():
+                full_detections += 1
+                if label in roi_hands_found:
+                    matched_detections += 1
+                    errors.append(float(np.linalg.norm(points - roi_hands_found[label], axis=1).mean()))
+            roi_only += len(set(roi_hands_found) - set(full_hands_found))
+    finally:
+        cap.release()
+        full_hands.close()
+        tracker.hands.close()
+        tracker.crop_hands.close()
+
+    if not frames:
+        raise SystemExit("No frames to benchmark")
+    print(f"{frames} frames from {video}")
+    print(f"{'path':<11} {'mean ms':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    for name, times in (("full frame", full_times), ("hand ROI", roi_times)):
+        print(f"{name:<11} {np.mean(times) * 1e3:>8.2f} {percentile_ms(times, 0.5):>8.2f} "
+              f"{percentile_ms(times, 0.95):>8.2f}")
+    recall = matched_detections / full_detections if full_detections else 1.0
+    print(f"ROI recall vs full frame: {recall:.1%} ({matched_detections}/{full_detections} hands), "
+          f"{roi_only} hands found only by the ROI path")
+    if errors:
+        within = sum(error <= tolerance for error in errors) / len(errors)
+        print(f"Landmark offset between paths (normalized frame units): mean {np.mean(errors):.4f}, "
+              f"p95 {np.percentile(errors, 95):.4f}, max {max(errors):.4f}")
+        print(f"Landmark agreement: {within:.1%} of matched hands within {tolerance}")
+    print(f"ROI path: {tracker.roi_runs} crop runs, {tracker.full_runs} full-frame runs, "
+          f"{tracker.fallbacks} fallbacks after losing the hand")
+
+# One rule checked the way the original gesture functions do it: individual
+# landmark attribute lookups and pure-Python arithmetic.
+def python_rule(landmarks, conditions):
+    for kind, indices, op, threshold in conditions:
+        if kind == "angle":
+            a, b, c = (landmarks[i] for i in indices)
+            to_a = (a.x - b.x, a.y - b.y, a.z - b.z)
+            to_c = (c.x - b.x, c.y - b.y, c.z - b.z)
+            norms = math.hypot(*to_a) * math.hypot(*to_c)
+            cosine = sum(u * v for u, v in zip(to_a, to_c)) / max(norms, 1e-9)
+            value = math.degrees(math.acos(max(-1.0, min(1.0, cosine))))
+        else:
+            a, b = landmarks[indices[0]], landmarks[indices[1]]
+            if kind == "dx":
+                value = abs(a.x - b.x)
+            elif kind == "dy":
+                value = abs(a.y - b.y)
+            else:
+                value = ((a.x - b.x) ** 2 + (a.y - b.y) ** 2) ** 0.5
+        if not (value < threshold if op == "<" else value > threshold):
+            return False
+    return True
+
+# The default rule table, padded with extra pair-distance gestures up to `size`
+def rule_table(size, rng):
+    rules = dict(list(GESTURE_RULES.items())[:size])
+    while len(rules) < size:
+        a, b = (int(i) for i in rng.choice(21, 2, replace=False))
+        rules[f"extra_{len(rules)}"] = [("distance", (a, b), "<", float(rng.uniform(0.05, 0.3)))]
+    return rules
+
+# Random hands around a plausible pose, as objects with .x/.y/.z like MediaPipe's
+def synthetic_hands(count, rng):
+    base = rng.uniform(0.35, 0.65, (21, 3))
+    hands = []
+    for _ in range(count):
+        points = base + rng.normal(0, 0.05, (21, 3))
+        hands.append([SimpleNamespace(x=x, y=y, z=z) for x, y, z in points])
+    return hands
+
+def run_features_benchmark(sizes, hand_count=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    hands = synthetic_hands(hand_count, rng)
+    print(f"{hand_count} synthetic hands")
+    print(f"{'gestures':>8} {'python us/hand':>15} {'engine us/hand':>15} {'agreement':>10}")
+    for size in sizes:
+        rules = rule_table(size, rng)
+        engine = GestureEngine(rules)
+
+        start = time.perf_counter()
+        expected = [{name: python_rule(hand, conditions) for name, conditions in rules.items()} for hand in hands]
+        python_cost = (time.perf_counter() - start) / hand_count
+
+        start = time.perf_counter()
+        results = [engine.evaluate(hand) for hand in hands]
+        engine_cost = (time.perf_counter() - start) / hand_count
+
+        agreement = sum(result == reference for result, reference in zip(results, expected)) / hand_count
+        print(f"{len(rules):>8} {python_cost * 1e6:>15.1f} {engine_cost * 1e6:>15.1f} {agreement:>10.1%}")
+
+    # What a game controller does per hand: its one rule, loading only the landmarks it reads
+    engine = GestureEngine({"jump": GESTURE_RULES["jump"]})
+    start = time.perf_counter()
+    for hand in hands:
+        engine.load(hand, only_used=True)
+        engine.evaluate_loaded()
+    controller_cost = (time.perf_counter() - start) / hand_count
+    start = time.perf_counter()
+    for hand in hands:
+        python_rule(hand, GESTURE_RULES["jump"])
+    python_cost = (time.perf_counter() - start) / hand_count
+    print(f"Dino controller path: {controller_cost * 1e6:.1f} us/hand "
+          f"(single hand-written check: {python_cost * 1e6:.1f} us/hand)")
+
+# Fingers accelerate and decelerate smoothly (smoothstep) rather than moving linearly
+def ease(fraction):
+    return fraction * fraction * (3 - 2 * fraction)
+
+def inverse_ease(value):
+    return 0.5 - math.sin(math.asin(1 - 2 * value) / 3)
+
+# Pinch-distance trace at `fps` made of episodes: open hand, closing ramp, hold,
+# reopening. Real pinches close to 30-95% of the threshold (the shallow ones
+# hover near it); near misses stop 15-80% above it. Returns (timestamps, distances, episodes) where each episode
+# is (start, end, is_real, true crossing time or None).
+def synthetic_pinch_trace(threshold, episodes=300, fps=30.0, noise=0.003, near_miss_rate=0.3, seed=0):
+    rng = np.random.default_rng(seed)
+    segments = []
+    t = 0.0
+    for _ in range(episodes):
+        is_real = rng.random() >= near_miss_rate
+        open_distance = rng.uniform(0.15, 0.25)
+        closed = rng.uniform(0.3, 0.95) * threshold if is_real else rng.uniform(1.15, 1.8) * threshold
+        open_time, close_time = rng.uniform(0.3, 0.8), rng.uniform(0.08, 0.25)
+        hold_time, reopen_time = rng.uniform(0.15, 0.5), rng.uniform(0.1, 0.2)
+        close_start = t + open_time
+        crossing = None
+        if is_real:
+            crossing = close_start + close_time * inverse_ease((open_distance - threshold) / (open_distance - closed))
+        end = close_start + close_time + hold_time + reopen_time
+        segments.append((t, close_start, close_time, hold_time, reopen_time, open_distance, closed))
+        t = end
+        segments[-1] += (is_real, crossing, end)
+
+    timestamps = np.arange(0.0, t, 1.0 / fps)
+    distances = np.empty_like(timestamps)
+    episode_list = []
+    index = 0
+    for start, close_start, close_time, hold_time, reopen_time, open_distance, closed, is_real, crossing, end \
+            in segments:
+        episode_list.append((start, end, is_real, crossing))
+        while index < len(timestamps) and timestamps[index] < end:
+            now = timestamps[index]
+            if now < close_start:
+                value = open_distance
+            elif now < close_start + close_time:
+                value = open_distance + (closed - open_distance) * ease((now - close_start) / close_time)
+            elif now < close_start + close_time + hold_time:
+                value = closed
+            else:
+                value = closed + (open_distance - closed) * ease((now - close_start - close_time - hold_time) / reopen_time)
+            distances[index] = value
+            index += 1
+    distances = np.maximum(distances + rng.normal(0, noise, len(distances)), 0.0)
+    return timestamps, distances, episode_list
+
+def trigger_presses(trigger, timestamps, distances):
+    presses = []
+    pressed = False
+    for timestamp, distance in zip(timestamps.tolist(), distances.tolist()):
+        now_pressed = trigger.update(distance, timestamp)
+        if now_pressed and not pressed:
+            presses.append(timestamp)
+        pressed = now_pressed
+    return presses
+
+def score_trigger(trigger, timestamps, distances, episodes):
+    press_times = trigger_presses(trigger, timestamps, distances)
+
+    latencies, missed, false_presses, chatter = [], 0, 0, 0
+    position = 0
+    for start, end, is_real, crossing in episodes:
+        presses = []
+        while position < len(press_times) and press_times[position] < end:
+            if press_times[position] >= start:
+                presses.append(press_times[position])
+            position += 1
+        if not is_real:
+            false_presses += len(presses)
+        elif not presses:
+            missed += 1
+        else:
+            latencies.append(presses[0] - crossing)
+            chatter += len(presses) - 1
+    return latencies, missed, false_presses, chatter
+
+def run_trigger_benchmark(threshold, release_threshold, episodes, fps, noise, lead_time):
+    timestamps, distances, episode_list = synthetic_pinch_trace(threshold, episodes, fps, noise)
+    real = sum(1 for _, _, is_real, _ in episode_list if is_real)
+    print(f"{len(episode_list)} pinch episodes ({real} real, {len(episode_list) - real} near misses), "
+          f"{len(timestamps)} frames at {fps:.0f} fps, noise {noise}")
+    configs = [
+        ("threshold", PinchTrigger(threshold)),
+        ("hysteresis", PinchTrigger(threshold, release_threshold)),
+        ("predictive", PinchTrigger(threshold, release_threshold, predictive=True, lead_time=lead_time)),
+    ]
+    print(f"{'trigger':<11} {'mean ms':>8} {'p95 ms':>8} {'missed':>7} {'false':>6} {'chatter':>8}")
+    baseline = None
+    for name, trigger in configs:
+        latencies, missed, false_presses, chatter = score_trigger(trigger, timestamps, distances, episode_list)
+        mean = float(np.mean(latencies)) if latencies else 0.0
+        baseline = mean if baseline is None else baseline
+        print(f"{name:<11} {mean * 1e3:>8.1f} {percentile_ms(latencies, 0.95):>8.1f} {missed:>7} "
+              f"{false_presses:>6} {chatter:>8}")
+    print(f"Predictive trigger fires {(baseline - mean) * 1e3:.1f} ms earlier than the threshold trigger on average")
+
+# Per-frame gesture distance of one hand in a landmark recording, computed on
+# the memory-mapped columns: Dino's thumb-to-index-PIP distance or Hill Climb's
+# thumb-to-index-tip pinch distance. Returns (timestamps, distances).
+def recording_distances(recording, label, game):
+    code = LABEL_CODES[label]
+    present = (recording.labels == code) & (np.arange(recording.max_hands) < recording.counts[:, None])
+    frames = np.flatnonzero(present.any(axis=1))
+    points = recording.points[frames, present[frames].argmax(axis=1)]
+    if game == "dino":
+        distances = np.hypot(points[:, 4, 0] - points[:, 6, 0], points[:, 4, 1] - points[:, 6, 1])
+    else:
+        distances = np.abs(points[:, 4, :2] - points[:, 8, :2]).max(axis=1)
+    return recording.timestamps[frames], distances.astype(np.float64)
+
+# A recording has no ground truth, so the plain threshold trigger is the
+# reference: each reference press is paired with the first unpaired press of
+# the other trigger from `window` seconds before it to a frame after it.
+def run_recorded_trigger_benchmark(path, game, threshold, release_threshold, lead_time, window=0.5):
+    recording = LandmarkRecording(path)
+    print(f"{len(recording)} frames ({recording.duration:.1f} s) from {path}")
+    labels = ("Right",) if game == "dino" else ("Left", "Right")
+    print(f"{'hand':<6} {'trigger':<11} {'presses':>8} {'matched':>8} {'extra':>6} {'lead ms':>8}")
+    for label in labels:
+        timestamps, distances = recording_distances(recording, label, game)
+        reference = trigger_presses(PinchTrigger(threshold), timestamps, distances)
+        configs = [
+            ("threshold", PinchTrigger(threshold)),
+            ("hysteresis", PinchTrigger(threshold, release_threshold)),
+            ("predictive", PinchTrigger(threshold, release_threshold, predictive=True, lead_time=lead_time)),
+        ]
+        for name, trigger in configs:
+            presses = trigger_presses(trigger, timestamps, distances)
+            leads = []
+            position = 0
+            for reference_time in reference:
+                while position < len(presses) and presses[position] < reference_time - window:
+                    position += 1
+                if position < len(presses) and presses[position] <= reference_time + 0.04:
+                    leads.append(reference_time - presses[position])
+                    position += 1
+            lead = float(np.mean(leads)) * 1e3 if leads else 0.0
+            print(f"{label:<6} {name:<11} {len(presses):>8} {len(leads):>8} {max(len(presses) - len(leads), 0):>6} "
+                  f"{lead:>8.1f}")
+
+# Writes the synthetic pinch trace as a landmark recording: one hand per frame
+# (both hands for Hill Climb) around a fixed pose, with the index PIP and tip
+# stacked so the thumb's offset is both the jump and the pinch distance.
+def write_synthetic_recording(path, game, episodes=300, fps=30.0, seed=0):
+    threshold = JUMP_THRESHOLD if game == "dino" else PINCH_THRESHOLD
+    timestamps, distances, _ = synthetic_pinch_trace(threshold, episodes, fps, seed=seed)
+    rng = np.random.default_rng(seed)
+    base = rng.uniform(0.35, 0.65, (21, 3))
+    base[6, :2] = base[8, :2]
+    labels = ("Right",) if game == "dino" else ("Left", "Right")
+    points = np.tile(base, (len(timestamps), 1, 1))
+    points[:, 4, 0] = base[8, 0] + distances
+    points[:, 4, 1] = base[8, 1]
+    with LandmarkRecorder(path, max_hands=len(labels)) as recorder:
+        for timestamp, hand in zip(timestamps.tolist(), points):
+            recorder.write(timestamp, [(label, hand) for label in labels])
+    return len(timestamps)
+
+# Decision-layer throughput: the recording is replayed through the game's
+# controller and a KeyDispatcher with the in-memory key backend.
+def run_replay_benchmark(path, game, repeats=3, episodes=300):
+    temporary = None
+    if path is None:
+        temporary = tempfile.NamedTemporaryFile(suffix=".lmrec", delete=False)
+        temporary.close()
+        path = temporary.name
+        frames = write_synthetic_recording(path, game, episodes)
+        print(f"Synthetic recording: {frames} frames of pinch episodes")
+    try:
+        recording = LandmarkRecording(path)
+        print(f"{len(recording)} frames, {recording.hand_count} hands, "
+              f"{os.path.getsize(path) / 1024:.0f} KB ({recording.max_hands} hand slots per frame)")
+
+        start = time.perf_counter()
+        hands = sum(len(frame_hands) for _, frame_hands in recording.iter_frames())
+        read_cost = time.perf_counter() - start
+        print(f"Reading alone: {len(recording) / read_cost:,.0f} frames/s")
+
+        print(f"{'trigger':<11} {'frames/s':>10} {'us/hand':>8} {'presses':>8} {'key events':>11}")
+        for trigger in ("threshold", "predictive"):
+            best = None
+            for _ in range(repeats):
+                backend = RecordingKeyBackend()
+                keys = KeyDispatcher(backend).start()
+                controller = GAME_CONTROLLERS[game](keys, trigger, verbose=False)
+                frames, hands, elapsed = replay(recording, controller.update)
+                keys.close()
+                if best is None or elapsed < best[0]:
+                    best = (elapsed, controller.presses, len(backend.events))
+            elapsed, presses, events = best
+            print(f"{trigger:<11} {frames / elapsed:>10,.0f} {elapsed / max(hands, 1) * 1e6:>8.1f} {presses:>8} "
+                  f"{events:>11}")
+    finally:
+        if temporary is not None:
+            os.remove(path)
+
+# Aggregate landmark throughput with 1..N worker processes reading the same
+# video, each with its own MediaPipe instance; keys go to the in-memory backend.
+def run_multicam_benchmark(video, worker_counts, game="hillclimb", max_hands=2, frames=300):
+    print(f"{video}, {frames} frames per worker, {os.cpu_count()} CPUs")
+    print(f"{'workers':>7} {'frames':>7} {'frames/s':>9} {'per worker':>11} {'age p95 ms':>11}")
+    single = None
+    for count in worker_counts:
+        keys = KeyDispatcher(RecordingKeyBackend()).start()
+        players = [Player(f"worker {number}", game, video, make_controller(game, keys, verbose=False), max_hands)
+                   for number in range(1, count + 1)]
+        run_players(players, max_hands, max_frames=frames)
+        keys.close()
+        total = sum(player.frames for player in players)
+        started = [player.first_at for player in players if player.first_at is not None]
+        if not started:
+            raise SystemExit(f"No landmarks received from {video}")
+        span = max(player.last_at for player in players if player.last_at is not None) - min(started)
+        rate = total / max(span, 1e-9)
+        single = rate if single is None else single
+        age = max(player.age.summary()["p95_ms"] for player in players)
+        print(f"{count:>7} {total:>7} {rate:>9.1f} {rate / count:>11.1f} {age:>11.1f}")
+    print(f"Speed-up over the first row: {rate / single:.2f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the gesture controllers")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    roi = subparsers.add_parser("roi", help="inference time and recall of hand-ROI tracking")
+    roi.add_argument("--video", required=True, help="recorded webcam video with hands in view")
+    roi.add_argument("--max-hands", type=int, default=1, help="1 for the Dino script, 2 for Hill Climb")
+    roi.add_argument("--padding", type=float, default=0.35, help="crop padding as a fraction of the hand size")
+    roi.add_argument("--input-size", type=int, default=192, help="longest crop side passed to MediaPipe")
+    roi.add_argument("--frames", type=int, default=None, help="stop after this many frames")
+    roi.add_argument("--tolerance", type=float, default=0.02,
+                     help="mean landmark distance (normalized) at which a hand counts as agreeing")
+
+    features = subparsers.add_parser("features", help="cost of evaluating many gesture rules per hand")
+    features.add_argument("--sizes", default="1,9,25,50", help="comma separated rule table sizes")
+    features.add_argument("--hands", type=int, default=2000, help="synthetic hands per table size")
+
+    trigger = subparsers.add_parser("trigger", help="latency gained and false presses of the predictive trigger")
+    trigger.add_argument("--threshold", type=float, default=0.05, help="press threshold (0.06 for the Dino jump)")
+    trigger.add_argument("--release-threshold", type=float, default=0.065, help="release threshold")
+    trigger.add_argument("--episodes", type=int, default=300, help="pinch episodes in the trace")
+    trigger.add_argument("--fps", type=float, default=30.0, help="camera frame rate")
+    trigger.add_argument("--noise", type=float, default=0.003, help="landmark noise (std of the distance)")
+    trigger.add_argument("--lead-time", type=float, default=0.05, help="predictive look-ahead in seconds")
+    trigger.add_argument("--recording", help="landmark recording to take the pinch distances from")
+    trigger.add_argument("--game", choices=sorted(GAME_CONTROLLERS), default="hillclimb",
+                         help="which gesture distance to read from --recording")
+
+    replay_parser = subparsers.add_parser("replay", help="decision-layer throughput on a landmark recording")
+    replay_parser.add_argument("--recording", help="landmark recording (default: a synthetic one)")
+    replay_parser.add_argument("--game", choices=sorted(GAME_CONTROLLERS), default="hillclimb",
+                               help="controller to drive")
+    replay_parser.add_argument("--repeats", type=int, default=3, help="replays per trigger, the best one counts")
+    replay_parser.add_argument("--episodes", type=int, default=300, help="pinch episodes in a synthetic recording")
+
+    multicam = subparsers.add_parser("multicam", help="throughput of one inference process per camera")
+    multicam.add_argument("--video", required=True, help="video file standing in for every camera")
+    multicam.add_argument("--workers", default="1,2,4", help="comma separated worker counts")
+    multicam.add_argument("--frames", type=int, default=300, help="frames each worker processes")
+    multicam.add_argument("--game", choices=sorted(GAME_CONTROLLERS), default="hillclimb",
+                          help="controller fed by every worker")
+
+    args = parser.parse_args()
+    if args.benchmark == "trigger" and args.recording:
+        run_recorded_trigger_benchmark(args.recording, args.game, args.threshold, args.release_threshold,
+                                       args.lead_time)
+    elif args.benchmark == "trigger":
+        run_trigger_benchmark(args.threshold, args.release_threshold, args.episodes, args.fps, args.noise,
+                              args.lead_time)
+    elif args.benchmark == "features":
+        run_features_benchmark([int(size) for size in args.sizes.split(",")], args.hands)
+    elif args.benchmark == "replay":
+        run_replay_benchmark(args.recording, args.game, args.repeats, args.episodes)
+    elif args.benchmark == "multicam":
+        run_multicam_benchmark(args.video, [int(count) for count in args.workers.split(",")], args.game,
+                               frames=args.frames)
+    elif args.benchmark == "roi":
+        run_roi_benchmark(args.video, args.max_hands, args.padding, args.input_size, args.frames,
+                          args.tolerance)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,428 @@
+# Module: Shared helpers for the gesture controllers
+
+# Description:
+# ------------
+# Building blocks used by Gesture_control_for_dino_game.py and
+# gesture_control_for_Hillclimbracing.py.
+#
+# - LatestFrameCapture: reads the webcam on its own thread and keeps only the
+#   newest frame (with the time it was grabbed) in a single-slot buffer, so
+#   inference always runs on the freshest image instead of frames that queued
+#   up in the driver while MediaPipe was busy.
+# - HandROITracker: wraps `mp_hands.Hands` and, once a hand has been found, runs
+#   inference only on a padded, downscaled crop around the previous frame's
+#   landmarks. Landmarks are mapped back to full-frame coordinates, so gesture
+#   functions and drawing work unchanged. Falls back to full-frame detection
+#   when the hand is lost. Crops go to a second, static_image_mode `Hands`
+#   instance: the tracking instance reuses the previous frame's normalized
+#   landmarks as its next ROI, which is meaningless once full frames and
+#   moving crops of different sizes take turns on it.
+# - PreviewRenderer: draws landmarks and shows the preview window on its own
+#   thread at a capped frame rate, from a snapshot of the latest frame and
+#   landmarks, so drawing and cv2.imshow/waitKey never delay key events.
+# - PinchTrigger: press/release decision for a pinch distance with separate
+#   press and release thresholds (hysteresis) and an optional predictive mode
+#   that fires early when the distance velocity says the pinch is closing.
+# - StageProfiler: per-stage latency histograms for the whole pipeline
+#   (capture, flip, cvtColor, inference, gestures, key dispatch, drawing,
+#   display). Recording a sample is a bisect and a counter increment under a
+#   lock shared with the window swap and summaries; the histograms roll over
+#   every few seconds and can be printed, dumped as JSON or drawn as an overlay
+#   on the preview. NullProfiler has the same methods and does nothing, so
+#   profiling can be switched off without touching the loop.
+
+import json
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+import cv2
+import numpy as np
+
+class LatestFrameCapture:
+    def __init__(self, cap):
+        self.cap = cap
+        self.condition = threading.Condition()
+        self.frame = None
+        self.timestamp = None
+        self.sequence = 0
+        self.consumed = 0
+        self.dropped = 0
+        self.failed = False
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="frame-capture", daemon=True)
+        self.thread.start()
+        return self
+
+    def _run(self):
+        while self.running:
+            ret, frame = self.cap.read()
+            grabbed_at = time.perf_counter()
+            with self.condition:
+                if not ret:
+                    self.failed = True
+                    self.condition.notify_all()
+                    return
+                if self.sequence > self.consumed:
+                    self.dropped += 1
+                self.frame = frame
+                self.timestamp = grabbed_at
+                self.sequence += 1
+                self.condition.notify_all()
+
+    # Wait for a frame newer than the last one returned.
+    # Returns (ok, frame, grabbed_at) where grabbed_at is a time.perf_counter() value.
+    def read(self, timeout=None):
+        with self.condition:
+            self.condition.wait_for(lambda: self.sequence > self.consumed or self.failed or not self.running,
+                                    timeout)
+            if self.sequence == self.consumed:
+                return False, None, None
+            self.consumed = self.sequence
+            return True, self.frame, self.timestamp
+
+    def stop(self, timeout=1.0):
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+class HandROITracker:
+    # `hands` sees only full frames; `crop_hands` should be built with
+    # static_image_mode=True so each crop is detected on its own
+    def __init__(self, hands, crop_hands, padding=0.35, input_size=192, redetect_interval=30):
+        self.hands = hands
+        self.crop_hands = crop_hands
+        self.padding = padding
+        self.input_size = input_size
+        self.redetect_interval = redetect_interval
+        self.bbox = None
+        self.frames_since_full = 0
+        self.roi_runs = 0
+        self.full_runs = 0
+        self.fallbacks = 0
+
+    def process(self, rgb):
+        height, width = rgb.shape[:2]
+        result = None
+        if self.bbox is not None and self.frames_since_full < self.redetect_interval:
+            result = self._process_crop(rgb, width, height)
+            if result is None:
+                self.fallbacks += 1
+        if result is None:
+            result = self.hands.process(rgb)
+            self.full_runs += 1
+            self.frames_since_full = 0
+        else:
+            self.roi_runs += 1
+            # Only a periodic full-frame pass can find hands outside the crop,
+            # so one runs every redetect_interval frames even while tracking
+            self.frames_since_full += 1
+        self.bbox = self._bounding_box(result, width, height)
+        return result
+
+    def _process_crop(self, rgb, width, height):
+        x0, y0, x1, y1 = self.bbox
+        crop = rgb[y0:y1, x0:x1]
+        scale = self.input_size / max(x1 - x0, y1 - y0)
+        if scale < 1:
+            crop = cv2.resize(crop, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        else:
+            crop = np.ascontiguousarray(crop)
+        result = self.crop_hands.process(crop)
+        if not result.multi_hand_landmarks:
+            return None
+
+        # Crop-normalized -> full-frame-normalized coordinates
+        crop_width, crop_height = x1 - x0, y1 - y0
+        for hand_landmarks in result.multi_hand_landmarks:
+            for landmark in hand_landmarks.landmark:
+                landmark.x = (landmark.x * crop_width + x0) / width
+                landmark.y = (landmark.y * crop_height + y0) / height
+                landmark.z = landmark.z * crop_width / width
+        return result
+
+    # Padded square around all detected hands, in full-frame pixels
+    def _bounding_box(self, result, width, height):
+        if not result.multi_hand_landmarks:
+            return None
+        xs = [landmark.x for hand in result.multi_hand_landmarks for landmark in hand.landmark]
+        ys = [landmark.y for hand in result.multi_hand_landmarks for landmark in hand.landmark]
+        center_x = (min(xs) + max(xs)) / 2 * width
+        center_y = (min(ys) + max(ys)) / 2 * height
+        side = max((max(xs) - min(xs)) * width, (max(ys) - min(ys)) * height) * (1 + 2 * self.padding)
+        half = max(side, 32) / 2
+        x0, x1 = max(0, int(center_x - half)), min(width, int(center_x + half))
+        y0, y1 = max(0, int(center_y - half)), min(height, int(center_y + half))
+        if x1 - x0 < 16 or y1 - y0 < 16:
+            return None
+        return x0, y0, x1, y1
+
+class PreviewRenderer:
+    def __init__(self, window_name, draw, max_fps=15, profiler=None, overlay=False):
+        self.window_name = window_name
+        self.draw = draw
+        self.interval = 1.0 / max_fps
+        self.profiler = profiler if profiler is not None else NullProfiler()
+        self.overlay = overlay
+        self.lock = threading.Lock()
+        self.snapshot = None
+        self.submitted = 0
+        self.rendered = 0
+        self.quit_requested = False
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="preview-renderer", daemon=True)
+        self.thread.start()
+        return self
+
+    # Hand over a frame and its landmarks; the caller must not modify them afterwards.
+    # Snapshots that arrive faster than max_fps simply replace each other.
+    def submit(self, frame, hand_landmarks):
+        with self.lock:
+            self.snapshot = (frame, hand_landmarks)
+            self.submitted += 1
+
+    def _run(self):
+        while self.running:
+            started = time.perf_counter()
+            with self.lock:
+                snapshot, self.snapshot = self.snapshot, None
+            if snapshot is not None:
+                frame, hand_landmarks = snapshot
+                self.draw(frame, hand_landmarks)
+                if self.overlay:
+                    self.profiler.draw_overlay(frame)
+                drawn = time.perf_counter()
+                self.profiler.record("draw", drawn - started)
+                cv2.imshow(self.window_name, frame)
+                self.rendered += 1
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                self.quit_requested = True
+            if snapshot is not None:
+                self.profiler.record("display", time.perf_counter() - drawn)
+            remaining = self.interval - (time.perf_counter() - started)
+            if remaining > 0:
+                time.sleep(remaining)
+        cv2.destroyWindow(self.window_name)
+
+    def stop(self, timeout=1.0):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+# Press when the distance falls below `press_threshold`, release only once it
+# rises above `release_threshold`, so noise at the boundary cannot chatter.
+# In predictive mode the velocity is fitted over the last `history` samples and
+# the trigger also fires when the pinch is closing faster than `min_speed`
+# (distance units per second) and is predicted to cross the press threshold
+# within `lead_time` seconds. Prediction is skipped once the latest step closes
+# slower than the fitted velocity: fingers that decelerate above the threshold
+# are usually a near miss rather than a pinch. A predicted press that is not confirmed by a real
+# crossing within `confirm_time` seconds is released and counted as false.
+class PinchTrigger:
+    def __init__(self, press_threshold, release_threshold=None, predictive=False, lead_time=0.05,
+                 history=4, min_speed=0.3, confirm_time=0.15):
+        self.press_threshold = press_threshold
+        self.release_threshold = release_threshold if release_threshold is not None else press_threshold
+        self.predictive = predictive
+        self.lead_time = lead_time
+        self.min_speed = min_speed
+        self.confirm_time = confirm_time
+        self.samples = deque(maxlen=history)
+        self.pressed = False
+        self.predicted_at = None
+        self.presses = 0
+        self.early_presses = 0
+        self.false_presses = 0
+
+    def reset(self):
+        self.samples.clear()
+
+    def velocity(self):
+        count = len(self.samples)
+        mean_t = sum(t for t, _ in self.samples) / count
+        mean_d = sum(d for _, d in self.samples) / count
+        spread = sum((t - mean_t) ** 2 for t, _ in self.samples)
+        if spread <= 0:
+            return 0.0
+        return sum((t - mean_t) * (d - mean_d) for t, d in self.samples) / spread
+
+    def update(self, distance, timestamp):
+        self.samples.append((timestamp, distance))
+        if self.pressed:
+            if self.predicted_at is not None:
+                if distance < self.press_threshold:
+                    self.predicted_at = None
+                elif timestamp - self.predicted_at > self.confirm_time:
+                    self.pressed = False
+                    self.predicted_at = None
+                    self.false_presses += 1
+            elif distance > self.release_threshold:
+                self.pressed = False
+        elif distance < self.press_threshold:
+            self.pressed = True
+            self.presses += 1
+        elif self.predictive and len(self.samples) >= 3:
+            velocity = self.velocity()
+            previous_time, previous_distance = self.samples[-2]
+            step_velocity = (distance - previous_distance) / max(timestamp - previous_time, 1e-6)
+            if (velocity < -self.min_speed and step_velocity <= velocity and
+                    distance + velocity * self.lead_time < self.press_threshold):
+                self.pressed = True
+                self.predicted_at = timestamp
+                self.presses += 1
+                self.early_presses += 1
+        return self.pressed
+
+# Upper bounds of the histogram buckets: 10 us to about 2 s, 25% apart
+HISTOGRAM_BOUNDS = [1e-5 * 1.25 ** i for i in range(56)]
+
+class LatencyHistogram:
+    def __init__(self):
+        self.counts = [0] * (len(HISTOGRAM_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.counts[bisect_left(HISTOGRAM_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other):
+        merged = LatencyHistogram()
+        merged.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        merged.count = self.count + other.count
+        merged.total = self.total + other.total
+        merged.max = max(self.max, other.max)
+        return merged
+
+    # Upper bound of the bucket holding the given fraction of samples
+    def percentile(self, fraction):
+        if not self.count:
+            return 0.0
+        needed = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= needed:
+                return min(HISTOGRAM_BOUNDS[index] if index < len(HISTOGRAM_BOUNDS) else self.max, self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count * 1e3 if self.count else 0.0,
+            "p50_ms": self.percentile(0.50) * 1e3,
+            "p95_ms": self.percentile(0.95) * 1e3,
+            "p99_ms": self.percentile(0.99) * 1e3,
+            "max_ms": self.max * 1e3,
+        }
+
+# Call start() at the top of each frame and lap(stage) after each stage; lap
+# records the time since the previous start/lap. Other threads (preview, key
+# sender) use record(stage, seconds), and the preview thread reads summary() for
+# the overlay. The window swap in start(), record() and summary() share one lock,
+# so a sample is never added to a histogram that is being swapped out or merged.
+# Samples go into the current histogram of each stage; every `window` seconds the
+# current histograms become the previous ones, so the summaries cover the last
+# one to two windows. set_count(name, value) attaches a running total (e.g.
+# frames dropped by LatestFrameCapture) that is printed and dumped with the stages.
+class StageProfiler:
+    enabled = True
+
+    def __init__(self, window=10.0):
+        self.window = window
+        self.lock = threading.Lock()
+        self.current = {}
+        self.previous = {}
+        self.counts = {}
+        self.window_start = time.perf_counter()
+        self.last = self.window_start
+
+    def start(self):
+        now = time.perf_counter()
+        if now - self.window_start >= self.window:
+            with self.lock:
+                self.previous, self.current = self.current, {}
+            self.window_start = now
+        self.last = now
+        return now
+
+    def lap(self, stage):
+        now = time.perf_counter()
+        self.record(stage, now - self.last)
+        self.last = now
+        return now
+
+    def record(self, stage, seconds):
+        with self.lock:
+            histogram = self.current.get(stage)
+            if histogram is None:
+                histogram = self.current[stage] = LatencyHistogram()
+            histogram.add(seconds)
+
+    def set_count(self, name, value):
+        self.counts[name] = value
+
+    def summary(self):
+        stages = {}
+        with self.lock:
+            for stage in list(self.previous) + [name for name in self.current if name not in self.previous]:
+                histogram = self.current.get(stage, LatencyHistogram())
+                if stage in self.previous:
+                    histogram = histogram.merge(self.previous[stage])
+                stages[stage] = histogram.summary()
+        return stages
+
+    def to_json(self):
+        return json.dumps({"window_s": self.window, "stages": self.summary(), "counts": dict(self.counts)},
+                          indent=2)
+
+    def dump_json(self, path):
+        with open(path, "w") as file:
+            file.write(self.to_json())
+
+    def format_line(self):
+        line = " | ".join(f"{stage} {stats['p50_ms']:.1f}/{stats['p95_ms']:.1f}"
+                          for stage, stats in self.summary().items()) + " (p50/p95 ms)"
+        return "".join([line] + [f" | {name} {value}" for name, value in dict(self.counts).items()])
+
+    def draw_overlay(self, frame):
+        rows = [f"{stage:<10} {stats['p50_ms']:6.1f} {stats['p95_ms']:6.1f} ms"
+                for stage, stats in self.summary().items()]
+        rows += [f"{name:<10} {value:>6}" for name, value in dict(self.counts).items()]
+        for row, text in enumerate(rows):
+            cv2.putText(frame, text, (10, 20 + 18 * row), cv2.FONT_HERSHEY_SIMPLEX, 0.45, (0, 255, 0), 1)
+
+class NullProfiler:
+    enabled = False
+
+    def start(self):
+        return 0.0
+
+    def lap(self, stage):
+        return 0.0
+
+    def record(self, stage, seconds):
+        pass
+
+    def set_count(self, name, value):
+        pass
+
+    def summary(self):
+        return {}
+
+    def draw_overlay(self, frame):
+        pass
@@ -17,6 +17,40 @@
 #       - Right hand pinch →  Press 'right arrow' (Gas)
 # 4. Releasing the gesture automatically releases the respective key.
 # 5. The webcam feed displays real-time hand landmarks for debugging and visualization.
+# 6. Frames are read on a separate capture thread that keeps only the newest frame,
+#    so inference never acts on stale images; frame age at inference is reported.
+# 7. With --track-roi, inference runs on a small crop around the hands found in the
+#    previous frame, falling back to the full frame when a hand is lost. Crops go
+#    to their own static-image Hands instance, so the full-frame tracker's state
+#    is never fed crop coordinates.
+# 8. The preview window is rendered on its own thread at --preview-fps, off the
+#    path between detecting a gesture and pressing the key; --headless skips it.
+# 9. Gestures are evaluated by the vectorized rule engine in landmark_features.py;
+#    its "thumb_index_pinch" rule is thumb tip (4) and index tip (8) within
+#    0.05 of each other on both axes.
+# 10. Key events go through key_dispatch.py: a sender thread issues them without
+#     pyautogui's built-in pause, releases held keys on exit and reports the
+#     gesture-to-key-event latency (--key-backend recording for dry runs).
+# 11. By default (--trigger hysteresis) a key is pressed below the pinch
+#     threshold and released only above --release-threshold, so it does not
+#     chatter at the boundary. --trigger predictive also presses a frame or
+#     more before the threshold is crossed on a fast-closing pinch; --trigger
+#     threshold decides every frame on its own.
+# 12. Per-stage latency (capture, flip, cvtColor, inference, gestures, key
+#     dispatch, drawing, display) is kept in rolling histograms: --profile log
+#     prints them every few seconds, json dumps them to --profile-json, overlay
+#     draws them on the preview and off disables profiling. Each report also
+#     gives the number of frames the capture thread replaced before inference
+#     got to them ("dropped").
+# 13. The decision from landmarks to key events lives in game_controllers.py
+#     (HillClimbController). --record PATH saves every frame's landmarks to a
+#     compact binary file that landmark_recording.py replays through the same
+#     controller without a camera or MediaPipe.
+# 14. With --broker, frames come from camera_broker.py, which owns the webcam,
+#     so Auto_brightness_adjust.py or the Dino script can use it at the same time.
+# 15. MediaPipe is imported and its model loaded on a background thread while
+#     the webcam opens; the time to the first processed frame is printed, and
+#     --startup-report breaks it down by stage and import.
 #
 # Key Features:
 # -------------
@@ -37,7 +71,7 @@
 # ---------
 # - Right hand pinch  → Gas (Right arrow key)
 # - Left hand pinch   → Brake (Left arrow key)
-# - Press 'q' to exit the program
+# - Press 'q' to exit the program (Ctrl+C when running with --headless)
 #
 # Live Demo:
 # ----------
@@ -45,79 +79,167 @@
 # https://www.linkedin.com/posts/chenigumsaicharan_python-opencv-mediapipe-ugcPost-7374726023625498624-p0I7
 
 print("Script started...")
-import cv2
-import mediapipe as mp
-import pyautogui
+from staged_startup import BackgroundTask, startup
+import argparse
+import time
+cv2 = startup.import_module("cv2")
+
+from key_dispatch import KEY_BACKENDS, KeyDispatcher, make_key_backend
+from camera_broker import DEFAULT_ADDRESS, BrokerFrameSource, parse_address
+from game_controllers import TRIGGER_MODES, HillClimbController
+from gesture_common import HandROITracker, LatestFrameCapture, NullProfiler, PreviewRenderer, StageProfiler
+from landmark_recording import LandmarkRecorder
 
 print("Starting hand control program...")
 
-# Initialize Mediapipe Hands
-mp_hands = mp.solutions.hands
-hands = mp_hands.Hands(max_num_hands=2)
-mp_draw = mp.solutions.drawing_utils
-
-# Function to detect thumb and index finger pinch
-def is_thumb_index_pinch(landmarks):
-    thumb_tip = landmarks[4]
-    index_finger_tip = landmarks[8]
-    if abs(thumb_tip.x - index_finger_tip.x) < 0.05 and abs(thumb_tip.y - index_finger_tip.y) < 0.05:
-        return True
-    return False
-
-# Start the webcam capture
-cap = cv2.VideoCapture(0)
-if not cap.isOpened():
-    print("Webcam not accessible")
-    exit()
-
-print("Webcam successfully opened")
-
-gas_pressed = False
-brake_pressed = False
-
-while True:
-    ret, frame = cap.read()
-    if not ret:
-        print("Failed to grab frame")
-        break
+# Mediapipe Hands, set up by load_hands() while the webcam opens
+mp_hands = None
+hands = None
+mp_draw = None
+
+def load_hands():
+    global mp_hands, hands, mp_draw
+    mp = startup.import_module("mediapipe")
+    mp_hands = mp.solutions.hands
+    mp_draw = mp.solutions.drawing_utils
+    hands = mp_hands.Hands(max_num_hands=2)
+    startup.mark("model loaded")
+    return hands
+
+def draw_hands(frame, hand_landmarks_list):
+    for hand_landmarks in hand_landmarks_list:
+        mp_draw.draw_landmarks(frame, hand_landmarks, mp_hands.HAND_CONNECTIONS)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Control Hill Climb Racing gas and brake with hand pinches.")
+    parser.add_argument("--track-roi", action="store_true",
+                        help="run inference on a crop around the previous frame's hand instead of the full frame")
+    parser.add_argument("--headless", action="store_true", help="do not show the preview window")
+    parser.add_argument("--preview-fps", type=float, default=15, help="maximum preview window frame rate")
+    parser.add_argument("--key-backend", choices=sorted(KEY_BACKENDS), default="pyautogui",
+                        help="where key events go; 'recording' only records them")
+    parser.add_argument("--trigger", choices=TRIGGER_MODES, default="hysteresis",
+                        help="'hysteresis' releases only above --release-threshold, 'threshold' decides "
+                             "frame by frame, 'predictive' also fires early on a closing pinch")
+    parser.add_argument("--release-threshold", type=float, default=0.065,
+                        help="hysteresis and predictive triggers: pinch distance above which a key is released")
+    parser.add_argument("--profile", choices=["off", "log", "json", "overlay"], default="log",
+                        help="per-stage latency: print it, dump it as JSON, draw it on the preview, or disable it")
+    parser.add_argument("--profile-json", default="hillclimb_profile.json", help="file written by --profile json")
+    parser.add_argument("--record", metavar="PATH",
+                        help="record every frame's hand landmarks for replay with landmark_recording.py")
+    parser.add_argument("--broker", nargs="?", type=parse_address, const=DEFAULT_ADDRESS, metavar="HOST:PORT",
+                        help="read frames from camera_broker.py instead of opening the webcam")
+    parser.add_argument("--startup-report", action="store_true",
+                        help="print the time to each startup stage and every timed import")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    # The MediaPipe import and model load run while the webcam opens
+    model = BackgroundTask(load_hands, name="mediapipe-init")
+    # Start the webcam capture
+    if args.broker:
+        # Frames come from camera_broker.py, which may be serving other programs too
+        cap = BrokerFrameSource(args.broker, "hillclimb")
     else:
-        print("Frame grabbed")
-
-    frame = cv2.flip(frame, 1)
-    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    result = hands.process(rgb_frame)
-
-    if result.multi_hand_landmarks:
-        for hand_landmarks, hand_info in zip(result.multi_hand_landmarks, result.multi_handedness):
-            mp_draw.draw_landmarks(frame, hand_landmarks, mp_hands.HAND_CONNECTIONS)
-            hand_label = hand_info.classification[0].label
-
-            if is_thumb_index_pinch(hand_landmarks.landmark):
-                if hand_label == "Left" and not brake_pressed:
-                    print("Brake pressed")
-                    pyautogui.keyDown('left')
-                    brake_pressed = True
-                elif hand_label == "Right" and not gas_pressed:
-                    print("Gas pressed")
-                    pyautogui.keyDown('right')
-                    gas_pressed = True
-            else:
-                if hand_label == "Left" and brake_pressed:
-                    print("Brake released")
-                    pyautogui.keyUp('left')
-                    brake_pressed = False
-                if hand_label == "Right" and gas_pressed:
-                    print("Gas released")
-                    pyautogui.keyUp('right')
-                    gas_pressed = False
-
-    cv2.imshow("Hill Climb Racing Control", frame)
-
-    if cv2.waitKey(1) & 0xFF == ord('q'):
+        cap = cv2.VideoCapture(0)
+    if not cap.isOpened():
+        print("Webcam not accessible")
+        exit()
+    startup.mark("camera open")
+
+    print("Webcam successfully opened")
+    capture = LatestFrameCapture(cap).start()
+
+    profiler = NullProfiler() if args.profile == "off" else StageProfiler()
+    keys = KeyDispatcher(make_key_backend(args.key_backend), profiler=profiler).start()
+    renderer = None
+    if not args.headless:
+        renderer = PreviewRenderer("Hill Climb Racing Control", draw_hands, args.preview_fps, profiler,
+                                   overlay=args.profile == "overlay").start()
+
+    controller = HillClimbController(keys, args.trigger, args.release_threshold, profiler=profiler)
+    recorder = LandmarkRecorder(args.record, max_hands=2) if args.record else None
+    model.result()
+    detector = hands
+    if args.track_roi:
+        crop_hands = mp_hands.Hands(static_image_mode=True, max_num_hands=2)
+        detector = HandROITracker(hands, crop_hands)
+    first_frame = True
+    last_report = time.perf_counter()
+
+    try:
+        while True:
+            frame_start = profiler.start()
+            ret, frame, grabbed_at = capture.read()
+            if not ret:
+                print("Failed to grab frame")
+                break
+            profiler.lap("capture")
+            profiler.record("frame_age", time.perf_counter() - grabbed_at)
+
+            frame = cv2.flip(frame, 1)
+            profiler.lap("flip")
+            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            profiler.lap("cvtColor")
+            result = detector.process(rgb_frame)
+            profiler.lap("inference")
+            if first_frame:
+                first_frame = False
+                startup.mark("first frame")
+                if args.startup_report:
+                    startup.print_report()
+                else:
+                    print(f"First frame processed {startup.stage_time('first frame') * 1000:.0f} ms after start")
+
+            if result.multi_hand_landmarks:
+                for hand_landmarks, hand_info in zip(result.multi_hand_landmarks, result.multi_handedness):
+                    hand_label = hand_info.classification[0].label
+                    # Without a recording only the landmarks the controller's rule reads are copied
+                    points = controller.engine.load(hand_landmarks.landmark, only_used=recorder is None)
+                    if recorder is not None:
+                        recorder.add_hand(hand_label, points)
+                    controller.update(hand_label, points, grabbed_at)
+            if recorder is not None:
+                recorder.end_frame(grabbed_at)
+
+            if renderer is not None:
+                renderer.submit(frame, result.multi_hand_landmarks or [])
+                profiler.lap("preview")
+            if profiler.enabled:
+                profiler.record("loop", time.perf_counter() - frame_start)
+
+                profiler.set_count("dropped", capture.dropped)
+                if time.perf_counter() - last_report >= 5:
+                    last_report = time.perf_counter()
+                    if args.profile == "log":
+                        print(profiler.format_line())
+                    elif args.profile == "json":
+                        profiler.dump_json(args.profile_json)
+
+            if renderer is not None and renderer.quit_requested:
+                print("Exiting...")
+                break
+    except KeyboardInterrupt:
         print("Exiting...")
-        break
-
-cap.release()
-cv2.destroyAllWindows()
-print("Program ended.")
-
+    finally:
+        for line in controller.trigger_report():
+            print(line)
+        if recorder is not None:
+            recorder.close()
+            print(f"Recorded {recorder.frames} frames to {args.record}")
+        keys.close()
+        if renderer is not None:
+            renderer.stop()
+        capture.stop()
+        cap.release()
+        profiler.set_count("dropped", capture.dropped)
+        if args.profile == "json":
+            profiler.dump_json(args.profile_json)
+        elif profiler.enabled:
+            print(profiler.format_line())
+    print("Program ended.")
+
+if __name__ == "__main__":
+    main()
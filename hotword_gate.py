@@ -0,0 +1,393 @@
+# Module: Local Voice-Activity and Hotword Gate for the Voice Assistant
+
+# Description:
+# ------------
+# A streaming front end for the microphone that decides locally which audio is
+# worth sending to Google Speech Recognition. The old loop recalibrated for
+# ambient noise (about 1 s) on every iteration and sent every utterance to
+# recognize_google just to look for "hello windows".
+#
+# How It Works:
+# -------------
+# 1. Audio is read as short raw frames (30 ms of 16 kHz 16-bit mono) from the
+#    microphone or from a WAV file standing in for it.
+# 2. NoiseFloor tracks the background level incrementally from non-speech
+#    frames (quick to follow a quieter room, slow to follow a louder one), and
+#    moves up to a low percentile of the last ~10 s of all frames when noise
+#    rises above the speech threshold. It is saved to a small JSON file, so a
+#    restart does not need a calibration pause either.
+# 3. VoiceActivityDetector marks a frame as speech when its RMS level is well
+#    above the noise floor, starts an utterance after a few speech frames (with
+#    some pre-roll so the first syllable is kept) and ends it after a short
+#    silence.
+# 4. Each finished utterance goes through the hotword stages in order, cheapest
+#    first; any stage can reject it:
+#       - DurationFilter: "hello windows" takes roughly 0.4-2 s to say.
+#       - SphinxHotword: PocketSphinx keyword spotting, fully local, used when
+#         pocketsphinx is installed.
+#       - RecognizerHotword: otherwise, recognize_google on the utterances that
+#         passed the duration filter.
+# 5. After the hotword fires, next_utterance() hands the following utterances
+#    to the full recognizer as speech_recognition AudioData.
+#
+# Times (utterance start/end, timeouts) are in seconds of audio read, so WAV
+# replays behave like the microphone without waiting in real time.
+
+import json
+import math
+import time
+import wave
+from array import array
+from collections import deque
+
+SAMPLE_RATE = 16000
+FRAME_MS = 30
+
+def frame_rms(frame):
+    samples = array("h", frame)
+    if not samples:
+        return 0.0
+    return math.sqrt(sum(sample * sample for sample in samples) / len(samples))
+
+class MicrophoneFrames:
+    def __init__(self, device_index=None, rate=SAMPLE_RATE, frame_ms=FRAME_MS):
+        import speech_recognition as sr
+        self.rate = rate
+        self.frame_samples = rate * frame_ms // 1000
+        self.microphone = sr.Microphone(device_index=device_index, sample_rate=rate, chunk_size=self.frame_samples)
+        self.source = None
+
+    def read(self):
+        if self.source is None:
+            self.source = self.microphone.__enter__()
+        return self.source.stream.read(self.frame_samples)
+
+    def close(self):
+        if self.source is not None:
+            self.microphone.__exit__(None, None, None)
+            self.source = None
+
+# 16-bit WAV file read frame by frame; the first channel of stereo files is used.
+# With realtime=True each frame is returned at the pace a microphone would, and
+# with max_lag a reader more than max_lag seconds behind loses the audio in
+# between, as a microphone's buffer overflows when nobody reads it.
+class WavFrames:
+    def __init__(self, path, frame_ms=FRAME_MS, realtime=False, max_lag=None):
+        self.wav = wave.open(path, "rb")
+        if self.wav.getsampwidth() != 2:
+            raise ValueError(f"{path}: expected 16-bit samples")
+        self.rate = self.wav.getframerate()
+        self.channels = self.wav.getnchannels()
+        self.frame_samples = self.rate * frame_ms // 1000
+        self.realtime = realtime
+        self.max_lag = max_lag
+        self.next_at = None
+        self.dropped = 0
+
+    def read(self):
+        frame_seconds = self.frame_samples / self.rate
+        if self.realtime and self.max_lag is not None and self.next_at is not None:
+            late = time.perf_counter() - self.next_at - self.max_lag
+            if late > 0:
+                skipped = int(late / frame_seconds) + 1
+                self.wav.readframes(skipped * self.frame_samples)
+                self.next_at += skipped * frame_seconds
+                self.dropped += skipped
+        data = self.wav.readframes(self.frame_samples)
+        if len(data) < self.frame_samples * 2 * self.channels:
+            return b""
+        if self.channels > 1:
+            data = array("h", data)[::self.channels].tobytes()
+        if self.realtime:
+            now = time.perf_counter()
+            self.next_at = now if self.next_at is None else self.next_at
+            if self.next_at > now:
+                time.sleep(self.next_at - now)
+            self.next_at += frame_seconds
+        return data
+
+    # Seconds into the file, including dropped audio
+    @property
+    def position(self):
+        return self.wav.tell() / self.rate
+
+    def close(self):
+        self.wav.close()
+
+class NoiseFloor:
+    # window/check_every are in frames (about 10 s and 1 s of 30 ms frames)
+    def __init__(self, rms=None, rise=0.02, fall=0.2, path=None, window=333, percentile=0.1, check_every=33):
+        self.rms = rms
+        self.rise = rise
+        self.fall = fall
+        self.path = path
+        self.updates = 0
+        self.recent = deque(maxlen=window)
+        self.percentile = percentile
+        self.check_every = check_every
+        self.observed = 0
+        self.raises = 0
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        rms = None
+        try:
+            with open(path) as file:
+                rms = float(json.load(file)["rms"])
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        return cls(rms, path=path, **kwargs)
+
+    def save(self):
+        if self.path is None or self.rms is None:
+            return
+        try:
+            with open(self.path, "w") as file:
+                json.dump({"rms": self.rms, "saved_at": time.time()}, file)
+        except OSError as e:
+            print(f"Could not save noise floor: {e}")
+
+    # Fold in a non-speech frame's level
+    def update(self, rms):
+        if self.rms is None:
+            self.rms = rms
+        else:
+            self.rms += (self.fall if rms < self.rms else self.rise) * (rms - self.rms)
+        self.updates += 1
+
+    # Every frame's level, speech or not. update() only sees frames below the
+    # speech threshold, so noise that rises above it (or a stale floor loaded
+    # from a quiet room) would count as speech forever; when even the quietest
+    # tenth of the last few seconds is above the floor, the floor moves up to it.
+    def observe(self, rms):
+        self.recent.append(rms)
+        self.observed += 1
+        if self.observed % self.check_every or len(self.recent) < self.recent.maxlen:
+            return
+        low = sorted(self.recent)[int(self.percentile * len(self.recent))]
+        if self.rms is None or low > self.rms:
+            self.rms = low
+            self.updates += 1
+            self.raises += 1
+
+class Utterance:
+    def __init__(self, data, rate, start, end):
+        self.data = data
+        self.rate = rate
+        self.start = start
+        self.end = end
+        self.detected_at = time.perf_counter()
+        # Wall-clock end of speech; the gate moves it back by the audio read since
+        self.speech_ended_at = self.detected_at
+
+    @property
+    def duration(self):
+        return self.end - self.start
+
+    # Wall-clock start of speech, on the same clock as speech_ended_at
+    @property
+    def speech_started_at(self):
+        return self.speech_ended_at - self.duration
+
+    def to_audio_data(self):
+        import speech_recognition as sr
+        return sr.AudioData(self.data, self.rate, 2)
+
+class VoiceActivityDetector:
+    def __init__(self, noise_floor, ratio=3.0, min_rms=150.0, start_frames=3, end_silence=0.5,
+                 pre_roll=0.3, max_duration=10.0, frame_ms=FRAME_MS):
+        self.noise_floor = noise_floor
+        self.ratio = ratio
+        self.min_rms = min_rms
+        self.start_frames = start_frames
+        self.end_frames = max(1, int(end_silence * 1000 / frame_ms))
+        self.max_frames = int(max_duration * 1000 / frame_ms)
+        self.pre_roll = deque(maxlen=max(start_frames, int(pre_roll * 1000 / frame_ms)))
+        self.frame_seconds = frame_ms / 1000
+        self.speech_run = 0
+        self.silence_run = 0
+        self.frames = None
+        self.start = None
+
+    def is_speech(self, rms):
+        floor = self.noise_floor.rms if self.noise_floor.rms is not None else 0.0
+        return rms > max(floor * self.ratio, self.min_rms)
+
+    @property
+    def in_utterance(self):
+        return self.frames is not None
+
+    # Feed one frame read at stream time `now` (its end); returns the
+    # finished utterance's (frames, start, end) or None
+    def feed(self, frame, now):
+        rms = frame_rms(frame)
+        self.noise_floor.observe(rms)
+        speech = self.is_speech(rms)
+        if self.frames is None:
+            if not speech:
+                self.noise_floor.update(rms)
+                self.speech_run = 0
+                self.pre_roll.append(frame)
+                return None
+            self.speech_run += 1
+            self.pre_roll.append(frame)
+            if self.speech_run < self.start_frames:
+                return None
+            self.frames = list(self.pre_roll)
+            # The utterance starts at the first speech frame; the pre-roll is only kept as audio
+            self.start = now - self.speech_run * self.frame_seconds
+            self.pre_roll.clear()
+            self.silence_run = 0
+            return None
+
+        self.frames.append(frame)
+        self.silence_run = 0 if speech else self.silence_run + 1
+        if self.silence_run < self.end_frames and len(self.frames) < self.max_frames:
+            return None
+        frames, start = self.frames, self.start
+        # Trailing silence is not part of the utterance
+        if self.silence_run:
+            frames = frames[:-self.silence_run]
+        self.frames = None
+        self.speech_run = 0
+        return frames, start, now - self.silence_run * self.frame_seconds
+
+# Hotword stages: accept(utterance) returns True to pass it on
+class DurationFilter:
+    name = "duration"
+
+    def __init__(self, min_duration=0.4, max_duration=2.0):
+        self.min_duration = min_duration
+        self.max_duration = max_duration
+
+    def accept(self, utterance):
+        return self.min_duration <= utterance.duration <= self.max_duration
+
+# speech_recognition takes a keyword sensitivity between 0 and 1 and passes
+# PocketSphinx the detection threshold 1e(100 * sensitivity - 110): 0.5 is
+# 1e-60, 0.7 is 1e-40, 0.9 is 1e-20. A higher sensitivity means a stricter
+# threshold (fewer detections). On 16 synthetic "hello windows" clips (4
+# voices, 2 speaking rates, with and without noise) and 160 clips of other
+# phrases, 0.5 and below detected 8 hotwords and let 19 other phrases through,
+# 0.7 detected 7 and let 1 through, and 0.9 detected only 2.
+HOTWORD_SENSITIVITY = 0.7
+
+class SphinxHotword:
+    name = "sphinx"
+
+    def __init__(self, recognizer, phrase="hello windows", sensitivity=HOTWORD_SENSITIVITY):
+        if not 0 <= sensitivity <= 1:
+            raise ValueError(f"Keyword sensitivity must be between 0 and 1, got {sensitivity}")
+        # Raises ImportError without pocketsphinx, so callers can fall back
+        import pocketsphinx
+        self.recognizer = recognizer
+        self.keywords = [(phrase, sensitivity)]
+
+    def accept(self, utterance):
+        import speech_recognition as sr
+        try:
+            self.recognizer.recognize_sphinx(utterance.to_audio_data(), keyword_entries=self.keywords)
+        except sr.UnknownValueError:
+            return False
+        return True
+
+class RecognizerHotword:
+    name = "recognizer"
+
+    def __init__(self, recognize, phrase="hello windows"):
+        self.recognize = recognize
+        self.phrase = phrase
+        self.last_text = None
+
+    def accept(self, utterance):
+        self.last_text = self.recognize(utterance)
+        return self.last_text is not None and self.phrase in self.last_text.lower()
+
+# Duration filter, then Sphinx keyword spotting if pocketsphinx is installed,
+# else recognize_google on what the duration filter let through
+def make_hotword_stages(recognizer, phrase="hello windows"):
+    import speech_recognition as sr
+
+    stages = [DurationFilter()]
+    try:
+        stages.append(SphinxHotword(recognizer, phrase))
+    except ImportError:
+        def recognize(utterance):
+            try:
+                return recognizer.recognize_google(utterance.to_audio_data())
+            except sr.UnknownValueError:
+                return None
+        stages.append(RecognizerHotword(recognize, phrase))
+    return stages
+
+class HotwordGate:
+    def __init__(self, frames, noise_floor=None, stages=None, vad=None, save_interval=60.0):
+        self.source = frames
+        self.noise_floor = noise_floor if noise_floor is not None else NoiseFloor()
+        self.vad = vad if vad is not None else VoiceActivityDetector(self.noise_floor)
+        self.stages = stages if stages is not None else [DurationFilter()]
+        self.save_interval = save_interval
+        self.now = 0.0
+        self.last_save = 0.0
+        self.ended = False
+        self.frames_read = 0
+        self.utterances = 0
+        self.activations = 0
+        self.stage_calls = {stage.name: 0 for stage in self.stages}
+
+    # Next complete utterance, or None at the end of the stream or when no
+    # speech starts within `timeout` seconds of audio
+    def next_utterance(self, timeout=None):
+        deadline = None if timeout is None else self.now + timeout
+        while not self.ended:
+            frame = self.source.read()
+            if not frame:
+                self.ended = True
+                break
+            self.frames_read += 1
+            self.now += len(frame) / (2 * self.source.rate)
+            finished = self.vad.feed(frame, self.now)
+            if self.now - self.last_save >= self.save_interval:
+                self.last_save = self.now
+                self.noise_floor.save()
+            if finished is not None:
+                frames, start, end = finished
+                self.utterances += 1
+                utterance = Utterance(b"".join(frames), self.source.rate, start, end)
+                utterance.speech_ended_at -= self.now - end
+                return utterance
+            if deadline is not None and self.now >= deadline and not self.vad.in_utterance:
+                return None
+        return None
+
+    # Blocks until an utterance passes every hotword stage; None when the stream ends
+    def wait_for_hotword(self):
+        while True:
+            utterance = self.next_utterance()
+            if utterance is None:
+                return None
+            if self.check_hotword(utterance):
+                self.activations += 1
+                return utterance
+
+    def check_hotword(self, utterance):
+        for stage in self.stages:
+            self.stage_calls[stage.name] += 1
+            if not stage.accept(utterance):
+                return False
+        return True
+
+    def stats(self):
+        hours = self.now / 3600
+        return {
+            "audio_seconds": self.now,
+            "utterances": self.utterances,
+            "activations": self.activations,
+            "stage_calls": dict(self.stage_calls),
+            "calls_per_hour": {name: calls / hours if hours else 0.0 for name, calls in self.stage_calls.items()},
+            "noise_floor": self.noise_floor.rms,
+        }
+
+    def close(self):
+        self.noise_floor.save()
+        self.source.close()
@@ -0,0 +1,185 @@
+# Module: Non-Blocking Key Dispatch
+
+# Description:
+# ------------
+# Sends simulated key events from a dedicated sender thread, so the gesture
+# frame loops and the voice assistant never wait on the input library.
+#
+# How It Works:
+# -------------
+# 1. key_down / key_up / press / hotkey only put an event on a FIFO queue and
+#    return immediately.
+# 2. A single sender thread applies the events in order through a backend, so
+#    a key-up can never overtake its key-down. Repeated downs of a held key and
+#    ups of a key that is not held are ignored.
+# 3. The pyautogui backend calls pyautogui with `_pause=False`, skipping the
+#    `pyautogui.PAUSE` sleep that otherwise follows every call. When no backend
+#    is given, it is created on the sender thread, so constructing a
+#    KeyDispatcher does not import pyautogui.
+# 4. Every event carries the time its gesture or command was detected; the
+#    sender records the delay until the key event was actually issued (and
+#    passes it to an optional profiler as the "key_event" stage).
+# 5. close() (also run at interpreter exit) releases every held key, in reverse
+#    press order, before stopping the sender.
+#
+# Backends:
+# ---------
+# - "pyautogui": real keyboard events.
+# - "recording": RecordingKeyBackend, which records events in memory for tests,
+#   replays and benchmarks.
+
+import atexit
+import queue
+import threading
+import time
+from collections import deque
+
+class PyAutoGUIKeyBackend:
+    def __init__(self):
+        import pyautogui
+        self.pyautogui = pyautogui
+
+    def key_down(self, key):
+        self.pyautogui.keyDown(key, _pause=False)
+
+    def key_up(self, key):
+        self.pyautogui.keyUp(key, _pause=False)
+
+class RecordingKeyBackend:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.events = []
+
+    def key_down(self, key):
+        self._record("down", key)
+
+    def key_up(self, key):
+        self._record("up", key)
+
+    def _record(self, action, key):
+        if self.delay:
+            time.sleep(self.delay)
+        self.events.append((time.perf_counter(), action, key))
+
+KEY_BACKENDS = {"pyautogui": PyAutoGUIKeyBackend, "recording": RecordingKeyBackend}
+
+def make_key_backend(name):
+    if name not in KEY_BACKENDS:
+        raise ValueError(f"Unknown key backend {name!r}, expected one of {', '.join(KEY_BACKENDS)}")
+    return KEY_BACKENDS[name]()
+
+class KeyDispatcher:
+    def __init__(self, backend=None, latency_samples=1000, profiler=None):
+        self.backend = backend
+        self.profiler = profiler
+        self.queue = queue.Queue()
+        self.held = []
+        self.latencies = deque(maxlen=latency_samples)
+        self.issued = 0
+        self.failed = 0
+        self.lock = threading.Lock()
+        self.thread = None
+        self.closed = False
+
+    # Starting is optional; the sender thread also starts with the first event
+    def start(self):
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="key-dispatch", daemon=True)
+                self.thread.start()
+                atexit.register(self.close)
+        return self
+
+    def key_down(self, key, detected_at=None):
+        self._submit("down", key, detected_at)
+
+    def key_up(self, key, detected_at=None):
+        self._submit("up", key, detected_at)
+
+    def press(self, key, detected_at=None):
+        self._submit("down", key, detected_at)
+        self._submit("up", key, detected_at)
+
+    # Like pyautogui.hotkey: press the keys in order, release them in reverse
+    def hotkey(self, *keys, detected_at=None):
+        for key in keys:
+            self._submit("down", key, detected_at)
+        for key in reversed(keys):
+            self._submit("up", key, detected_at)
+
+    def release_all(self):
+        self._submit("release_all", None, None)
+
+    # Block until every event queued so far has been issued
+    def flush(self):
+        if self.thread is not None:
+            self.queue.join()
+
+    def close(self, timeout=1.0):
+        if self.closed:
+            return
+        self.closed = True
+        if self.thread is not None:
+            self.queue.put(("release_all", None, time.perf_counter()))
+            self.queue.put(None)
+            self.thread.join(timeout)
+
+    def latency_summary(self):
+        samples = sorted(self.latencies)
+        if not samples:
+            return {"count": 0, "mean": 0.0, "p95": 0.0, "max": 0.0}
+        return {
+            "count": len(samples),
+            "mean": sum(samples) / len(samples),
+            "p95": samples[min(len(samples) - 1, int(0.95 * len(samples)))],
+            "max": samples[-1],
+        }
+
+    def _submit(self, action, key, detected_at):
+        if self.closed:
+            return
+        if self.thread is None:
+            self.start()
+        self.queue.put((action, key, detected_at if detected_at is not None else time.perf_counter()))
+
+    def _run(self):
+        if self.backend is None:
+            # The default backend imports pyautogui, so it is created here rather
+            # than where the dispatcher is constructed
+            try:
+                self.backend = PyAutoGUIKeyBackend()
+            except Exception as e:
+                print(f"Could not load the pyautogui key backend: {e}")
+        while True:
+            event = self.queue.get()
+            try:
+                if event is None:
+                    return
+                action, key, detected_at = event
+                if action == "release_all":
+                    for held_key in reversed(list(self.held)):
+                        self._apply("up", held_key, detected_at)
+                elif action == "down" and key not in self.held:
+                    self._apply("down", key, detected_at)
+                elif action == "up" and key in self.held:
+                    self._apply("up", key, detected_at)
+            finally:
+                self.queue.task_done()
+
+    def _apply(self, action, key, detected_at):
+        try:
+            if action == "down":
+                self.backend.key_down(key)
+                self.held.append(key)
+            else:
+                self.held.remove(key)
+                self.backend.key_up(key)
+        except Exception as e:
+            self.failed += 1
+            print(f"Key {action} for {key!r} failed: {e}")
+            return
+        self.issued += 1
+        latency = time.perf_counter() - detected_at
+        self.latencies.append(latency)
+        if self.profiler is not None:
+            self.profiler.record("key_event", latency)
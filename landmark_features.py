@@ -0,0 +1,208 @@
+# Module: Vectorized Hand-Landmark Features and Gesture Rules
+
+# Description:
+# ------------
+# Evaluates a table of declarative gesture rules against MediaPipe hand
+# landmarks in one vectorized pass, instead of one hand-written function per
+# gesture that looks up individual landmark objects.
+#
+# How It Works:
+# -------------
+# 1. The 21 landmarks of a hand are copied once per frame into a reused (21, 3)
+#    NumPy array.
+# 2. When the engine is built, the rule table is compiled into index arrays:
+#    every landmark pair and joint that any rule mentions is listed once.
+# 3. Per frame, all pair distances (2D and per axis) and joint angles are
+#    computed together, gathered into one feature vector and compared against
+#    every rule condition at once; conditions are AND-ed per gesture.
+# 4. Small tables (up to SCALAR_CONDITIONS conditions, e.g. the one rule a game
+#    controller uses) are checked in plain Python instead, where NumPy's fixed
+#    per-call cost would dominate; load(..., only_used=True) then copies just
+#    the landmarks those rules read.
+#
+# Rule format:
+# ------------
+# Each gesture is a list of (feature, landmarks, op, threshold) conditions:
+#   ("distance", (4, 6), "<", 0.06)      2D distance between two landmarks
+#   ("dx", (4, 8), "<", 0.05)            absolute x difference
+#   ("dy", (4, 8), "<", 0.05)            absolute y difference
+#   ("angle", (5, 6, 7), ">", 160)       angle at the middle landmark, degrees
+#
+# Coordinates are MediaPipe's normalized image coordinates, so thresholds match
+# the ones the game scripts originally hard-coded (0.06 for the Dino jump, 0.05
+# for the Hill Climb pinch).
+
+import math
+
+import numpy as np
+
+# MediaPipe hand landmark indices
+WRIST = 0
+THUMB_TIP = 4
+INDEX_PIP = 6
+INDEX_TIP = 8
+MIDDLE_TIP = 12
+RING_TIP = 16
+PINKY_TIP = 20
+
+# Finger PIP joints as (knuckle, PIP, DIP) triples, index to pinky
+PIP_JOINTS = [(5, 6, 7), (9, 10, 11), (13, 14, 15), (17, 18, 19)]
+
+def _pinch(tip, threshold=0.05):
+    return [("dx", (THUMB_TIP, tip), "<", threshold), ("dy", (THUMB_TIP, tip), "<", threshold)]
+
+def _fingers(straight, bent):
+    return ([("angle", joint, ">", 160) for joint in straight] +
+            [("angle", joint, "<", 100) for joint in bent])
+
+GESTURE_RULES = {
+    # Dino game: thumb tip touches the index finger's middle joint
+    "jump": [("distance", (THUMB_TIP, INDEX_PIP), "<", 0.06)],
+    # Hill Climb Racing: thumb tip and index fingertip pinched together
+    "thumb_index_pinch": _pinch(INDEX_TIP),
+    "thumb_middle_pinch": _pinch(MIDDLE_TIP),
+    "thumb_ring_pinch": _pinch(RING_TIP),
+    "thumb_pinky_pinch": _pinch(PINKY_TIP),
+    "open_palm": _fingers(PIP_JOINTS, []),
+    "fist": _fingers([], PIP_JOINTS),
+    "point": _fingers(PIP_JOINTS[:1], PIP_JOINTS[1:]),
+    "victory": _fingers(PIP_JOINTS[:2], PIP_JOINTS[2:]),
+}
+
+FEATURE_KINDS = ("distance", "dx", "dy", "angle")
+
+# Up to this many conditions in total, rules are checked one by one in plain
+# Python: NumPy's per-call overhead only pays off for larger rule tables (the
+# two break even at about the full GESTURE_RULES table, 25 conditions)
+SCALAR_CONDITIONS = 20
+
+class GestureEngine:
+    def __init__(self, rules=None):
+        rules = GESTURE_RULES if rules is None else rules
+        self.names = list(rules)
+        self.points = np.zeros((21, 3))
+        self._flat = self.points.reshape(-1)
+
+        pairs, joints = {}, {}
+        conditions = []
+        for name in self.names:
+            if not rules[name]:
+                raise ValueError(f"Gesture {name!r} has no conditions")
+            for kind, landmarks, op, threshold in rules[name]:
+                if kind not in FEATURE_KINDS or op not in ("<", ">"):
+                    raise ValueError(f"Unsupported condition {kind!r} {op!r} in gesture {name!r}")
+                table = joints if kind == "angle" else pairs
+                index = table.setdefault(tuple(landmarks), len(table))
+                conditions.append((kind, index, op, threshold))
+
+        # All landmarks the rules need are gathered with a single fancy index:
+        # pair starts, pair ends, joint first points, joint vertices, joint last points
+        pair_list = list(pairs)
+        joint_list = list(joints)
+        self._pair_count = len(pair_list)
+        self._joint_count = len(joint_list)
+        self._gather = np.array([a for a, _ in pair_list] + [b for _, b in pair_list] +
+                                [a for a, _, _ in joint_list] + [b for _, b, _ in joint_list] +
+                                [c for _, _, c in joint_list], dtype=np.intp)
+
+        # Features are compared in a cheaper but equivalent space: squared distances
+        # instead of distances, and the cosine of each joint angle instead of the
+        # angle (the cosine falls as the angle grows, so the comparison flips).
+        # Layout: [squared distance | dx | dy] per pair, then cosine per joint.
+        offsets = {"distance": 0, "dx": self._pair_count, "dy": 2 * self._pair_count,
+                   "angle": 3 * self._pair_count}
+        columns, signs, limits = [], [], []
+        for kind, index, op, threshold in conditions:
+            if kind == "distance":
+                threshold = threshold ** 2
+            elif kind == "angle":
+                threshold = np.cos(np.radians(threshold))
+                op = ">" if op == "<" else "<"
+            columns.append(offsets[kind] + index)
+            # value < t  <=>  sign * value < sign * t, with sign -1 for ">"
+            signs.append(1.0 if op == "<" else -1.0)
+            limits.append(signs[-1] * threshold)
+        self._columns = np.array(columns, dtype=np.intp)
+        self._signs = np.array(signs)
+        self._limits = np.array(limits)
+        counts = [len(rules[name]) for name in self.names]
+        self._starts = np.concatenate(([0], np.cumsum(counts)[:-1])).astype(np.intp)
+
+        # Every landmark some rule reads, for load(landmarks, only_used=True)
+        self.used_landmarks = sorted({landmark for conditions in rules.values()
+                                      for _, landmarks, _, _ in conditions for landmark in landmarks})
+        # The same comparisons per gesture for the scalar path: (kind, flat
+        # offsets of the landmarks, sign, limit)
+        self._scalar = None
+        if len(conditions) <= SCALAR_CONDITIONS:
+            self._scalar = []
+            position = 0
+            for name, count in zip(self.names, counts):
+                self._scalar.append([(kind, tuple(3 * landmark for landmark in rules[name][i][1]),
+                                      signs[position + i], limits[position + i])
+                                     for i, (kind, _, _, _) in enumerate(rules[name])])
+                position += count
+
+    # Copy MediaPipe landmarks (hand_landmarks.landmark) into the reused array;
+    # with only_used=True just the landmarks the rules read are copied
+    def load(self, landmarks, only_used=False):
+        if only_used:
+            flat = self._flat
+            for index in self.used_landmarks:
+                landmark = landmarks[index]
+                flat[3 * index:3 * index + 3] = (landmark.x, landmark.y, landmark.z)
+        else:
+            self._flat[:] = [value for landmark in landmarks for value in (landmark.x, landmark.y, landmark.z)]
+        return self.points
+
+    def load_array(self, points):
+        self.points[:] = points
+        return self.points
+
+    # Every pair distance and joint angle the rules need, in one pass
+    def compute_features(self):
+        pairs, joints = self._pair_count, self._joint_count
+        gathered = self.points[self._gather]
+        delta = np.abs(gathered[:pairs, :2] - gathered[pairs:2 * pairs, :2])
+        vertex = gathered[2 * pairs + joints:2 * pairs + 2 * joints]
+        to_a = gathered[2 * pairs:2 * pairs + joints] - vertex
+        to_c = gathered[2 * pairs + 2 * joints:] - vertex
+        lengths = (to_a * to_a).sum(axis=1) * (to_c * to_c).sum(axis=1)
+        cosines = (to_a * to_c).sum(axis=1) / np.sqrt(np.maximum(lengths, 1e-18))
+        return np.concatenate(((delta * delta).sum(axis=1), delta[:, 0], delta[:, 1], cosines))
+
+    # Boolean array with one entry per gesture, in self.names order
+    def evaluate_loaded(self):
+        if self._scalar is not None:
+            return np.array([self._scalar_gesture(conditions, self._flat.tolist()) for conditions in self._scalar])
+        features = self.compute_features()
+        passed = self._signs * features[self._columns] < self._limits
+        return np.logical_and.reduceat(passed, self._starts)
+
+    # One gesture's conditions on the flat landmark list, compared in the same
+    # space as the vectorized path (squared distances, cosines)
+    def _scalar_gesture(self, conditions, flat):
+        for kind, offsets, sign, limit in conditions:
+            if kind == "angle":
+                a, b, c = offsets
+                to_a = (flat[a] - flat[b], flat[a + 1] - flat[b + 1], flat[a + 2] - flat[b + 2])
+                to_c = (flat[c] - flat[b], flat[c + 1] - flat[b + 1], flat[c + 2] - flat[b + 2])
+                lengths = (to_a[0] ** 2 + to_a[1] ** 2 + to_a[2] ** 2) * (to_c[0] ** 2 + to_c[1] ** 2 + to_c[2] ** 2)
+                value = (to_a[0] * to_c[0] + to_a[1] * to_c[1] + to_a[2] * to_c[2]) / math.sqrt(max(lengths, 1e-18))
+            else:
+                a, b = offsets
+                dx = abs(flat[a] - flat[b])
+                dy = abs(flat[a + 1] - flat[b + 1])
+                value = dx * dx + dy * dy if kind == "distance" else dx if kind == "dx" else dy
+            if not sign * value < limit:
+                return False
+        return True
+
+    # {gesture name: bool} for MediaPipe landmarks
+    def evaluate(self, landmarks):
+        self.load(landmarks)
+        return dict(zip(self.names, self.evaluate_loaded().tolist()))
+
+    def evaluate_array(self, points):
+        self.load_array(points)
+        return dict(zip(self.names, self.evaluate_loaded().tolist()))
@@ -0,0 +1,177 @@
+# Module: Compact Hand-Landmark Recording and Replay
+
+# Description:
+# ------------
+# Records what MediaPipe saw on every frame (timestamp, handedness labels and
+# 21x3 landmarks per hand) to a compact binary file, and replays such files
+# into the gesture and key-dispatch logic without a camera or a model, as fast
+# as the decision layer can go or at the recorded pace.
+#
+# File Format:
+# ------------
+# A 16-byte header followed by fixed-size little-endian frame records, so a
+# file can be memory-mapped as one NumPy structured array:
+#   header:  magic b"LMREC1\0\0", max hands per frame (uint32), record size (uint32)
+#   record:  timestamp (float64 seconds), hand count (uint8),
+#            labels (uint8 per hand slot, 0 = Left, 1 = Right),
+#            points (float32, max_hands x 21 x 3, normalized image coordinates)
+# Unused hand slots are zero. A record cut short by a crash is ignored on read.
+# Two hands per frame take 520 bytes, about 15 KB per second at 30 fps.
+#
+# Usage:
+# ------
+#   Record:  Gesture_control_for_dino_game.py --record dino.lmrec
+#   Replay:  python landmark_recording.py dino.lmrec --game dino
+#            python landmark_recording.py dino.lmrec --game dino --realtime --key-backend pyautogui
+#   Speed:   python gesture_benchmark.py replay --recording dino.lmrec
+
+import argparse
+import time
+import numpy as np
+
+MAGIC = b"LMREC1\0\0"
+HEADER_DTYPE = np.dtype([("magic", "S8"), ("max_hands", "<u4"), ("record_size", "<u4")])
+HAND_LABELS = ("Left", "Right")
+LABEL_CODES = {label: code for code, label in enumerate(HAND_LABELS)}
+
+def frame_dtype(max_hands):
+    return np.dtype([("timestamp", "<f8"), ("count", "u1"), ("labels", "u1", (max_hands,)),
+                     ("points", "<f4", (max_hands, 21, 3))], align=True)
+
+class LandmarkRecorder:
+    def __init__(self, path, max_hands=2):
+        self.path = path
+        self.max_hands = max_hands
+        self.dtype = frame_dtype(max_hands)
+        self.record = np.zeros(1, dtype=self.dtype)
+        self.frames = 0
+        self.dropped_hands = 0
+        self.file = open(path, "wb")
+        header = np.array([(MAGIC, max_hands, self.dtype.itemsize)], dtype=HEADER_DTYPE)
+        self.file.write(header.tobytes())
+
+    # Copy one hand of the current frame; points is a (21, 3) array
+    def add_hand(self, label, points):
+        count = int(self.record["count"][0])
+        if count == self.max_hands:
+            self.dropped_hands += 1
+            return
+        self.record["labels"][0, count] = LABEL_CODES[label]
+        self.record["points"][0, count] = points
+        self.record["count"][0] = count + 1
+
+    # Write the current frame (with the hands added so far, possibly none)
+    def end_frame(self, timestamp):
+        self.record["timestamp"][0] = timestamp
+        self.file.write(self.record.tobytes())
+        self.record.fill(0)
+        self.frames += 1
+
+    def write(self, timestamp, hands):
+        for label, points in hands:
+            self.add_hand(label, points)
+        self.end_frame(timestamp)
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class LandmarkRecording:
+    def __init__(self, path):
+        self.path = path
+        header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)
+        if len(header) == 0 or header["magic"][0] != MAGIC.rstrip(b"\0"):
+            raise ValueError(f"{path} is not a landmark recording")
+        self.max_hands = int(header["max_hands"][0])
+        dtype = frame_dtype(self.max_hands)
+        if int(header["record_size"][0]) != dtype.itemsize:
+            raise ValueError(f"{path} has {header['record_size'][0]}-byte records, expected {dtype.itemsize}")
+
+        with open(path, "rb") as file:
+            file.seek(0, 2)
+            count = (file.tell() - HEADER_DTYPE.itemsize) // dtype.itemsize
+        if count:
+            self.frames = np.memmap(path, dtype=dtype, mode="r", offset=HEADER_DTYPE.itemsize, shape=(count,))
+        else:
+            self.frames = np.zeros(0, dtype=dtype)
+        # Column views on the mapping; nothing is read until it is used
+        self.timestamps = self.frames["timestamp"]
+        self.counts = self.frames["count"]
+        self.labels = self.frames["labels"]
+        self.points = self.frames["points"]
+
+    def __len__(self):
+        return len(self.frames)
+
+    @property
+    def duration(self):
+        return float(self.timestamps[-1] - self.timestamps[0]) if len(self.frames) > 1 else 0.0
+
+    @property
+    def hand_count(self):
+        return int(self.counts.sum())
+
+    # Yields (timestamp, [(label, points), ...]) per frame; points are float32 views
+    def iter_frames(self):
+        for index, (timestamp, count) in enumerate(zip(self.timestamps.tolist(), self.counts.tolist())):
+            labels = self.labels[index]
+            yield timestamp, [(HAND_LABELS[labels[slot]], self.points[index, slot]) for slot in range(count)]
+
+# Feeds every recorded hand to update(label, points, timestamp), e.g. a
+# GameController's update. Without realtime the frames go back to back; with
+# it each frame waits until its recorded offset from the first frame.
+# Returns (frames, hands, seconds spent).
+def replay(recording, update, realtime=False, clock=time.perf_counter, sleep=time.sleep):
+    frames = hands = 0
+    start = clock()
+    first = None
+    for timestamp, frame_hands in recording.iter_frames():
+        if realtime:
+            first = timestamp if first is None else first
+            delay = (timestamp - first) - (clock() - start)
+            if delay > 0:
+                sleep(delay)
+        for label, points in frame_hands:
+            update(label, points, timestamp)
+        frames += 1
+        hands += len(frame_hands)
+    return frames, hands, clock() - start
+
+def main():
+    from game_controllers import GAME_CONTROLLERS, TRIGGER_MODES
+    from key_dispatch import KEY_BACKENDS, KeyDispatcher, make_key_backend
+
+    parser = argparse.ArgumentParser(description="Replay a landmark recording through a game controller.")
+    parser.add_argument("recording", help="file written with --record")
+    parser.add_argument("--game", choices=sorted(GAME_CONTROLLERS), default="dino", help="controller to drive")
+    parser.add_argument("--trigger", choices=TRIGGER_MODES, default="hysteresis",
+                        help="same as the live scripts' --trigger")
+    parser.add_argument("--key-backend", choices=sorted(KEY_BACKENDS), default="recording",
+                        help="'pyautogui' sends the replayed key events to the real keyboard")
+    parser.add_argument("--realtime", action="store_true", help="replay at the recorded pace")
+    parser.add_argument("--verbose", action="store_true", help="print every press and release")
+    args = parser.parse_args()
+
+    recording = LandmarkRecording(args.recording)
+    backend = make_key_backend(args.key_backend)
+    keys = KeyDispatcher(backend).start()
+    controller = GAME_CONTROLLERS[args.game](keys, args.trigger, verbose=args.verbose)
+    try:
+        frames, hands, elapsed = replay(recording, controller.update, args.realtime)
+    finally:
+        keys.close()
+    print(f"{frames} frames ({recording.duration:.1f} s recorded), {hands} hands, "
+          f"{controller.presses} presses in {elapsed:.3f} s ({frames / max(elapsed, 1e-9):.0f} frames/s)")
+    for line in controller.trigger_report():
+        print(line)
+    if args.key_backend == "recording":
+        print(f"{len(backend.events)} key events issued")
+
+if __name__ == "__main__":
+    main()
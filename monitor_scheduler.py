@@ -0,0 +1,241 @@
+# Module: Background Monitor Scheduler for the Voice Assistant
+
+# Description:
+# ------------
+# Runs every periodic system check (probe) on one thread. Replaces
+# check_battery_status, a thread of its own that polled the battery every
+# 60 s and spoke the same low-battery warning every minute for as long as the
+# battery stayed low.
+#
+# How It Works:
+# -------------
+# 1. MonitorScheduler keeps the probes in a heap ordered by due time. Its
+#    thread sleeps until the earliest one is due, runs it and puts it back at
+#    the time the probe asks for; adding a probe wakes it early if needed.
+# 2. A probe's poll(now) returns the seconds until it wants to run again, or
+#    None to be dropped, so each probe adapts its own interval.
+# 3. Alerts are edge-triggered: EdgeAlert fires when its condition becomes
+#    true and stays quiet until the condition has cleared, so a state is
+#    announced once, not once per poll.
+# 4. The clock is pluggable. MonotonicClock is real time; with a VirtualClock,
+#    run_until() jumps from one due time to the next, so hours of monitoring
+#    run instantly in tests and benchmarks.
+#
+# Battery probe:
+# --------------
+# - Reads (percent, plugged in) from psutil, or from FakeBattery.
+# - While discharging it estimates the drain rate and polls sooner the closer
+#   the next alert level is (between min_interval and max_interval).
+# - While charging it backs off to charging_interval.
+# - "low" fires at or below `low` percent, "critical" at or below `critical`;
+#   each clears once the battery is clear_margin percent above its level or
+#   plugged in.
+
+import heapq
+import itertools
+import threading
+import time
+
+class MonotonicClock:
+    def now(self):
+        return time.monotonic()
+
+class VirtualClock:
+    def __init__(self, start=0.0):
+        self.time = start
+
+    def now(self):
+        return self.time
+
+    def advance_to(self, when):
+        self.time = max(self.time, when)
+
+class Alert:
+    def __init__(self, name, message, time):
+        self.name = name
+        self.message = message
+        self.time = time
+
+class EdgeAlert:
+    def __init__(self, name, on_alert, on_clear=None):
+        self.name = name
+        self.on_alert = on_alert
+        self.on_clear = on_clear
+        self.active = False
+        self.fired = 0
+
+    # Returns True when this update fired the alert
+    def update(self, active, now, message=None):
+        if active == self.active:
+            return False
+        self.active = active
+        if active:
+            self.fired += 1
+            self.on_alert(Alert(self.name, message, now))
+            return True
+        if self.on_clear is not None:
+            self.on_clear(Alert(self.name, message, now))
+        return False
+
+def read_psutil_battery():
+    import psutil
+    battery = psutil.sensors_battery()
+    if battery is None:
+        return None
+    return battery.percent, battery.power_plugged
+
+# A battery that drains or charges linearly in clock time; plug(True/False)
+# switches between the two
+class FakeBattery:
+    def __init__(self, clock, percent=100.0, drain_per_hour=20.0, charge_per_hour=60.0, plugged=False):
+        self.clock = clock
+        self.percent = percent
+        self.drain_per_hour = drain_per_hour
+        self.charge_per_hour = charge_per_hour
+        self.plugged = plugged
+        self.updated = clock.now()
+        self.reads = 0
+
+    def _advance(self):
+        now = self.clock.now()
+        rate = self.charge_per_hour if self.plugged else -self.drain_per_hour
+        self.percent = min(100.0, max(0.0, self.percent + rate * (now - self.updated) / 3600))
+        self.updated = now
+
+    def plug(self, plugged):
+        self._advance()
+        self.plugged = plugged
+
+    def read(self):
+        self._advance()
+        self.reads += 1
+        return self.percent, self.plugged
+
+class BatteryProbe:
+    name = "battery"
+
+    def __init__(self, read, on_alert, low=15, critical=5, clear_margin=3, min_interval=15.0, max_interval=120.0,
+                 charging_interval=300.0, no_battery_interval=None):
+        self.read = read
+        self.low_alert = EdgeAlert("low_battery", on_alert)
+        self.critical_alert = EdgeAlert("critical_battery", on_alert)
+        self.low = low
+        self.critical = critical
+        self.clear_margin = clear_margin
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.charging_interval = charging_interval
+        self.no_battery_interval = no_battery_interval
+        self.last = None
+        self.percent = None
+
+    def poll(self, now):
+        reading = self.read()
+        if reading is None:
+            # No battery (a desktop): stop polling unless told to keep checking
+            return self.no_battery_interval
+        percent, plugged = reading
+        self.percent = percent
+
+        for alert, level in ((self.low_alert, self.low), (self.critical_alert, self.critical)):
+            if plugged:
+                alert.update(False, now)
+            elif percent <= level:
+                alert.update(True, now, f"Battery at {percent:.0f} percent")
+            elif percent >= level + self.clear_margin:
+                alert.update(False, now)
+
+        drain = None
+        if self.last is not None and not plugged and not self.last[2] and now > self.last[0]:
+            drain = (self.last[1] - percent) / (now - self.last[0])
+        self.last = (now, percent, plugged)
+
+        if plugged:
+            return self.charging_interval
+        if drain is None or drain <= 0:
+            return self.max_interval
+        # Poll twice before the next level is reached at the current drain rate
+        upcoming = [level for level in (self.low, self.critical) if level < percent]
+        if not upcoming:
+            return self.max_interval
+        return min(self.max_interval, max(self.min_interval, (percent - max(upcoming)) / drain / 2))
+
+class MonitorScheduler:
+    def __init__(self, clock=None):
+        self.clock = clock if clock is not None else MonotonicClock()
+        self.heap = []
+        self.order = itertools.count()
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.polls = {}
+        self.errors = 0
+        self.max_lag = 0.0
+        self.running = False
+        self.thread = None
+
+    def add(self, probe, delay=0.0):
+        with self.lock:
+            heapq.heappush(self.heap, (self.clock.now() + delay, next(self.order), probe))
+            self.polls.setdefault(probe.name, 0)
+        self.wakeup.set()
+        return probe
+
+    # Seconds until the earliest probe is due (0 if overdue), None if there are none
+    def next_delay(self):
+        with self.lock:
+            if not self.heap:
+                return None
+            return max(0.0, self.heap[0][0] - self.clock.now())
+
+    # Runs every probe that is due; returns how many ran
+    def run_pending(self):
+        ran = 0
+        while True:
+            now = self.clock.now()
+            with self.lock:
+                if not self.heap or self.heap[0][0] > now:
+                    return ran
+                due, _, probe = heapq.heappop(self.heap)
+            self.max_lag = max(self.max_lag, now - due)
+            self.polls[probe.name] += 1
+            ran += 1
+            try:
+                interval = probe.poll(now)
+            except Exception as e:
+                print(f"Monitor {probe.name} failed: {e}")
+                self.errors += 1
+                interval = getattr(probe, "max_interval", 60.0)
+            if interval is not None:
+                with self.lock:
+                    heapq.heappush(self.heap, (now + interval, next(self.order), probe))
+
+    # Virtual clocks only: run everything due up to `end`, jumping between due times
+    def run_until(self, end):
+        while True:
+            with self.lock:
+                due = self.heap[0][0] if self.heap else None
+            if due is None or due > end:
+                self.clock.advance_to(end)
+                return
+            self.clock.advance_to(due)
+            self.run_pending()
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="monitor-scheduler", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        self.wakeup.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def _run(self):
+        while self.running:
+            # Cleared first, so a probe added while others run still wakes the wait
+            self.wakeup.clear()
+            self.run_pending()
+            self.wakeup.wait(self.next_delay())
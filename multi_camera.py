@@ -0,0 +1,247 @@
+# Module: Multi-Camera / Multi-Player Gesture Control
+
+# Description:
+# ------------
+# Runs the gesture controllers for several cameras (or players) at once, with
+# one worker process per camera source. Each worker has its own capture and its
+# own MediaPipe `Hands` instance, so a slow camera or model only stalls its own
+# player, and inference for N sources runs on up to N cores instead of sharing
+# one Python thread.
+#
+# How It Works:
+# -------------
+# 1. Each --player names a game, a source (a camera index or a video file) and
+#    optionally the keys to use instead of the game's defaults.
+# 2. A worker process per player reads its source (cameras through
+#    LatestFrameCapture, video files frame by frame), runs MediaPipe and sends
+#    only the landmarks through a pipe: one fixed-size landmark_recording.py
+#    record (timestamp, hand labels, 21x3 landmarks per hand) per frame, about
+#    half a kilobyte instead of a ~1 MB frame.
+# 3. The dispatcher in the main process waits on all pipes at once and feeds
+#    each record to that player's controller from game_controllers.py; all
+#    players share one KeyDispatcher, so their keys must not overlap.
+# 4. An empty message tells the dispatcher that a worker's source has ended.
+#
+# Timestamps are time.perf_counter() values taken in the workers; on Linux and
+# Windows that clock is system-wide, so the dispatcher can report how old the
+# landmarks are when they reach it.
+#
+# Usage:
+# ------
+#   Two players on two webcams, Dino on the default keys and on "up":
+#     python multi_camera.py --player dino,0 --player dino,1,up
+#   Hill Climb from a recorded video, brake on "a" and gas on "d", dry run:
+#     python multi_camera.py --player hillclimb,clip.mp4,a,d --key-backend recording
+#   Throughput with 1, 2 and 4 workers on the same video:
+#     python gesture_benchmark.py multicam --video clip.mp4 --workers 1,2,4
+
+import argparse
+import multiprocessing
+import time
+from multiprocessing.connection import wait
+import numpy as np
+
+from game_controllers import GAME_CONTROLLERS, TRIGGER_MODES, make_controller
+from gesture_common import HandROITracker, LatencyHistogram, LatestFrameCapture
+from key_dispatch import KEY_BACKENDS, KeyDispatcher, make_key_backend
+from landmark_recording import HAND_LABELS, LABEL_CODES, frame_dtype
+
+# "GAME,SOURCE[,KEY...]" -> (game, source, keys)
+def parse_player(spec):
+    parts = [part.strip() for part in spec.split(",")]
+    if len(parts) < 2 or not parts[1]:
+        raise argparse.ArgumentTypeError(f"Expected GAME,SOURCE[,KEY...], got {spec!r}")
+    if parts[0] not in GAME_CONTROLLERS:
+        raise argparse.ArgumentTypeError(f"Unknown game {parts[0]!r}, expected one of {', '.join(GAME_CONTROLLERS)}")
+    return parts[0], parts[1], [key for key in parts[2:] if key]
+
+def open_source(source):
+    import cv2
+    return cv2.VideoCapture(int(source) if source.isdigit() else source)
+
+# Runs in the worker process; sends one record per frame and b"" at the end
+def camera_worker(source, conn, stop, max_hands=2, track_roi=False, max_frames=None):
+    import cv2
+    import mediapipe as mp
+
+    # One OpenCV thread per worker; the workers themselves use the cores
+    cv2.setNumThreads(1)
+    cap = open_source(source)
+    hands = None
+    crop_hands = None
+    capture = None
+    try:
+        if not cap.isOpened():
+            print(f"Source {source} not accessible")
+            return
+        hands = mp.solutions.hands.Hands(max_num_hands=max_hands)
+        detector = hands
+        if track_roi:
+            crop_hands = mp.solutions.hands.Hands(static_image_mode=True, max_num_hands=max_hands)
+            detector = HandROITracker(hands, crop_hands)
+        if source.isdigit():
+            capture = LatestFrameCapture(cap).start()
+        record = np.zeros(1, dtype=frame_dtype(max_hands))
+        frames = 0
+        while not stop.is_set() and (max_frames is None or frames < max_frames):
+            if capture is not None:
+                ret, frame, grabbed_at = capture.read(timeout=1.0)
+            else:
+                ret, frame = cap.read()
+                grabbed_at = time.perf_counter()
+            if not ret:
+                break
+
+            result = detector.process(cv2.cvtColor(cv2.flip(frame, 1), cv2.COLOR_BGR2RGB))
+            record.fill(0)
+            record["timestamp"][0] = grabbed_at
+            if result.multi_hand_landmarks:
+                found = list(zip(result.multi_hand_landmarks, result.multi_handedness))[:max_hands]
+                for slot, (hand_landmarks, hand_info) in enumerate(found):
+                    record["labels"][0, slot] = LABEL_CODES[hand_info.classification[0].label]
+                    record["points"][0, slot] = [(lm.x, lm.y, lm.z) for lm in hand_landmarks.landmark]
+                record["count"][0] = len(found)
+            conn.send_bytes(record.tobytes())
+            frames += 1
+    except (BrokenPipeError, KeyboardInterrupt):
+        pass
+    finally:
+        if capture is not None:
+            capture.stop()
+        cap.release()
+        if hands is not None:
+            hands.close()
+        if crop_hands is not None:
+            crop_hands.close()
+        try:
+            conn.send_bytes(b"")
+        except (BrokenPipeError, OSError):
+            pass
+        conn.close()
+
+class Player:
+    def __init__(self, name, game, source, controller, max_hands=2):
+        self.name = name
+        self.game = game
+        self.source = source
+        self.controller = controller
+        self.dtype = frame_dtype(max_hands)
+        self.frames = 0
+        self.hands = 0
+        self.first_at = None
+        self.last_at = None
+        self.age = LatencyHistogram()
+        self.process = None
+
+    def handle(self, data):
+        frame = np.frombuffer(data, dtype=self.dtype)[0]
+        timestamp = float(frame["timestamp"])
+        now = time.perf_counter()
+        self.first_at = now if self.first_at is None else self.first_at
+        self.last_at = now
+        self.age.add(now - timestamp)
+        count = int(frame["count"])
+        for slot in range(count):
+            self.controller.update(HAND_LABELS[frame["labels"][slot]], frame["points"][slot], timestamp)
+        self.frames += 1
+        self.hands += count
+
+    @property
+    def fps(self):
+        if self.frames < 2:
+            return 0.0
+        return (self.frames - 1) / max(self.last_at - self.first_at, 1e-9)
+
+    def format_line(self):
+        age = self.age.summary()
+        return (f"{self.name} ({self.game}, source {self.source}): {self.frames} frames at {self.fps:.1f} fps, "
+                f"{self.hands} hands, {self.controller.presses} presses, landmark age "
+                f"p50 {age['p50_ms']:.1f} ms p95 {age['p95_ms']:.1f} ms")
+
+# Starts one worker per player and dispatches their landmarks until every
+# source has ended (or Ctrl+C). Returns the wall time spent dispatching.
+def run_players(players, max_hands=2, track_roi=False, max_frames=None, report_interval=None,
+                worker=camera_worker):
+    context = multiprocessing.get_context("spawn")
+    stop = context.Event()
+    readers = {}
+    for player in players:
+        reader, writer = context.Pipe(duplex=False)
+        player.process = context.Process(target=worker, name=f"camera-{player.name}", daemon=True,
+                                         args=(player.source, writer, stop, max_hands, track_roi, max_frames))
+        player.process.start()
+        # Only the worker holds the writing end, so its exit shows up as EOF
+        writer.close()
+        readers[reader] = player
+
+    start = time.perf_counter()
+    last_report = start
+    try:
+        while readers:
+            for reader in wait(list(readers), timeout=0.5):
+                try:
+                    data = reader.recv_bytes()
+                except EOFError:
+                    data = b""
+                if not data:
+                    reader.close()
+                    del readers[reader]
+                    continue
+                readers[reader].handle(data)
+
+            if report_interval and time.perf_counter() - last_report >= report_interval:
+                last_report = time.perf_counter()
+                for player in players:
+                    print(player.format_line())
+    except KeyboardInterrupt:
+        print("Exiting...")
+    finally:
+        stop.set()
+        for player in players:
+            player.process.join(timeout=2.0)
+            if player.process.is_alive():
+                player.process.terminate()
+        for reader in readers:
+            reader.close()
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Gesture control with one worker process per camera.")
+    parser.add_argument("--player", dest="players", action="append", type=parse_player, required=True,
+                        metavar="GAME,SOURCE[,KEY...]",
+                        help="a game (dino or hillclimb), a camera index or video file, and optionally its keys "
+                             "(dino: jump; hillclimb: brake,gas); repeat for each player")
+    parser.add_argument("--track-roi", action="store_true", help="crop inference around the previous hands")
+    parser.add_argument("--key-backend", choices=sorted(KEY_BACKENDS), default="pyautogui",
+                        help="where key events go; 'recording' only records them")
+    parser.add_argument("--trigger", choices=TRIGGER_MODES, default="hysteresis",
+                        help="same as the single-camera scripts' --trigger")
+    parser.add_argument("--frames", type=int, default=None, help="stop each worker after this many frames")
+    parser.add_argument("--report-interval", type=float, default=5.0, help="seconds between per-player reports")
+    parser.add_argument("--verbose", action="store_true", help="print every press and release")
+    args = parser.parse_args()
+
+    keys = KeyDispatcher(make_key_backend(args.key_backend)).start()
+    players = []
+    bound = {}
+    for number, (game, source, bound_keys) in enumerate(args.players, 1):
+        name = f"player {number}"
+        controller = make_controller(game, keys, bound_keys, trigger=args.trigger, verbose=args.verbose)
+        for key, _, _ in controller.bindings.values():
+            if key in bound:
+                parser.error(f"{name} and {bound[key]} both use the {key!r} key")
+            bound[key] = name
+        players.append(Player(name, game, source, controller))
+
+    try:
+        elapsed = run_players(players, track_roi=args.track_roi, max_frames=args.frames,
+                              report_interval=args.report_interval)
+    finally:
+        keys.close()
+    for player in players:
+        print(player.format_line())
+    total = sum(player.frames for player in players)
+    print(f"{total} frames from {len(players)} workers in {elapsed:.1f} s ({total / max(elapsed, 1e-9):.1f} frames/s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+# Module: Pipelined Speech Recognition for the Voice Assistant
+
+# Description:
+# ------------
+# Keeps capturing speech while earlier utterances are being transcribed. In
+# the old command session, recognizer.listen and recognizer.recognize_google
+# ran one after the other, so nothing was captured during the round trip and
+# a command spoken right after another was lost.
+#
+# How It Works:
+# -------------
+# 1. A capture thread reads utterances from a hotword_gate.HotwordGate (the
+#    microphone stays open) and queues each one with a sequence number.
+# 2. A small pool of worker threads transcribes queued utterances in parallel
+#    through a RecognitionBackend.
+# 3. Results are released strictly in the order the utterances were spoken,
+#    even when a later one finishes first.
+# 4. Each result carries the end-of-speech-to-command latency: from the moment
+#    the speaker stopped to the moment the transcript was released.
+# 5. drain() and next_result(spoken_after=...) let a caller that asks a
+#    question (e.g. the shutdown confirmation) ignore anything said or played
+#    before the question finished.
+#
+# Backends:
+# ---------
+# - "google": recognize_google (network).
+# - "sphinx": recognize_sphinx (offline, needs pocketsphinx).
+# - "vosk": a Vosk model loaded once (offline, needs vosk and a model folder).
+# - "fake": deterministic transcripts from a function or a list, with an
+#   optional delay, for tests and benchmarks.
+
+import json
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+class RecognitionResult:
+    def __init__(self, sequence, utterance, text=None, error=None, released_at=None):
+        self.sequence = sequence
+        self.utterance = utterance
+        self.text = text
+        self.error = error
+        self.released_at = released_at
+
+    # Seconds from the end of speech to the transcript being released
+    @property
+    def latency(self):
+        return self.released_at - self.utterance.speech_ended_at
+
+class GoogleBackend:
+    name = "google"
+
+    def __init__(self, recognizer):
+        self.recognizer = recognizer
+
+    # Text, or None when nothing was understood; service errors are raised
+    def transcribe(self, utterance):
+        import speech_recognition as sr
+        try:
+            return self.recognizer.recognize_google(utterance.to_audio_data())
+        except sr.UnknownValueError:
+            return None
+
+class SphinxBackend:
+    name = "sphinx"
+
+    def __init__(self, recognizer):
+        import pocketsphinx  # Fail at startup, not on the first command
+        self.recognizer = recognizer
+
+    def transcribe(self, utterance):
+        import speech_recognition as sr
+        try:
+            return self.recognizer.recognize_sphinx(utterance.to_audio_data())
+        except sr.UnknownValueError:
+            return None
+
+class VoskBackend:
+    name = "vosk"
+
+    def __init__(self, model_path):
+        import vosk
+        self.vosk = vosk
+        self.model = vosk.Model(model_path)
+
+    def transcribe(self, utterance):
+        recognizer = self.vosk.KaldiRecognizer(self.model, utterance.rate)
+        recognizer.AcceptWaveform(utterance.data)
+        text = json.loads(recognizer.FinalResult()).get("text", "")
+        return text or None
+
+class FakeBackend:
+    name = "fake"
+
+    # transcripts: a function of the utterance, or a list of texts used in order
+    # (None once it runs out); each call takes `delay` seconds
+    def __init__(self, transcripts, delay=0.0):
+        self.transcripts = transcripts if callable(transcripts) else deque(transcripts)
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.calls = 0
+
+    def transcribe(self, utterance):
+        with self.lock:
+            self.calls += 1
+            if callable(self.transcripts):
+                text = self.transcripts(utterance)
+            else:
+                text = self.transcripts.popleft() if self.transcripts else None
+        if self.delay:
+            time.sleep(self.delay)
+        return text
+
+RECOGNITION_BACKENDS = ["google", "sphinx", "vosk", "fake"]
+
+def make_recognition_backend(name, recognizer=None, vosk_model=None):
+    if name == "google":
+        return GoogleBackend(recognizer)
+    if name == "sphinx":
+        return SphinxBackend(recognizer)
+    if name == "vosk":
+        if not vosk_model:
+            raise ValueError("The vosk backend needs a model folder")
+        return VoskBackend(vosk_model)
+    if name == "fake":
+        return FakeBackend(lambda utterance: None)
+    raise ValueError(f"Unknown recognition backend {name!r}, expected one of {', '.join(RECOGNITION_BACKENDS)}")
+
+class RecognitionPipeline:
+    def __init__(self, gate, backend, workers=2, max_pending=8, poll_interval=0.25, latency_samples=500):
+        self.gate = gate
+        self.backend = backend
+        self.workers = workers
+        self.max_pending = max_pending
+        self.poll_interval = poll_interval
+        self.results = queue.Queue()
+        self.pending = {}
+        self.next_sequence = 0
+        self.next_release = 0
+        self.lock = threading.Lock()
+        self.slots = threading.BoundedSemaphore(max_pending)
+        self.latencies = deque(maxlen=latency_samples)
+        self.dropped = 0
+        self.skipped = 0
+        self.running = False
+        self.thread = None
+        self.executor = None
+
+    def start(self):
+        self.running = True
+        self.executor = ThreadPoolExecutor(self.workers, thread_name_prefix="recognizer")
+        self.thread = threading.Thread(target=self._capture, name="recognition-capture", daemon=True)
+        self.thread.start()
+        return self
+
+    # Next result in spoken order, or None if none arrives within `timeout`.
+    # With spoken_after (a time.perf_counter() value), results for utterances
+    # that started earlier are skipped, e.g. speech captured during a prompt.
+    def next_result(self, timeout=None, spoken_after=None):
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.perf_counter())
+            try:
+                result = self.results.get(timeout=remaining)
+            except queue.Empty:
+                return None
+            if spoken_after is None or result.utterance.speech_started_at >= spoken_after:
+                return result
+            self.skipped += 1
+
+    # Discards every result waiting to be taken; returns how many there were
+    def drain(self):
+        drained = 0
+        while True:
+            try:
+                self.results.get_nowait()
+            except queue.Empty:
+                return drained
+            drained += 1
+
+    # True once the audio stream has ended and every result has been taken
+    def finished(self):
+        if self.thread is None or self.thread.is_alive():
+            return False
+        with self.lock:
+            released = self.next_release == self.next_sequence
+        return released and self.results.empty()
+
+    # Waits for the capture thread (at most the utterance being spoken), so the
+    # gate can be read directly again; unreleased results are discarded
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def latency_summary(self):
+        samples = sorted(self.latencies)
+        if not samples:
+            return {"count": 0, "mean": 0.0, "p95": 0.0, "max": 0.0}
+        return {
+            "count": len(samples),
+            "mean": sum(samples) / len(samples),
+            "p95": samples[min(len(samples) - 1, int(0.95 * len(samples)))],
+            "max": samples[-1],
+        }
+
+    def _capture(self):
+        while self.running:
+            try:
+                utterance = self.gate.next_utterance(timeout=self.poll_interval)
+            except Exception as e:
+                print(f"Audio capture failed: {e}")
+                self.running = False
+                return
+            if utterance is None:
+                if self.gate.ended:
+                    return
+                continue
+            # Capture never waits for the recognizer; past max_pending utterances are dropped
+            if not self.slots.acquire(blocking=False):
+                self.dropped += 1
+                continue
+            sequence = self.next_sequence
+            self.next_sequence += 1
+            self.executor.submit(self._transcribe, sequence, utterance)
+
+    def _transcribe(self, sequence, utterance):
+        result = RecognitionResult(sequence, utterance)
+        try:
+            result.text = self.backend.transcribe(utterance)
+        except Exception as e:
+            result.error = e
+        with self.lock:
+            self.pending[sequence] = result
+            while self.next_release in self.pending:
+                ready = self.pending.pop(self.next_release)
+                ready.released_at = time.perf_counter()
+                self.latencies.append(ready.latency)
+                self.results.put(ready)
+                self.next_release += 1
+                self.slots.release()
@@ -0,0 +1,254 @@
+# Module: Rendered-Speech Cache for the Voice Assistant
+
+# Description:
+# ------------
+# Keeps the fully processed audio of spoken replies, so a phrase is sent to
+# gTTS, decoded and sped up only the first time it is ever said. Replies like
+# "Screenshot taken." or the low-battery warning then start playing without a
+# network round trip, an MP3 decode or a temp file.
+#
+# How It Works:
+# -------------
+# 1. Audio is cached as raw PCM (PcmAudio: samples plus frame rate, sample
+#    width and channel count), after the speed-up has been applied.
+# 2. Entries are keyed by synthesizer, language, speed and text.
+# 3. Two tiers: an in-memory LRU bounded by total bytes, and an on-disk store
+#    of one small file per entry (a 12-byte header and the samples), bounded by
+#    total bytes with the least recently used files pruned first.
+# 4. A miss renders the text with the synthesizer, stores it in both tiers and
+#    returns it. A memory hit is a dictionary lookup; a disk hit reads one file.
+# 5. prewarm() renders a list of phrases on a background thread at startup.
+#
+# Synthesizers:
+# -------------
+# - GTTSSynthesizer: gTTS into an in-memory MP3, decoded by pydub, sped up the
+#   same way Windows_voice_assistant.speak always did (raise the frame rate,
+#   resample back). No uuid temp MP3 is written.
+# - FakeSynthesizer: an offline tone per phrase, optionally with an artificial
+#   delay, for tests and benchmarks without network or ffmpeg.
+
+import hashlib
+import io
+import math
+import os
+import struct
+import threading
+import time
+import zlib
+from array import array
+from collections import OrderedDict
+
+DISK_MAGIC = b"PCM1"
+DISK_HEADER = struct.Struct("<4sIHH")
+
+class PcmAudio:
+    def __init__(self, raw_data, frame_rate, sample_width=2, channels=1):
+        self.raw_data = raw_data
+        self.frame_rate = frame_rate
+        self.sample_width = sample_width
+        self.channels = channels
+
+    @property
+    def duration(self):
+        return len(self.raw_data) / (self.frame_rate * self.sample_width * self.channels)
+
+    @classmethod
+    def from_segment(cls, segment):
+        return cls(segment.raw_data, segment.frame_rate, segment.sample_width, segment.channels)
+
+    # pydub AudioSegment for pydub.playback.play; wraps the bytes without decoding
+    def to_segment(self):
+        from pydub import AudioSegment
+        return AudioSegment(data=self.raw_data, sample_width=self.sample_width, frame_rate=self.frame_rate,
+                            channels=self.channels)
+
+    def to_bytes(self):
+        return DISK_HEADER.pack(DISK_MAGIC, self.frame_rate, self.sample_width, self.channels) + self.raw_data
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, frame_rate, sample_width, channels = DISK_HEADER.unpack_from(data)
+        if magic != DISK_MAGIC:
+            raise ValueError("not a cached PCM file")
+        return cls(data[DISK_HEADER.size:], frame_rate, sample_width, channels)
+
+class GTTSSynthesizer:
+    def __init__(self, tld="co.in"):
+        self.tld = tld
+        self.name = f"gtts-{tld}"
+
+    def synthesize(self, text, lang="en", speed=1.0):
+        from gtts import gTTS
+        from pydub import AudioSegment
+
+        mp3 = io.BytesIO()
+        gTTS(text=text, lang=lang, tld=self.tld, slow=False).write_to_fp(mp3)
+        mp3.seek(0)
+        audio = AudioSegment.from_file(mp3, format="mp3")
+        if speed != 1.0:
+            audio = audio._spawn(audio.raw_data, overrides={
+                "frame_rate": int(audio.frame_rate * speed)
+            }).set_frame_rate(audio.frame_rate)
+        return PcmAudio.from_segment(audio)
+
+# A 16-bit mono tone whose pitch depends on the text and whose length on the
+# text length and speed, rendered after `delay` seconds (a stand-in for gTTS)
+class FakeSynthesizer:
+    def __init__(self, frame_rate=24000, seconds_per_character=0.06, delay=0.0):
+        self.frame_rate = frame_rate
+        self.seconds_per_character = seconds_per_character
+        self.delay = delay
+        self.name = "fake"
+        self.calls = 0
+
+    def synthesize(self, text, lang="en", speed=1.0):
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        frequency = 200 + zlib.crc32(f"{lang}:{text}".encode()) % 400
+        count = int(self.frame_rate * self.seconds_per_character * max(len(text), 1) / speed)
+        step = 2 * math.pi * frequency / self.frame_rate
+        samples = array("h", (int(8000 * math.sin(step * i)) for i in range(count)))
+        return PcmAudio(samples.tobytes(), self.frame_rate)
+
+class SpeechCache:
+    def __init__(self, synthesizer, cache_dir="speech_cache", memory_bytes=32 * 1024 * 1024,
+                 disk_bytes=200 * 1024 * 1024):
+        self.synthesizer = synthesizer
+        self.cache_dir = cache_dir
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.memory = OrderedDict()
+        self.memory_used = 0
+        self.lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.render_time = 0.0
+        self.disk_sizes = {}
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            entries = []
+            for name in os.listdir(cache_dir):
+                if name.endswith(".pcm"):
+                    stat = os.stat(os.path.join(cache_dir, name))
+                    entries.append((stat.st_mtime, name, stat.st_size))
+            # Oldest first, so pruning starts with the least recently used file
+            for _, name, size in sorted(entries):
+                self.disk_sizes[name] = size
+
+    def key(self, text, lang, speed):
+        return hashlib.sha1(f"{self.synthesizer.name}\0{lang}\0{speed:.3f}\0{text}".encode()).hexdigest()
+
+    def get(self, text, lang="en", speed=1.0):
+        key = self.key(text, lang, speed)
+        with self.lock:
+            audio = self.memory.get(key)
+            if audio is not None:
+                self.memory.move_to_end(key)
+                self.memory_hits += 1
+                return audio
+
+        audio = self._load(key)
+        if audio is not None:
+            with self.lock:
+                self.disk_hits += 1
+        else:
+            start = time.perf_counter()
+            audio = self.synthesizer.synthesize(text, lang, speed)
+            with self.lock:
+                self.misses += 1
+                self.render_time += time.perf_counter() - start
+            self._store(key, audio)
+        self._remember(key, audio)
+        return audio
+
+    # Render every phrase not cached yet; on a background thread by default
+    def prewarm(self, texts, lang="en", speed=1.0, background=True):
+        def run():
+            for text in texts:
+                try:
+                    self.get(text, lang, speed)
+                except Exception as e:
+                    print(f"Could not prewarm {text!r}: {e}")
+        if not background:
+            run()
+            return None
+        thread = threading.Thread(target=run, name="speech-prewarm", daemon=True)
+        thread.start()
+        return thread
+
+    def stats(self):
+        with self.lock:
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "render_time": self.render_time,
+                "memory_entries": len(self.memory),
+                "memory_bytes": self.memory_used,
+                "disk_entries": len(self.disk_sizes),
+                "disk_bytes": sum(self.disk_sizes.values()),
+            }
+
+    def _remember(self, key, audio):
+        size = len(audio.raw_data)
+        if size > self.memory_bytes:
+            return
+        with self.lock:
+            previous = self.memory.pop(key, None)
+            if previous is not None:
+                self.memory_used -= len(previous.raw_data)
+            self.memory[key] = audio
+            self.memory_used += size
+            while self.memory_used > self.memory_bytes:
+                _, evicted = self.memory.popitem(last=False)
+                self.memory_used -= len(evicted.raw_data)
+
+    def _path(self, name):
+        return os.path.join(self.cache_dir, name)
+
+    def _load(self, key):
+        if not self.cache_dir:
+            return None
+        name = key + ".pcm"
+        try:
+            with open(self._path(name), "rb") as file:
+                audio = PcmAudio.from_bytes(file.read())
+            # The modification time doubles as the last-use time for pruning
+            os.utime(self._path(name))
+        except (OSError, ValueError, struct.error):
+            return None
+        with self.lock:
+            if name in self.disk_sizes:
+                self.disk_sizes[name] = self.disk_sizes.pop(name)
+        return audio
+
+    def _store(self, key, audio):
+        if not self.cache_dir:
+            return
+        name = key + ".pcm"
+        data = audio.to_bytes()
+        partial = self._path(f"{name}.{threading.get_ident()}.part")
+        try:
+            with open(partial, "wb") as file:
+                file.write(data)
+            os.replace(partial, self._path(name))
+        except OSError as e:
+            print(f"Could not store cached speech: {e}")
+            return
+        with self.lock:
+            self.disk_sizes.pop(name, None)
+            self.disk_sizes[name] = len(data)
+            stale = []
+            total = sum(self.disk_sizes.values())
+            while total > self.disk_bytes and len(self.disk_sizes) > 1:
+                oldest, size = next(iter(self.disk_sizes.items()))
+                del self.disk_sizes[oldest]
+                total -= size
+                stale.append(oldest)
+        for oldest in stale:
+            try:
+                os.remove(self._path(oldest))
+            except OSError:
+                pass
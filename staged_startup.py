@@ -0,0 +1,144 @@
+# Module: Staged Startup and Startup Report
+
+# Description:
+# ------------
+# Helpers that let each entry point load only what its first step needs, load
+# the rest on first use or in the background, and report where its startup
+# time went. Before, every script imported all of its heavy libraries
+# (mediapipe, pyautogui, screen_brightness_control, ...) at the top and built
+# its models before doing anything else.
+#
+# How It Works:
+# -------------
+# 1. `startup` is the process-wide StartupReport. Its clock starts when this
+#    module is first imported, so entry points import it first.
+# 2. startup.import_module(name) imports a module now and records how long the
+#    import took; startup.mark(stage) records when a stage was reached, e.g.
+#    "camera open" or "ready".
+# 3. lazy_import(name) returns a stand-in that imports the real module on first
+#    attribute access (also recorded), so `pyautogui.screenshot()` works as
+#    usual but only costs the import when a command first needs it.
+# 4. warm_up(modules, tasks) imports lazy modules and runs other slow set-up
+#    on a background thread, so the import is usually done before first use.
+# 5. BackgroundTask runs one slow set-up step (e.g. loading the MediaPipe
+#    model) on a thread while the caller does something else (e.g. opening the
+#    camera); result() waits for it and re-raises its exception.
+# 6. startup.lines() is the report: time to each stage, then every recorded
+#    import, slowest first, with the thread it ran on.
+
+import importlib
+import sys
+import threading
+import time
+
+PROCESS_START = time.perf_counter()
+
+class StartupReport:
+    def __init__(self, start=PROCESS_START):
+        self.start = start
+        self.stages = []
+        self.imports = []
+        self.lock = threading.Lock()
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def mark(self, stage):
+        with self.lock:
+            self.stages.append((stage, self.elapsed()))
+
+    def stage_time(self, stage):
+        for name, elapsed in self.stages:
+            if name == stage:
+                return elapsed
+        return None
+
+    def import_module(self, name):
+        if name in sys.modules:
+            return sys.modules[name]
+        started = time.perf_counter()
+        module = importlib.import_module(name)
+        with self.lock:
+            self.imports.append((name, time.perf_counter() - started, threading.current_thread().name))
+        return module
+
+    def lines(self):
+        with self.lock:
+            stages, imports = list(self.stages), sorted(self.imports, key=lambda entry: -entry[1])
+        lines = [f"Startup: {stage} at {elapsed * 1e3:.0f} ms" for stage, elapsed in stages]
+        lines += [f"  import {name}: {seconds * 1e3:.0f} ms ({thread})" for name, seconds, thread in imports]
+        return lines
+
+    def print_report(self):
+        for line in self.lines():
+            print(line)
+
+startup = StartupReport()
+
+class LazyModule:
+    def __init__(self, name, report=startup):
+        self._name = name
+        self._report = report
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = self._report.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attribute):
+        return getattr(self._load(), attribute)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+def lazy_import(name, report=startup):
+    return LazyModule(name, report)
+
+class BackgroundTask:
+    def __init__(self, function, name="startup-task"):
+        self.function = function
+        self.value = None
+        self.error = None
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        try:
+            self.value = self.function()
+        except BaseException as e:
+            self.error = e
+
+    def done(self):
+        return not self.thread.is_alive()
+
+    def result(self, timeout=None):
+        self.thread.join(timeout)
+        if self.thread.is_alive():
+            raise TimeoutError(f"{self.thread.name} did not finish within {timeout} s")
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+# Import lazy modules, then run tasks, on one background thread; a failure is
+# printed and the rest still run (the error shows again on first real use)
+def warm_up(modules=(), tasks=(), report=startup, stage="warm-up done"):
+    def run():
+        for module in modules:
+            try:
+                module._load()
+            except Exception as e:
+                print(f"Could not preload {module._name}: {e}")
+        for task in tasks:
+            try:
+                task()
+            except Exception as e:
+                print(f"Startup task failed: {e}")
+        report.mark(stage)
+    thread = threading.Thread(target=run, name="warm-up", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,647 @@
+# Project: Benchmarks for the Voice Assistant
+
+# Description:
+# ------------
+# Offline measurements for Windows_voice_assistant.py that need neither a
+# microphone, the network nor Windows.
+#
+# Speech benchmark:
+#   Time from speak() being called to audio being ready to play, for a cold
+#   start (every reply rendered by the synthesizer), a warm in-memory cache and
+#   a fresh process with only the on-disk cache (a new SpeechCache over the same
+#   directory). The FakeSynthesizer's --render-delay stands in for the gTTS
+#   round trip and MP3 decode.
+#
+# Audio benchmark:
+#   Request-to-first-sample latency of isolated sounds and of an urgent sound
+#   cutting into a long one, with a new thread and a freshly opened output per
+#   sound (the old play_sound_effect/speak) versus the persistent AudioEngine.
+#   FakeOutput plays in real time and its --open-delay stands in for audio
+#   device setup. Also reports how long sounds overlapped (talked over each
+#   other) during a burst of replies.
+#
+# Hotword benchmark:
+#   Streams a WAV file through hotword_gate.HotwordGate as a stand-in for the
+#   microphone. By default the WAV is synthetic: background noise with
+#   "hello windows" bursts and other speech-like bursts of random length, whose
+#   times are known. A fake recognizer stage tells them apart by pitch and is
+#   charged --recognizer-latency per call. Reports time from the end of the
+#   hotword to activation, missed hotwords and recognizer calls per hour, next
+#   to a model of the old loop (1 s ambient-noise calibration per iteration,
+#   0.8 s end-of-phrase pause, one recognize_google call per utterance).
+#   With --wav a real recording is used instead; without ground truth only the
+#   utterance and recognizer-call rates are reported.
+#
+# Pipeline benchmark:
+#   A command session played back in real time: --commands short commands of
+#   different pitches with short gaps, as when commands follow each other
+#   quickly. The WAV source drops audio the way an unread microphone buffer
+#   overflows. A fake backend names each command by its pitch and takes
+#   --recognizer-latency seconds per call. Compares the old session loop
+#   (listen, then recognize, one after the other) with
+#   recognition_pipeline.RecognitionPipeline: commands recognized in order from
+#   their first word (not clipped by lost audio) and end-of-speech-to-command
+#   latency.
+#
+# Commands benchmark:
+#   Matches a corpus of --transcripts synthetic transcripts, with filler words,
+#   tricky search queries and non-commands, whose intended command and
+#   parameters are known. Compares the old execute_command if/elif chain of
+#   substring tests with command_registry.CommandRegistry: match time per
+#   transcript and how many transcripts get the right command with the right
+#   brightness level, search text and site.
+#
+# Monitor benchmark:
+#   --hours of laptop use on a virtual clock: a FakeBattery draining at
+#   --drain percent per hour, with charging breaks. Compares the old
+#   check_battery_status loop (a read every 60 s, a warning on every read at or
+#   below 15%) with monitor_scheduler.BatteryProbe: battery reads, warnings
+#   spoken and the delay from crossing 15% to the first warning.
+#
+# Usage:
+# ------
+#   python voice_benchmark.py speech
+#   python voice_benchmark.py speech --render-delay 0.4 --repeats 5
+#   python voice_benchmark.py audio --open-delay 0.05
+#   python voice_benchmark.py hotword --minutes 30
+#   python voice_benchmark.py hotword --wav living_room.wav
+#   python voice_benchmark.py pipeline --commands 12 --recognizer-latency 1.0
+#   python voice_benchmark.py commands --transcripts 5000
+#   python voice_benchmark.py monitor --hours 24 --drain 25
+
+import argparse
+import itertools
+import os
+import shutil
+import tempfile
+import threading
+import time
+import wave
+import numpy as np
+
+from audio_engine import PRIORITY_URGENT, AudioEngine, FakeOutput
+from command_registry import ASSISTANT_COMMANDS, CommandRegistry
+from monitor_scheduler import BatteryProbe, FakeBattery, MonitorScheduler, VirtualClock
+from hotword_gate import DurationFilter, HotwordGate, NoiseFloor, RecognizerHotword, WavFrames
+from recognition_pipeline import FakeBackend, RecognitionPipeline
+from speech_cache import FakeSynthesizer, PcmAudio, SpeechCache
+
+# The assistant's fixed replies plus a few that change every time
+SPEECH_PHRASES = [
+    "Battery is getting low, charge the laptop.",
+    "Screenshot taken.",
+    "Shutdown cancelled.",
+    "Active window closed.",
+    "Video toggled.",
+    "YouTube is not currently the active window.",
+    "Brightness set to 40 percent",
+    "The current time is 09:41 PM",
+]
+
+def percentile_ms(values, fraction):
+    return float(np.percentile(values, fraction * 100)) * 1e3 if values else 0.0
+
+def time_lookups(cache, phrases, repeats):
+    times = []
+    for _ in range(repeats):
+        for text in phrases:
+            start = time.perf_counter()
+            cache.get(text, speed=1.2)
+            times.append(time.perf_counter() - start)
+    return times
+
+def run_speech_benchmark(render_delay, repeats):
+    cache_dir = tempfile.mkdtemp(prefix="speech_cache_")
+    try:
+        synthesizer = FakeSynthesizer(delay=render_delay)
+        cache = SpeechCache(synthesizer, cache_dir)
+        rows = [("cold", time_lookups(cache, SPEECH_PHRASES, 1)),
+                ("memory", time_lookups(cache, SPEECH_PHRASES, repeats))]
+        restarted = SpeechCache(FakeSynthesizer(delay=render_delay), cache_dir)
+        rows.append(("disk", time_lookups(restarted, SPEECH_PHRASES, 1)))
+
+        print(f"{len(SPEECH_PHRASES)} phrases, synthesizer delay {render_delay * 1e3:.0f} ms")
+        print(f"{'cache':<7} {'mean ms':>9} {'p95 ms':>9}")
+        for name, times in rows:
+            print(f"{name:<7} {np.mean(times) * 1e3:>9.3f} {percentile_ms(times, 0.95):>9.3f}")
+        stats = cache.stats()
+        print(f"Synthesizer calls: {synthesizer.calls} in the first process, "
+              f"{restarted.synthesizer.calls} after the restart; {stats['disk_entries']} files, "
+              f"{stats['disk_bytes'] / 1024:.0f} KB on disk")
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+# The old way: a new thread and a new output device per sound. Returns a
+# function like AudioEngine.play that records (start, first sample, end).
+def thread_per_sound_player(open_delay, spans):
+    def play(audio):
+        requested = time.perf_counter()
+        def run():
+            output = FakeOutput(realtime=True, open_delay=open_delay)
+            output.open(audio.frame_rate, audio.sample_width, audio.channels)
+            first = time.perf_counter()
+            output.write(audio.raw_data)
+            spans.append((requested, first, time.perf_counter()))
+        thread = threading.Thread(target=run)
+        thread.start()
+        return thread
+    return play
+
+# Total seconds during which two or more sounds were playing at once
+def overlap_seconds(spans):
+    events = sorted([(first, 1) for _, first, _ in spans] + [(end, -1) for _, _, end in spans])
+    playing, overlap, last = 0, 0.0, None
+    for moment, change in events:
+        if playing >= 2:
+            overlap += moment - last
+        playing += change
+        last = moment
+    return overlap
+
+def run_audio_benchmark(open_delay, sounds, duration):
+    synthesizer = FakeSynthesizer(seconds_per_character=0.01)
+    reply = synthesizer.synthesize("x" * int(duration * 100))
+    long_reply = PcmAudio(reply.raw_data * 4, reply.frame_rate)
+    print(f"{sounds} replies of {reply.duration:.2f} s, device open {open_delay * 1e3:.0f} ms")
+    print(f"{'player':<18} {'isolated ms':>12} {'urgent ms':>10} {'overlap s':>10}")
+
+    # Old: isolated sounds, then an urgent one during a long one, then a burst
+    spans = []
+    play = thread_per_sound_player(open_delay, spans)
+    for _ in range(sounds):
+        play(reply).join()
+    isolated = [first - requested for requested, first, _ in spans]
+    spans.clear()
+    long_thread = play(long_reply)
+    time.sleep(0.1)
+    play(reply).join()
+    urgent = spans[0][1] - spans[0][0]
+    long_thread.join()
+    spans.clear()
+    threads = [play(reply) for _ in range(sounds)]
+    for thread in threads:
+        thread.join()
+    print(f"{'thread per sound':<18} {np.mean(isolated) * 1e3:>12.1f} {urgent * 1e3:>10.1f} "
+          f"{overlap_seconds(spans):>10.2f}")
+
+    engine = AudioEngine(FakeOutput(realtime=True, open_delay=open_delay)).start()
+    handles = []
+    for _ in range(sounds):
+        handles.append(engine.play(reply))
+        handles[-1].wait()
+    isolated = [handle.queue_latency for handle in handles]
+    engine.play(long_reply)
+    time.sleep(0.1)
+    urgent_handle = engine.play(reply, PRIORITY_URGENT, interrupt=True)
+    urgent_handle.wait()
+    handles = [engine.play(reply) for _ in range(sounds)]
+    for handle in handles:
+        handle.wait()
+    # One playback thread writes every sound, so sounds cannot overlap
+    print(f"{'audio engine':<18} {np.mean(isolated) * 1e3:>12.1f} {urgent_handle.queue_latency * 1e3:>10.1f} "
+          f"{0.0:>10.2f}")
+    summary = engine.latency_summary()
+    print(f"Audio engine: {engine.output.opens} device opens, {engine.played} played, {engine.interrupted} "
+          f"interrupted; queue latency p95 {summary['p95'] * 1e3:.1f} ms including waits behind earlier replies")
+    engine.close()
+
+HOTWORD_PITCH = 440.0
+CHATTER_PITCH = 250.0
+
+# Noise with speech-like bursts (a pitched tone with a syllable-rate envelope).
+# Returns the list of (start, end, is_hotword) bursts.
+def write_speech_wav(path, minutes, hotword_rate=0.3, rate=16000, seed=0):
+    rng = np.random.default_rng(seed)
+    total = minutes * 60.0
+    events = []
+    t = rng.uniform(1.0, 4.0)
+    while t < total - 6:
+        is_hotword = rng.random() < hotword_rate
+        duration = rng.uniform(0.7, 1.3) if is_hotword else rng.choice([rng.uniform(0.2, 0.6), rng.uniform(0.6, 4.0)])
+        events.append((t, t + duration, is_hotword))
+        t += duration + rng.uniform(2.0, 15.0)
+    samples = rng.normal(0, 60, int(total * rate))
+    for start, end, is_hotword in events:
+        first, last = int(start * rate), int(end * rate)
+        times = np.arange(last - first) / rate
+        pitch = HOTWORD_PITCH if is_hotword else CHATTER_PITCH
+        envelope = 0.6 + 0.4 * np.sin(2 * np.pi * 4 * times)
+        samples[first:last] += 3000 * envelope * np.sin(2 * np.pi * pitch * times)
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(np.clip(samples, -32768, 32767).astype("<i2").tobytes())
+    return events
+
+# Stand-in for recognize_google: "hello windows" for the hotword pitch
+def fake_recognize(utterance):
+    samples = np.frombuffer(utterance.data, dtype="<i2").astype(np.float64)
+    loud = samples[np.abs(samples) > 500]
+    crossings = np.count_nonzero(np.diff(np.signbit(loud)))
+    pitch = crossings / 2 / (len(loud) / utterance.rate) if len(loud) else 0.0
+    return "hello windows" if abs(pitch - HOTWORD_PITCH) < abs(pitch - CHATTER_PITCH) else "something else"
+
+# The old listen_and_execute trigger loop on the same timeline: calibrate for
+# 1 s, listen (5 s timeout), wait out the 0.8 s pause, send the phrase to
+# Google. A phrase that began during calibration is heard clipped and missed.
+def model_old_loop(events, total, latency, calibration=1.0, pause=0.8, timeout=5.0):
+    t, calls, activations, missed = 0.0, 0, [], 0
+    index = 0
+    while index < len(events) and t < total:
+        t += calibration
+        start, end, is_hotword = events[index]
+        if end <= t:
+            missed += is_hotword
+            index += 1
+            continue
+        if start > t + timeout:
+            t += timeout
+            continue
+        clipped = start < t
+        t = end + pause + latency
+        calls += 1
+        if is_hotword and not clipped:
+            activations.append(pause + latency)
+        elif is_hotword:
+            missed += 1
+        index += 1
+    return calls, activations, missed
+
+def run_hotword_benchmark(minutes, latency, wav=None):
+    directory = None
+    if wav is None:
+        directory = tempfile.mkdtemp(prefix="hotword_")
+        wav = os.path.join(directory, "speech.wav")
+        events = write_speech_wav(wav, minutes)
+    else:
+        events = None
+    try:
+        gate = HotwordGate(WavFrames(wav), NoiseFloor(), [DurationFilter(), RecognizerHotword(fake_recognize)])
+        start = time.perf_counter()
+        activations, missed, false_activations = [], 0, 0
+        pending = [event for event in events if event[2]] if events else []
+        while True:
+            utterance = gate.wait_for_hotword()
+            if utterance is None:
+                break
+            if events is None:
+                continue
+            while pending and pending[0][1] < utterance.start - 0.5:
+                pending.pop(0)
+                missed += 1
+            if pending and pending[0][0] - 0.5 <= utterance.start <= pending[0][1]:
+                # gate.now is when the gate returned: the end of speech plus the closing silence
+                activations.append(gate.now - pending.pop(0)[1] + latency)
+            else:
+                false_activations += 1
+        missed += len(pending)
+        elapsed = time.perf_counter() - start
+        gate.close()
+        stats = gate.stats()
+        hours = stats["audio_seconds"] / 3600
+
+        print(f"{stats['audio_seconds'] / 60:.1f} min of audio from {'synthetic speech' if directory else wav}, "
+              f"processed in {elapsed:.1f} s; {stats['utterances']} utterances, "
+              f"noise floor {stats['noise_floor']:.0f} RMS")
+        recognizer_calls = stats["stage_calls"]["recognizer"]
+        if events is None:
+            print(f"Utterances/hour {stats['utterances'] / hours:.0f}, recognizer calls/hour "
+                  f"{recognizer_calls / hours:.0f} (every utterance would be a call in the old loop)")
+            return
+        hotwords = sum(1 for event in events if event[2])
+        print(f"{len(events)} speech bursts, {hotwords} of them hotwords; recognizer latency {latency * 1e3:.0f} ms")
+        print(f"{'loop':<10} {'activation ms':>14} {'missed':>7} {'false':>6} {'calls/hour':>11}")
+        old_calls, old_activations, old_missed = model_old_loop(events, stats["audio_seconds"], latency)
+        print(f"{'old':<10} {np.mean(old_activations) * 1e3:>14.0f} {old_missed:>7} {0:>6} {old_calls / hours:>11.0f}")
+        mean = np.mean(activations) * 1e3 if activations else 0.0
+        print(f"{'gate':<10} {mean:>14.0f} {missed:>7} {false_activations:>6} {recognizer_calls / hours:>11.0f}")
+    finally:
+        if directory is not None:
+            shutil.rmtree(directory, ignore_errors=True)
+
+COMMAND_PITCHES = [250.0, 330.0, 410.0, 490.0, 570.0, 650.0]
+
+# Commands of 0.6-1.4 s with 0.7-2 s gaps, command k at COMMAND_PITCHES[k % 6].
+# Returns the (start, end, name) of each command.
+def write_command_wav(path, commands, rate=16000, seed=1):
+    rng = np.random.default_rng(seed)
+    spans, t = [], 1.0
+    for index in range(commands):
+        duration = rng.uniform(0.6, 1.4)
+        spans.append((t, t + duration, COMMAND_PITCHES[index % len(COMMAND_PITCHES)]))
+        t += duration + rng.uniform(0.7, 2.0)
+    samples = rng.normal(0, 60, int((t + 2.0) * rate))
+    for start, end, pitch in spans:
+        first, last = int(start * rate), int(end * rate)
+        times = np.arange(last - first) / rate
+        envelope = 0.6 + 0.4 * np.sin(2 * np.pi * 4 * times)
+        samples[first:last] += 3000 * envelope * np.sin(2 * np.pi * pitch * times)
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(np.clip(samples, -32768, 32767).astype("<i2").tobytes())
+    return [(start, end, f"command {pitch:.0f}") for start, end, pitch in spans]
+
+# Stand-in for the recognizer: the command whose pitch is closest to the
+# strongest frequency in the utterance
+def fake_command(utterance):
+    samples = np.frombuffer(utterance.data, dtype="<i2").astype(np.float64)
+    if not len(samples):
+        return None
+    spectrum = np.abs(np.fft.rfft(samples))
+    pitch = np.fft.rfftfreq(len(samples), 1 / utterance.rate)[np.argmax(spectrum)]
+    return f"command {min(COMMAND_PITCHES, key=lambda candidate: abs(candidate - pitch)):.0f}"
+
+# Notes where in the WAV file each utterance started, to tell commands heard
+# from their first word apart from ones clipped by dropped audio
+class FilePositionGate:
+    def __init__(self, gate):
+        self.gate = gate
+
+    @property
+    def ended(self):
+        return self.gate.ended
+
+    def next_utterance(self, timeout=None):
+        utterance = self.gate.next_utterance(timeout)
+        if utterance is not None:
+            utterance.file_start = self.gate.source.position - (self.gate.now - utterance.start)
+        return utterance
+
+# The old session loop: nothing is read from the microphone while recognizing
+def run_sequential_session(gate, backend):
+    heard, latencies = [], []
+    while True:
+        utterance = gate.next_utterance()
+        if utterance is None:
+            return heard, latencies
+        text = backend.transcribe(utterance)
+        if text is not None:
+            heard.append((utterance.file_start, text))
+            latencies.append(time.perf_counter() - utterance.speech_ended_at)
+
+def run_pipelined_session(gate, backend, workers):
+    pipeline = RecognitionPipeline(gate, backend, workers=workers).start()
+    heard, latencies = [], []
+    while True:
+        result = pipeline.next_result(timeout=0.1)
+        if result is None:
+            if pipeline.finished():
+                break
+            continue
+        if result.text is not None:
+            heard.append((result.utterance.file_start, result.text))
+            latencies.append(result.latency)
+    pipeline.stop()
+    return heard, latencies
+
+# Commands recognized in spoken order with their start captured (within 0.15 s)
+def complete_commands(commands, heard, tolerance=0.15):
+    recognized, index = 0, 0
+    for start, text in heard:
+        while index < len(commands) and commands[index][1] < start:
+            index += 1
+        if index < len(commands) and abs(commands[index][0] - start) <= tolerance and commands[index][2] == text:
+            recognized += 1
+            index += 1
+    return recognized
+
+def run_pipeline_benchmark(commands, latency, workers, max_lag=0.1):
+    directory = tempfile.mkdtemp(prefix="pipeline_")
+    try:
+        wav = os.path.join(directory, "session.wav")
+        spoken = write_command_wav(wav, commands)
+        print(f"{commands} commands in a {spoken[-1][1] + 2.0:.1f} s session, played in real time; "
+              f"recognizer latency {latency * 1e3:.0f} ms, {workers} pipeline workers")
+        print(f"{'loop':<11} {'recognized':>10} {'dropped s':>10} {'mean ms':>8} {'p95 ms':>7} {'max ms':>7}")
+        for name in ("sequential", "pipelined"):
+            frames = WavFrames(wav, realtime=True, max_lag=max_lag)
+            gate = HotwordGate(frames, NoiseFloor())
+            backend = FakeBackend(fake_command, delay=latency)
+            if name == "sequential":
+                heard, latencies = run_sequential_session(FilePositionGate(gate), backend)
+            else:
+                heard, latencies = run_pipelined_session(FilePositionGate(gate), backend, workers)
+            gate.close()
+            recognized = complete_commands(spoken, heard)
+            dropped = frames.dropped * frames.frame_samples / frames.rate
+            print(f"{name:<11} {f'{recognized}/{len(spoken)}':>10} {dropped:>10.1f} "
+                  f"{np.mean(latencies) * 1e3 if latencies else 0.0:>8.0f} "
+                  f"{percentile_ms(latencies, 0.95) if latencies else 0.0:>7.0f} "
+                  f"{max(latencies, default=0.0) * 1e3:>7.0f}")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+SEARCH_QUERIES = ["python tutorials", "cats", "weather in london", "how to take a screenshot", "turn on lights",
+                  "lion king", "onion soup recipes", "research papers", "play the video game awards", "dragon ball",
+                  "open chrome extensions", "go to sleep music", "london weather", "moon landing"]
+SEARCH_SITES = ["youtube", "wikipedia", "google"]
+NON_COMMANDS = ["I was researching online yesterday", "what time does the match start", "turn the lights on",
+                "tell me a joke", "my phone is on the table", "the window is open", "is it going to rain today",
+                "change of plans we are going home"]
+FILLER_BEFORE = ["", "", "please ", "hey ", "can you ", "okay "]
+FILLER_AFTER = ["", "", " please", " for me", " thanks"]
+
+# (transcript, expected (command, slots) or None)
+def make_command_corpus(count, seed=2):
+    rng = np.random.default_rng(seed)
+    fixed = [(name, phrase) for name, phrases in ASSISTANT_COMMANDS.items() for phrase in phrases if "{" not in phrase]
+    corpus = []
+    for _ in range(count):
+        kind = rng.random()
+        before = FILLER_BEFORE[rng.integers(len(FILLER_BEFORE))]
+        after = FILLER_AFTER[rng.integers(len(FILLER_AFTER))]
+        if kind < 0.3:
+            query = SEARCH_QUERIES[rng.integers(len(SEARCH_QUERIES))]
+            if rng.random() < 0.8:
+                site = SEARCH_SITES[rng.integers(len(SEARCH_SITES))]
+                corpus.append((f"{before}search {query} on {site}", ("search", {"query": query, "site": site})))
+            else:
+                corpus.append((f"{before}search {query}", ("search", {"query": query})))
+        elif kind < 0.45:
+            level = int(rng.integers(1, 101))
+            unit = ["", "%", " percent"][rng.integers(3)]
+            corpus.append((f"{before}set brightness to {level}{unit}{after}", ("brightness", {"level": str(level)})))
+        elif kind < 0.55:
+            corpus.append((NON_COMMANDS[rng.integers(len(NON_COMMANDS))], None))
+        else:
+            name, phrase = fixed[rng.integers(len(fixed))]
+            corpus.append((f"{before}{phrase}{after}", (name, {})))
+    return corpus
+
+# The old execute_command chain, returning what it would have run
+def legacy_match(command):
+    command = command.lower()
+    if "what is the time now" in command:
+        return "time", {}
+    elif "change window" in command:
+        return "change_window", {}
+    elif "lock my pc" in command:
+        return "lock", {}
+    elif "go to sleep" in command:
+        return "sleep", {}
+    elif "shut down my pc" in command:
+        return "shutdown", {}
+    elif "what is my battery percentage" in command or "what's my battery percentage" in command:
+        return "battery", {}
+    elif "open chrome" in command:
+        return "open_chrome", {}
+    elif "take a screenshot" in command:
+        return "screenshot", {}
+    elif "open control centre" in command:
+        return "control_centre", {}
+    elif "open control centre" in command:
+        return "control_centre", {}
+    elif "open settings" in command:
+        return "settings", {}
+    elif "show desktop" in command:
+        return "desktop", {}
+    elif "close the window" in command:
+        return "close_window", {}
+    elif "play the video" in command or "pause the video" in command or "stop the video" in command:
+        return "toggle_video", {}
+    elif "set brightness to" in command:
+        brightness_level = command.split("set brightness to")[1].strip()
+        return "brightness", {"level": ''.join(filter(str.isdigit, brightness_level))}
+    elif "search" in command:
+        try:
+            search_text = command.split("search")[1].split("on")[0].strip()
+            website = command.split("on")[1].strip()
+            return "search", {"query": search_text, "site": website}
+        except Exception:
+            return "search", None
+    return None
+
+def run_commands_benchmark(transcripts):
+    corpus = make_command_corpus(transcripts)
+    registry = CommandRegistry.from_table(ASSISTANT_COMMANDS)
+    registry.match("")  # compile outside the timing
+
+    def registry_match(text):
+        match = registry.match(text)
+        return None if match is None else (match.name, match.slots)
+
+    print(f"{len(corpus)} transcripts, {sum(1 for _, expected in corpus if expected is None)} of them not commands")
+    print(f"{'matcher':<9} {'correct':>13} {'mean us':>8} {'p95 us':>7} {'max us':>7}")
+    for name, match in (("chain", legacy_match), ("registry", registry_match)):
+        times, correct = [], 0
+        for text, expected in corpus:
+            start = time.perf_counter()
+            result = match(text)
+            times.append(time.perf_counter() - start)
+            correct += result == expected
+        print(f"{name:<9} {f'{correct}/{len(corpus)}':>13} {np.mean(times) * 1e6:>8.1f} "
+              f"{percentile_ms(times, 0.95) * 1e3:>7.1f} {max(times) * 1e6:>7.1f}")
+
+# (start hour, plugged in) for a day of use: long stretches on battery with charging breaks
+def battery_schedule(hours):
+    schedule, t = [], 0.0
+    for duration, plugged in itertools.cycle([(3.7, False), (1.3, True), (3.6, False), (1.5, True)]):
+        if t >= hours:
+            return schedule
+        schedule.append((t, plugged))
+        t += duration
+
+# The old check_battery_status as a probe: read every 60 s, warn on every low read
+class FixedIntervalBatteryLoop:
+    name = "battery"
+
+    def __init__(self, read, on_alert, low=15):
+        self.read = read
+        self.on_alert = on_alert
+        self.low = low
+
+    def poll(self, now):
+        percent, _ = self.read()
+        if percent <= self.low:
+            self.on_alert(now)
+        return 60.0
+
+def run_monitor_benchmark(hours, drain):
+    schedule = battery_schedule(hours)
+    # When the battery first reaches 15% in each stretch on battery, from a 1 s reference run
+    clock = VirtualClock()
+    battery = FakeBattery(clock, drain_per_hour=drain)
+    crossings, below, changes = [], False, list(schedule)
+    for second in range(int(hours * 3600)):
+        clock.advance_to(second)
+        if changes and changes[0][0] * 3600 <= second:
+            battery.plug(changes.pop(0)[1])
+        percent, plugged = battery.read()
+        if percent <= 15 and not plugged and not below:
+            crossings.append(second)
+        below = percent <= 15 and not plugged
+
+    print(f"{hours:.0f} h on a virtual clock, draining {drain:.0f}%/h with {sum(p for _, p in schedule)} "
+          f"charging breaks; battery crossed 15% {len(crossings)} times")
+    print(f"{'monitor':<10} {'reads':>6} {'warnings':>9} {'mean delay s':>13} {'max delay s':>12}")
+    for name in ("old loop", "scheduler"):
+        clock = VirtualClock()
+        battery = FakeBattery(clock, drain_per_hour=drain)
+        scheduler = MonitorScheduler(clock)
+        alerts = []
+        if name == "old loop":
+            scheduler.add(FixedIntervalBatteryLoop(battery.read, alerts.append))
+        else:
+            scheduler.add(BatteryProbe(battery.read, lambda alert: alerts.append(alert.time)))
+        for start, plugged in schedule:
+            scheduler.run_until(start * 3600)
+            battery.plug(plugged)
+        scheduler.run_until(hours * 3600)
+        delays = []
+        for crossing in crossings:
+            later = [alert for alert in alerts if alert >= crossing]
+            if later:
+                delays.append(later[0] - crossing)
+        print(f"{name:<10} {battery.reads:>6} {len(alerts):>9} {np.mean(delays) if delays else 0.0:>13.0f} "
+              f"{max(delays, default=0.0):>12.0f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the voice assistant")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    speech = subparsers.add_parser("speech", help="reply latency with and without the speech cache")
+    speech.add_argument("--render-delay", type=float, default=0.3,
+                        help="seconds the fake synthesizer takes per reply (gTTS + decode)")
+    speech.add_argument("--repeats", type=int, default=20, help="warm lookups per phrase")
+
+    audio = subparsers.add_parser("audio", help="first-sample latency of thread-per-sound vs the audio engine")
+    audio.add_argument("--open-delay", type=float, default=0.05, help="seconds to open the fake audio device")
+    audio.add_argument("--sounds", type=int, default=5, help="replies per measurement")
+    audio.add_argument("--duration", type=float, default=0.3, help="seconds per reply")
+
+    hotword = subparsers.add_parser("hotword", help="time to activation and recognizer calls of the hotword gate")
+    hotword.add_argument("--minutes", type=float, default=20, help="length of the synthetic recording")
+    hotword.add_argument("--recognizer-latency", type=float, default=0.5, help="seconds per recognize_google call")
+    hotword.add_argument("--wav", help="16-bit WAV recording to use instead of synthetic speech")
+
+    pipeline = subparsers.add_parser("pipeline", help="commands recognized and latency, sequential vs pipelined")
+    pipeline.add_argument("--commands", type=int, default=12, help="commands in the synthetic session")
+    pipeline.add_argument("--recognizer-latency", type=float, default=1.0, help="seconds per recognizer call")
+    pipeline.add_argument("--workers", type=int, default=2, help="pipeline worker threads")
+
+    commands = subparsers.add_parser("commands", help="match time and accuracy, if/elif chain vs command registry")
+    commands.add_argument("--transcripts", type=int, default=5000, help="transcripts in the synthetic corpus")
+
+    monitor = subparsers.add_parser("monitor", help="battery reads and warnings, old 60 s loop vs the scheduler")
+    monitor.add_argument("--hours", type=float, default=24, help="hours of simulated use")
+    monitor.add_argument("--drain", type=float, default=25, help="battery drain in percent per hour")
+
+    args = parser.parse_args()
+    if args.benchmark == "speech":
+        run_speech_benchmark(args.render_delay, args.repeats)
+    elif args.benchmark == "audio":
+        run_audio_benchmark(args.open_delay, args.sounds, args.duration)
+    elif args.benchmark == "hotword":
+        run_hotword_benchmark(args.minutes, args.recognizer_latency, args.wav)
+    elif args.benchmark == "pipeline":
+        run_pipeline_benchmark(args.commands, args.recognizer_latency, args.workers)
+    elif args.benchmark == "commands":
+        run_commands_benchmark(args.transcripts)
+    elif args.benchmark == "monitor":
+        run_monitor_benchmark(args.hours, args.drain)
+
+if __name__ == "__main__":
+    main()